@@ -6,6 +6,8 @@ import os
 import re
 import json
 import time
+import hashlib
+import functools
 import threading
 from typing import Any, List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
@@ -27,7 +29,17 @@ from app.helper.sites import SitesHelper
 
 from plugins.nexusinvitee.data import DataManager
 from plugins.nexusinvitee.utils import NotificationHelper, SiteHelper
-from plugins.nexusinvitee.module_loader import ModuleLoader
+from plugins.nexusinvitee.module_loader import HandlerRegistry
+from plugins.nexusinvitee.refresher import HostThrottle, ThrottledSession, SiteRefresher
+from plugins.nexusinvitee.diff import EVENT_NEW, EVENT_REMOVED, EVENT_BANNED, EVENT_HEALTH, keyed_invitees
+from plugins.nexusinvitee.history import HistoryStore
+from plugins.nexusinvitee.query import InviteeIndex
+from plugins.nexusinvitee.summary import count_invitees
+from plugins.nexusinvitee.scheduler import RefreshScheduler, CIRCUIT_OPEN
+from plugins.nexusinvitee.metrics import MetricsRecorder, PHASE_NAMES
+from plugins.nexusinvitee.page_cache import PageCache
+from plugins.nexusinvitee.parse_pool import ParsePool
+from plugins.nexusinvitee.records import to_dicts
 
 class Prescription():
     def __init__(self):
@@ -401,7 +413,7 @@ class nexusinvitee(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/madrays/MoviePilot-Plugins/main/icons/nexusinvitee.png"
     # 插件版本
-    plugin_version = "1.2.7"
+    plugin_version = "1.5.9"
     # 插件作者
     plugin_author = "madrays"
     # 作者主页
@@ -419,6 +431,15 @@ class nexusinvitee(_PluginBase):
     _cron = "0 9 * * *"  # 默认每天早上9点检查一次
     _onlyonce = False
     _nexus_sites = []  # 支持多选的站点列表
+    _max_workers = 4  # 全局并发刷新站点数
+    _request_interval = 0.5  # 同一站点相邻请求最小间隔（秒）
+    _page_size = 100  # 详情页每个站点最多渲染的后宫成员数，0表示全部
+    _full_crawl_days = 7  # 完整翻页间隔（天），期间定时刷新增量翻页，0表示每次完整翻页
+    _force_full_crawl = False  # 本次刷新是否强制完整翻页（手动刷新）
+    _parse_workers = 0  # 后宫列表页面解析进程数，0表示在请求线程中解析
+    _adaptive_schedule = False  # 按站点自适应调度刷新，关闭时按执行周期刷新
+    # 自适应调度检查到期站点的间隔（分钟）
+    _schedule_tick_minutes = 15
     
     # 站点助手
     sites: SitesHelper = None
@@ -426,12 +447,41 @@ class nexusinvitee(_PluginBase):
     
     # 配置和数据管理器
     data_manager: DataManager = None
+
+    # 后宫成员历史数据
+    history: HistoryStore = None
+
+    # 站点刷新调度器
+    refresh_scheduler: RefreshScheduler = None
+
+    # 刷新性能记录
+    metrics: MetricsRecorder = None
+
+    # 页面解析结果缓存
+    page_cache: PageCache = None
+
+    # 多进程解析池，初始化时创建并在多次刷新间复用，停止服务时关闭
+    _parse_pool: ParsePool = None
+
+    # 刷新状态，检查与设置需持有刷新锁，防止定时刷新与手动刷新重叠
+    _refreshing: bool = False
+    _refresh_lock = threading.Lock()
+
+    # 后宫成员查询索引及其对应的数据版本
+    _invitee_index: InviteeIndex = None
+    _invitee_index_version: int = -1
+
+    # 详情页/仪表盘渲染缓存：名称 -> (缓存键, 渲染结果)
+    _render_cache: Dict[str, Tuple[Any, Any]] = {}
     
     # 通知助手
     notify_helper: NotificationHelper = None
     
-    # 站点处理器列表
-    _site_handlers = []
+    # 站点处理器注册表
+    handler_registry: HandlerRegistry = None
+
+    # 同站请求限流器
+    _host_throttle: HostThrottle = None
 
     # 定时器
     _scheduler: Optional[BackgroundScheduler] = None
@@ -448,6 +498,7 @@ class nexusinvitee(_PluginBase):
         self.sites = SitesHelper()
         self.siteoper = SiteOper()
         self.presc = Prescription()
+        self._render_cache = {}
         
         # 获取数据目录
         data_path = self.get_data_path()
@@ -461,13 +512,19 @@ class nexusinvitee(_PluginBase):
         
         # 初始化数据管理器（仅保留数据存储，移除配置存储）
         self.data_manager = DataManager(data_path)
+
+        # 初始化后宫成员历史数据
+        self.history = HistoryStore(data_path)
+        self.refresh_scheduler = RefreshScheduler(data_path)
+        self.metrics = MetricsRecorder()
+        self.page_cache = PageCache(data_path, self.plugin_version)
         
         # 初始化通知助手
         self.notify_helper = NotificationHelper(self)
         
         # 加载站点处理器
-        self._site_handlers = ModuleLoader.load_site_handlers()
-        logger.info(f"加载了 {len(self._site_handlers)} 个站点处理器")
+        self.handler_registry = HandlerRegistry()
+        logger.info(f"加载了 {self.handler_registry.load()} 个站点处理器")
 
         # 停止现有服务
         self.stop_service()
@@ -478,6 +535,7 @@ class nexusinvitee(_PluginBase):
             self._notify = config.get("notify", False)
             self._cron = config.get("cron", "0 9 * * *")
             self._onlyonce = config.get("onlyonce", False)
+            self.__parse_refresh_config(config)
             
             # 处理站点ID
             self._nexus_sites = []
@@ -493,9 +551,15 @@ class nexusinvitee(_PluginBase):
                         pass           
             # 保存配置
             self.__update_config()
+
+        self._host_throttle = HostThrottle(self._request_interval)
         
         # 如果启用了插件
         if self._enabled:
+            # 解析进程需在刷新线程启动前创建
+            if self._parse_workers:
+                self._parse_pool = ParsePool(self._parse_workers)
+                self._parse_pool.start()
             # 检查是否配置了站点
             if not self._nexus_sites:
                 logger.info("未选择任何站点，将使用所有站点")
@@ -546,17 +610,35 @@ class nexusinvitee(_PluginBase):
             
             # 2. 重新导入核心模块
             logger.debug("重新导入核心模块...")
+            importlib.import_module('plugins.nexusinvitee.records')
             importlib.import_module('plugins.nexusinvitee.data')
             importlib.import_module('plugins.nexusinvitee.utils')
             importlib.import_module('plugins.nexusinvitee.module_loader')
+            importlib.import_module('plugins.nexusinvitee.refresher')
+            importlib.import_module('plugins.nexusinvitee.history')
+            importlib.import_module('plugins.nexusinvitee.query')
+            importlib.import_module('plugins.nexusinvitee.summary')
+            importlib.import_module('plugins.nexusinvitee.scheduler')
+            importlib.import_module('plugins.nexusinvitee.metrics')
+            importlib.import_module('plugins.nexusinvitee.page_cache')
+            importlib.import_module('plugins.nexusinvitee.parse_pool')
             
             # 3. 更新全局引用以确保使用的是最新版本
             logger.debug("更新全局模块引用...")
-            global DataManager, NotificationHelper, ModuleLoader
+            global DataManager, NotificationHelper, HandlerRegistry, HostThrottle, ThrottledSession, SiteRefresher, HistoryStore, InviteeIndex, count_invitees, RefreshScheduler, MetricsRecorder, PageCache, ParsePool, to_dicts
             try:
                 from plugins.nexusinvitee.data import DataManager
                 from plugins.nexusinvitee.utils import NotificationHelper
-                from plugins.nexusinvitee.module_loader import ModuleLoader
+                from plugins.nexusinvitee.module_loader import HandlerRegistry
+                from plugins.nexusinvitee.refresher import HostThrottle, ThrottledSession, SiteRefresher
+                from plugins.nexusinvitee.history import HistoryStore
+                from plugins.nexusinvitee.query import InviteeIndex
+                from plugins.nexusinvitee.summary import count_invitees
+                from plugins.nexusinvitee.scheduler import RefreshScheduler
+                from plugins.nexusinvitee.metrics import MetricsRecorder
+                from plugins.nexusinvitee.page_cache import PageCache
+                from plugins.nexusinvitee.parse_pool import ParsePool
+                from plugins.nexusinvitee.records import to_dicts
                 logger.debug("核心模块引用更新成功")
             except Exception as e:
                 logger.error(f"更新核心模块引用失败: {str(e)}")
@@ -568,6 +650,41 @@ class nexusinvitee(_PluginBase):
             import traceback
             logger.error(f"错误详情: {traceback.format_exc()}")
 
+    def __parse_refresh_config(self, config: dict):
+        """
+        解析刷新及展示相关配置
+        :param config: 配置字典
+        """
+        try:
+            self._max_workers = max(1, int(config.get("max_workers") or 4))
+        except (ValueError, TypeError):
+            logger.warning(f"并发站点数配置无效: {config.get('max_workers')}，使用默认值4")
+            self._max_workers = 4
+        try:
+            interval = config.get("request_interval")
+            self._request_interval = max(0.0, float(interval)) if interval not in (None, "") else 0.5
+        except (ValueError, TypeError):
+            logger.warning(f"同站请求间隔配置无效: {config.get('request_interval')}，使用默认值0.5")
+            self._request_interval = 0.5
+        try:
+            page_size = config.get("page_size")
+            self._page_size = max(0, int(page_size)) if page_size not in (None, "") else 100
+        except (ValueError, TypeError):
+            logger.warning(f"详情页显示人数配置无效: {config.get('page_size')}，使用默认值100")
+            self._page_size = 100
+        try:
+            full_crawl_days = config.get("full_crawl_days")
+            self._full_crawl_days = max(0, int(full_crawl_days)) if full_crawl_days not in (None, "") else 7
+        except (ValueError, TypeError):
+            logger.warning(f"完整翻页间隔配置无效: {config.get('full_crawl_days')}，使用默认值7")
+            self._full_crawl_days = 7
+        try:
+            self._parse_workers = max(0, int(config.get("parse_workers") or 0))
+        except (ValueError, TypeError):
+            logger.warning(f"解析进程数配置无效: {config.get('parse_workers')}，使用默认值0")
+            self._parse_workers = 0
+        self._adaptive_schedule = bool(config.get("adaptive_schedule", False))
+
     def __update_config(self):
         """
         更新配置到MoviePilot系统
@@ -578,7 +695,13 @@ class nexusinvitee(_PluginBase):
             "notify": self._notify,
             "cron": self._cron,
             "onlyonce": self._onlyonce,
-            "site_ids": self._nexus_sites
+            "site_ids": self._nexus_sites,
+            "max_workers": self._max_workers,
+            "request_interval": self._request_interval,
+            "page_size": self._page_size,
+            "full_crawl_days": self._full_crawl_days,
+            "parse_workers": self._parse_workers,
+            "adaptive_schedule": self._adaptive_schedule
         }
         # 使用父类的update_config方法而不是自己的方法，避免递归
         super().update_config(config)
@@ -623,6 +746,30 @@ class nexusinvitee(_PluginBase):
             "methods": ["GET"],
             "summary": "刷新数据",
             "description": "强制刷新所有站点数据",
+        }, {
+            "path": "/query_invitees",
+            "endpoint": self.query_invitees,
+            "methods": ["GET"],
+            "summary": "查询后宫成员",
+            "description": "按站点/健康状态/启用状态/关键字筛选后宫成员，支持排序和分页",
+        }, {
+            "path": "/invitee_trend",
+            "endpoint": self.get_invitee_trend,
+            "methods": ["GET"],
+            "summary": "获取后宫成员分享率趋势",
+            "description": "根据历史数据计算后宫成员分享率变化趋势",
+        }, {
+            "path": "/schedule",
+            "endpoint": self.get_schedule,
+            "methods": ["GET"],
+            "summary": "获取刷新调度状态",
+            "description": "获取各站点下次刷新时间、刷新间隔及熔断状态",
+        }, {
+            "path": "/metrics",
+            "endpoint": self.get_metrics,
+            "methods": ["GET"],
+            "summary": "获取刷新性能统计",
+            "description": "获取最近几次刷新中各站点、各阶段及每个请求的耗时",
         }]
 
     def get_dashboard_meta(self) -> Optional[List[Dict[str, str]]]:
@@ -632,15 +779,139 @@ class nexusinvitee(_PluginBase):
         return [{
             "key": "nexusinvitee_dashboard",
             "name": "后宫管理系统"
+        }, {
+            "key": "nexusinvitee_metrics",
+            "name": "后宫刷新性能"
         }]
         
+    def _get_render_key(self) -> tuple:
+        """
+        获取渲染缓存键：数据写版本、调度状态版本（熔断提示）、影响渲染的配置以及站点列表
+        :return: 缓存键
+        """
+        indexers = tuple((site.get("id"), site.get("name"), site.get("url"))
+                         for site in self.sites.get_indexers()) if self.sites else ()
+        schedule_version = self.refresh_scheduler.get_version() if self.refresh_scheduler else 0
+        return (self.data_manager.get_version(), schedule_version, self._page_size,
+                tuple(self._nexus_sites or []), indexers)
+
+    def _get_rendered(self, name: str, builder):
+        """
+        获取缓存的渲染结果，数据或配置变化后再次访问时才重新生成
+        :param name: 缓存名称
+        :param builder: 生成渲染结果的方法，失败时抛出异常，异常结果不缓存
+        :return: 渲染结果
+        """
+        key = self._get_render_key()
+        cached = self._render_cache.get(name)
+        if cached and cached[0] == key:
+            return cached[1]
+        result = builder()
+        self._render_cache[name] = (key, result)
+        return result
+
     def get_dashboard(self, key: str, **kwargs) -> Optional[Tuple[Dict[str, Any], Dict[str, Any], List[dict]]]:
         """
         获取插件仪表盘页面
         """
+        if key == "nexusinvitee_metrics":
+            return self._build_metrics_dashboard()
         if key != "nexusinvitee_dashboard":
             return None
-            
+
+        try:
+            return self._get_rendered("dashboard", self._build_dashboard)
+        except Exception as e:
+            return {
+                "cols": 12,
+                "md": 6
+            }, {
+                "refresh": 3600,
+                "title": "后宫管理系统",
+                "subtitle": "发生错误"
+            }, [{
+                "component": "VAlert",
+                "props": {
+                    "type": "error",
+                    "variant": "tonal",
+                    "text": f"生成仪表盘失败: {str(e)}"
+                }
+            }]
+
+    @staticmethod
+    def _metrics_table(headers: List[str], rows: List[List[str]]) -> dict:
+        """
+        生成性能统计表格
+        :param headers: 表头
+        :param rows: 行数据
+        """
+        return {
+            "component": "VTable",
+            "props": {
+                "density": "compact",
+                "hover": True
+            },
+            "content": [
+                {
+                    "component": "thead",
+                    "content": [{
+                        "component": "tr",
+                        "content": [{"component": "th", "text": header} for header in headers]
+                    }]
+                },
+                {
+                    "component": "tbody",
+                    "content": [{
+                        "component": "tr",
+                        "content": [{"component": "td", "text": cell} for cell in row]
+                    } for row in rows]
+                }
+            ]
+        }
+
+    def _build_metrics_dashboard(self) -> Tuple[Dict[str, Any], Dict[str, Any], List[dict]]:
+        """
+        生成刷新性能仪表盘：最近刷新中最慢的站点和阶段
+        """
+        runs = self.metrics.get_runs(limit=1) if self.metrics else []
+        slowest = self.metrics.get_slowest(limit=5) if self.metrics else {"sites": [], "phases": []}
+        subtitle = "暂无刷新记录"
+        if runs:
+            subtitle = (f"最近一次: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(runs[0]['started']))}，"
+                        f"{len(runs[0]['sites'])}个站点，耗时{runs[0]['total_ms'] / 1000:.1f}秒")
+        elements = []
+        if slowest["sites"]:
+            elements.append(self._metrics_table(
+                ["最慢站点", "平均耗时", "最长耗时", "刷新次数", "请求错误"],
+                [[item["site_name"], f"{item['avg_ms'] / 1000:.1f}s", f"{item['max_ms'] / 1000:.1f}s",
+                  str(item["runs"]), str(item["errors"])] for item in slowest["sites"]]))
+            elements.append(self._metrics_table(
+                ["最慢阶段", "累计耗时", "单站平均", "单站最长"],
+                [[PHASE_NAMES.get(item["phase"], item["phase"]), f"{item['total_ms'] / 1000:.1f}s",
+                  f"{item['avg_ms'] / 1000:.2f}s", f"{item['max_ms'] / 1000:.2f}s"] for item in slowest["phases"]]))
+        else:
+            elements.append({
+                "component": "VAlert",
+                "props": {
+                    "type": "info",
+                    "variant": "tonal",
+                    "text": "暂无性能数据，刷新一次站点后显示"
+                }
+            })
+        return {
+            "cols": 12,
+            "md": 6
+        }, {
+            "refresh": 600,
+            "title": "后宫刷新性能",
+            "subtitle": subtitle,
+            "border": False
+        }, elements
+
+    def _build_dashboard(self) -> Tuple[Dict[str, Any], Dict[str, Any], List[dict]]:
+        """
+        生成仪表盘页面
+        """
         try:
             # 从data_manager获取站点数据
             cached_data = {}
@@ -657,63 +928,15 @@ class nexusinvitee(_PluginBase):
                     last_update = time.strftime(
                         "%Y-%m-%d %H:%M:%S", time.localtime(max(update_times)))
 
-            # 计算所有站点统计信息
+            # 所有站点统计信息（写入时已汇总）
+            summary = self.data_manager.get_summary()
             total_sites = len(cached_data)
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_perm_invites = 0
-            total_temp_invites = 0
-            total_no_data = 0  # 添加无数据计数器
-
-            for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 尝试不同的数据结构路径获取邀请列表
-                possible_paths = [
-                    ["invitees"],
-                    ["data", "invitees"],
-                    ["data", "data", "invitees"]
-                ]
-                
-                for path in possible_paths:
-                    result = get_nested_value(site_cache_data, path, [])
-                    if result:
-                        invitees = result
-                        break
-
-                # 统计各项数据
-                total_invitees += len(invitees)
-                
-                # 获取邀请状态
-                invite_status = {}
-                status_paths = [
-                    ["invite_status"],
-                    ["data", "invite_status"],
-                    ["data", "data", "invite_status"]
-                ]
-                
-                for path in status_paths:
-                    result = get_nested_value(site_cache_data, path, {})
-                    if result and isinstance(result, dict):
-                        invite_status = result
-                        break
-
-                # 统计邀请数量
-                total_perm_invites += invite_status.get("permanent_count", 0)
-                total_temp_invites += invite_status.get("temporary_count", 0)
-
-                # 统计用户状态 - 使用ratio_health字段
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
-
+            total_invitees = summary["invitees"]
+            total_low_ratio = summary["low_ratio"]
+            total_banned = summary["banned"]
+            total_perm_invites = summary["permanent_invites"]
+            total_temp_invites = summary["temporary_invites"]
+            total_no_data = summary["no_data"]
 
             # 列配置
             col_config = {
@@ -989,21 +1212,7 @@ class nexusinvitee(_PluginBase):
             
         except Exception as e:
             logger.error(f"生成仪表盘失败: {str(e)}")
-            return {
-                "cols": 12,
-                "md": 6
-            }, {
-                "refresh": 3600,
-                "title": "后宫管理系统",
-                "subtitle": "发生错误"
-            }, [{
-                "component": "VAlert",
-                "props": {
-                    "type": "error",
-                    "variant": "tonal",
-                    "text": f"生成仪表盘失败: {str(e)}"
-                }
-        }]
+            raise
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         """
@@ -1107,7 +1316,8 @@ class nexusinvitee(_PluginBase):
                             {
                                 'component': 'VCol',
                                 'props': {
-                                    'cols': 12
+                                    'cols': 12,
+                                    'md': 8
                                 },
                                 'content': [
                                     {
@@ -1118,6 +1328,134 @@ class nexusinvitee(_PluginBase):
                                         }
                                     }
                                 ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 4
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VSwitch',
+                                        'props': {
+                                            'model': 'adaptive_schedule',
+                                            'label': '自适应调度',
+                                            'hint': '按站点数据变化频率自动调整刷新间隔，开启后执行周期不再生效',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'max_workers',
+                                            'label': '并发站点数',
+                                            'type': 'number',
+                                            'placeholder': '4',
+                                            'hint': '同时刷新的站点数量，同一站点始终串行',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'request_interval',
+                                            'label': '同站请求间隔(秒)',
+                                            'type': 'number',
+                                            'placeholder': '0.5',
+                                            'hint': '同一站点相邻两次请求的最小间隔，避免触发站点频率限制',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'page_size',
+                                            'label': '详情页显示人数',
+                                            'type': 'number',
+                                            'placeholder': '100',
+                                            'hint': '每个站点按严重程度只显示前N人，0为全部，完整列表可通过查询接口分页获取',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            },
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'full_crawl_days',
+                                            'label': '完整翻页间隔(天)',
+                                            'type': 'number',
+                                            'placeholder': '7',
+                                            'hint': '期间定时刷新只翻到与已保存列表一致的页，手动刷新始终完整翻页，0为每次完整翻页',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
+                            }
+                        ]
+                    },
+                    {
+                        'component': 'VRow',
+                        'content': [
+                            {
+                                'component': 'VCol',
+                                'props': {
+                                    'cols': 12,
+                                    'md': 3
+                                },
+                                'content': [
+                                    {
+                                        'component': 'VTextField',
+                                        'props': {
+                                            'model': 'parse_workers',
+                                            'label': '解析进程数',
+                                            'type': 'number',
+                                            'placeholder': '0',
+                                            'hint': '后宫成员上千人的站点可开启多进程解析翻页内容，0为不启用。子进程在插件启用期间常驻并重新导入站点处理器，会额外占用内存',
+                                            'persistent-hint': True
+                                        }
+                                    }
+                                ]
                             }
                         ]
                     },
@@ -1149,7 +1487,13 @@ class nexusinvitee(_PluginBase):
             "notify": self._notify,
             "cron": "0 9 * * *",
             "onlyonce": False,
-            "site_ids": self._nexus_sites
+            "site_ids": self._nexus_sites,
+            "max_workers": self._max_workers,
+            "request_interval": self._request_interval,
+            "page_size": self._page_size,
+            "full_crawl_days": self._full_crawl_days,
+            "parse_workers": self._parse_workers,
+            "adaptive_schedule": self._adaptive_schedule
         }
 
     def _is_nexusphp(self, site_url: str) -> bool:
@@ -1163,6 +1507,21 @@ class nexusinvitee(_PluginBase):
         """
         详情页面
         """
+        try:
+            return self._get_rendered("page", self._build_page)
+        except Exception as e:
+            return [{
+                "component": "VAlert",
+                "props": {
+                    "type": "error",
+                    "text": f"生成详情页面失败: {str(e)}"
+                }
+            }]
+
+    def _build_page(self) -> List[dict]:
+        """
+        生成详情页面
+        """
         import re  # 在函数内部也导入re模块，确保可用
         
         
@@ -1187,48 +1546,15 @@ class nexusinvitee(_PluginBase):
             # 准备页面内容
             page_content = []
             
-            # 添加全局统计信息
+            # 添加全局统计信息（写入时已汇总）
+            summary = self.data_manager.get_summary()
             total_sites = len(cached_data)
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_perm_invites = 0
-            total_temp_invites = 0
-            total_no_data = 0
-
-            for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 获取邀请用户列表
-                if "data" in site_cache_data:
-                    invitees = site_cache_data.get("data", {}).get("invitees", [])
-                else:
-                    invitees = site_cache_data.get("invitees", [])
-
-                # 统计各项数据
-                total_invitees += len(invitees)
-                
-                # 统计用户状态
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
-
-                # 获取邀请状态
-                invite_status = {}
-                if "data" in site_cache_data:
-                    invite_status = site_cache_data.get("data", {}).get("invite_status", {})
-                else:
-                    invite_status = site_cache_data.get("invite_status", {})
-
-                # 统计邀请数量
-                total_perm_invites += invite_status.get("permanent_count", 0)
-                total_temp_invites += invite_status.get("temporary_count", 0)
+            total_invitees = summary["invitees"]
+            total_low_ratio = summary["low_ratio"]
+            total_banned = summary["banned"]
+            total_perm_invites = summary["permanent_invites"]
+            total_temp_invites = summary["temporary_invites"]
+            total_no_data = summary["no_data"]
 
             # 添加统计卡片
             page_content.extend([
@@ -1479,55 +1805,15 @@ class nexusinvitee(_PluginBase):
             # 准备站点卡片
             cards = []
             
-            # 计算所有站点统计信息
-            total_sites = len(cached_data)
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_perm_invites = 0
-            total_temp_invites = 0
-            total_no_data = 0
-
             for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 获取邀请用户列表
-                if "data" in site_cache_data:
-                    invitees = site_cache_data.get("data", {}).get("invitees", [])
-                else:
-                    invitees = site_cache_data.get("invitees", [])
-
-                # 统计各项数据
-                total_invitees += len(invitees)
-                
-                # 统计用户状态 - 直接使用ratio_health字段
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
-
-                # 获取邀请状态
-                invite_status = {}
-                if "data" in site_cache_data:
-                    invite_status = site_cache_data.get("data", {}).get("invite_status", {})
-                else:
-                    invite_status = site_cache_data.get("invite_status", {})
-
-                # 统计邀请数量
-                total_perm_invites += invite_status.get("permanent_count", 0)
-                total_temp_invites += invite_status.get("temporary_count", 0)
                 # 向药单打标临药永药
                 site_error = get_site_error(cache)
                 if site_error:
                     self.presc.setFailed(site_name, site_error)
                 else:
-                    self.presc.setP(site_name,invite_status.get("permanent_count", 0))
-                    self.presc.setT(site_name,invite_status.get("temporary_count", 0))
+                    site_summary = self.data_manager.get_summary(site_name)
+                    self.presc.setP(site_name, site_summary["permanent_invites"])
+                    self.presc.setT(site_name, site_summary["temporary_invites"])
 
 
             # 添加全局统计信息
@@ -1813,70 +2099,11 @@ class nexusinvitee(_PluginBase):
                         if result and isinstance(result, dict):
                             invite_status = result
 
-                    # 计算此站点的统计信息
-                    banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                    low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') == 'warning' or i.get('ratio_health') == 'danger')
-                    no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
-                    # 更新总计数
-                    total_banned += banned_count
-                    total_low_ratio += low_ratio_count
-                    total_no_data += no_data_count
-
-                    for invitee in invitees:
-                        # 检查是否是无数据情况（上传下载都是0）
-                        uploaded = invitee.get('uploaded', '0')
-                        downloaded = invitee.get('downloaded', '0')
-                        is_no_data = False
-                        
-                        # 简化判断逻辑，只关注字符串为"0"、"0.0"、"0B"或空字符串，或者数值为0的情况
-                        if isinstance(uploaded, str) and isinstance(downloaded, str):
-                            uploaded_zero = uploaded == '0' or uploaded == '' or uploaded == '0.0' or uploaded.lower() == '0b'
-                            downloaded_zero = downloaded == '0' or downloaded == '' or downloaded == '0.0' or downloaded.lower() == '0b'
-                            is_no_data = uploaded_zero and downloaded_zero
-                        elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
-                            is_no_data = uploaded == 0 and downloaded == 0
-                        
-                        username = invitee.get('username', '未知')
-                        # 强制输出日志，确保无数据用户被记录
-                        if is_no_data:
-                            logger.info(f"【总览】检测到无数据用户: {username}, 上传={uploaded}, 下载={downloaded}, 当前无数据总计={total_no_data+1}")
-                            total_no_data += 1
-                            continue
-                        
-                        # 处理分享率
-                        ratio_str = invitee.get('ratio', '')
-                        # 处理无限分享率情况 - 增强识别能力
-                        if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-                            continue  # 无限分享率不计入低分享率
-                        
-                        try:
-                            # 标准化字符串 - 正确处理千分位逗号
-                            # 使用更好的方法完全移除千分位逗号
-                            normalized_ratio = ratio_str
-                            # 循环处理，直到没有千分位逗号
-                            while ',' in normalized_ratio:
-                                # 检查每个逗号是否是千分位分隔符
-                                comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                for pos in comma_positions:
-                                    # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                                    if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                                        normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                        normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                        break
-                                else:
-                                    # 如果没有找到千分位逗号，退出循环
-                                    break
-                            
-                            # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                            normalized_ratio = normalized_ratio.replace(',', '.')
-                            ratio_val = float(normalized_ratio) if normalized_ratio else 0
-                            if ratio_val < 1 and ratio_val > 0:  # 确保分享率大于0且小于1才算低分享率
-                                low_ratio_count += 1
-                                logger.info(f"【总览】检测到低分享率用户: {invitee.get('username', '未知')}, 分享率={ratio_str}({ratio_val})")
-                        except (ValueError, TypeError) as e:
-                            # 转换错误时记录警告
-                            logger.warning(f"分享率转换失败: {ratio_str}, 错误: {str(e)}")
+                    # 此站点的统计信息（写入时已汇总）
+                    site_summary = self.data_manager.get_summary(site_name)
+                    banned_count = site_summary["banned"]
+                    low_ratio_count = site_summary["low_ratio"]
+                    no_data_count = site_summary["no_data"]
 
                     # 合并站点信息和数据到一张卡片
                     site_card = {
@@ -2142,6 +2369,30 @@ class nexusinvitee(_PluginBase):
                         ]
                     }
 
+                    # 熔断中的站点提示下次重试时间
+                    schedule_state = self.refresh_scheduler.get_state(site_name) if self.refresh_scheduler else {}
+                    if schedule_state.get("circuit") == CIRCUIT_OPEN:
+                        retry_time = time.strftime("%m-%d %H:%M", time.localtime(schedule_state.get("next_due", 0)))
+                        site_card["content"].append({
+                            "component": "VCardText",
+                            "props": {
+                                "class": "py-1"
+                            },
+                            "content": [
+                                {
+                                    "component": "VAlert",
+                                    "props": {
+                                        "type": "warning",
+                                        "variant": "tonal",
+                                        "density": "compact",
+                                        "class": "my-1"
+                                    },
+                                    "text": f"已连续失败 {schedule_state.get('failures', 0)} 次，暂停定时刷新，"
+                                            f"{retry_time} 后重试（手动刷新不受影响）"
+                                }
+                            ]
+                        })
+
                     # 添加错误信息或不可邀请原因的显示部分
                     # 获取错误信息和不可邀请原因
                     error_message = get_site_error(cache)
@@ -2680,8 +2931,13 @@ class nexusinvitee(_PluginBase):
 
                     # 只有在有邀请列表时才添加表格
                     if invitees:
+                        # 人数较多时只渲染最需要关注的前N人，完整列表通过查询接口分页获取
+                        visible_invitees = invitees
+                        if self._page_size and len(invitees) > self._page_size:
+                            visible_invitees = self._get_invitee_index().query(
+                                site=site_name, limit=self._page_size)["items"] or invitees[:self._page_size]
                         table_rows = []
-                        for invitee in invitees:
+                        for invitee in visible_invitees:
                             # 判断用户是否被ban或分享率较低
                             is_banned = invitee.get('enabled', '').lower() == 'no'
                             
@@ -2800,7 +3056,8 @@ class nexusinvitee(_PluginBase):
                                                         },
                                                         {
                                                             "component": "span",
-                                                            "text": f"后宫成员列表 ({len(invitees)}人)"
+                                                            "text": f"后宫成员列表 ({len(invitees)}人)" if len(visible_invitees) == len(invitees)
+                                                                    else f"后宫成员列表 ({len(invitees)}人，显示最需关注的{len(visible_invitees)}人)"
                                                         },
                                                         {
                                                             "component": "VSpacer"
@@ -3205,13 +3462,7 @@ class nexusinvitee(_PluginBase):
             
         except Exception as e:
             logger.error(f"生成详情页面失败: {str(e)}")
-            return [{
-                "component": "VAlert",
-                "props": {
-                    "type": "error",
-                    "text": f"生成详情页面失败: {str(e)}"
-                }
-            }]
+            raise
 
     def stop_service(self):
         """
@@ -3226,10 +3477,73 @@ class nexusinvitee(_PluginBase):
                 logger.info("后宫管理系统服务已停止")
         except Exception as e:
             logger.error(f"停止后宫管理系统服务失败: {str(e)}")
+        # 关闭解析进程，正在进行的刷新改为在当前线程解析；解析进程数随配置在初始化时重新创建
+        parse_pool, self._parse_pool = self._parse_pool, None
+        if parse_pool:
+            parse_pool.shutdown()
+
+    # 表明刷新失败的关键字或模式 (即使没有异常)，"解析站点..." 包含变量所以使用正则
+    _failure_indicators = [
+        r"访问邀请页面失败",
+        r"无法获取用户ID",
+        r"未登录或Cookie已失效",
+        r"初始化失败",
+        r"网络错误",
+        r"发生错误",
+        r"解析站点.*时发生意外错误",
+        r"站点信息不完整",
+    ]
+
+    # 表明缓存的用户ID已失效，需要重新探测的失败原因（邀请页返回错误状态码时为"访问邀请页面失败: 404 ..."）
+    _rediscover_pattern = r"未登录|Cookie已失效|无法获取用户ID|访问邀请页面失败"
+
+    @classmethod
+    def _get_refresh_failure(cls, site_data: dict) -> str:
+        """
+        判断站点数据是否表示刷新失败
+        :param site_data: 站点处理器返回的数据
+        :return: 失败原因，成功时返回空字符串
+        """
+        if "error" in site_data:
+            # 情况1: _get_site_invite_data 内部捕获到异常
+            return site_data.get("error") or "未知错误"
+        # 情况2: 检查 parse_invite_page 返回的 reason 是否表明失败
+        reason = site_data.get("invite_status", {}).get("reason", "")
+        if reason and any(re.search(indicator, reason, re.IGNORECASE) for indicator in cls._failure_indicators):
+            return reason
+        return ""
+
+    @staticmethod
+    def _get_auth_fingerprint(site_info: dict) -> str:
+        """
+        计算站点认证信息指纹，Cookie/Token变化后探测缓存自动失效
+        :param site_info: 站点信息
+        :return: 指纹
+        """
+        auth = "|".join(str(site_info.get(key) or "").strip() for key in ("url", "cookie", "token", "apikey"))
+        return hashlib.sha1(auth.encode("utf-8")).hexdigest()[:16]
 
-    def _get_site_invite_data(self, site_name):
+    def _get_known_invitees(self, site_name: str) -> Optional[List[dict]]:
+        """
+        获取增量翻页使用的已保存后宫成员
+        :param site_name: 站点名称
+        :return: 已保存的后宫成员，需要完整翻页时返回None
+        """
+        if self._force_full_crawl or not self._full_crawl_days:
+            return None
+        data = self.data_manager.get_site_data(site_name).get("data", {})
+        if data.get("fetch_failed") or not data.get("invitees"):
+            return None
+        if time.time() - data.get("full_crawl_time", 0) >= self._full_crawl_days * 86400:
+            logger.info(f"站点 {site_name} 距上次完整翻页已超过 {self._full_crawl_days} 天，执行完整翻页")
+            return None
+        return data["invitees"]
+
+    def _get_site_invite_data(self, site_name, parse_pool: Optional[ParsePool] = None):
         """
         获取站点邀请页面数据
+        :param site_name: 站点名称
+        :param parse_pool: 本次刷新使用的多进程解析池
         """
         try:
             # 获取站点信息
@@ -3256,15 +3570,21 @@ class nexusinvitee(_PluginBase):
             ua = site_info.get("ua", "").strip()
             site_id = site_info.get("id", "")
             
-            # 检查是否是M-Team站点
-            is_mteam = False
-            site_url_lower = site_url.lower()
-            mteam_features = ["m-team", "api.m-team.cc", "api.m-team.io"]
-            for feature in mteam_features:
-                if feature in site_url_lower:
-                    is_mteam = True
-                    logger.info(f"站点 {site_name} 匹配到M-Team特征: {feature}")
-                    break
+            # 从注册表获取站点处理器，M-Team等专用站点同样由注册表匹配
+            handler = self.handler_registry.get_handler(site_url)
+            if not handler:
+                logger.error(f"站点 {site_name} 没有可用的站点处理器")
+                return {
+                    "error": "没有可用的站点处理器",
+                    "invite_status": {
+                        "can_invite": False,
+                        "permanent_count": 0,
+                        "temporary_count": 0,
+                        "reason": "没有可用的站点处理器"
+                    }
+                }
+            is_mteam = handler.site_schema == "mteam"
+            logger.info(f"站点 {site_name} 使用处理器: {handler.__class__.__name__}")
             
             # 如果是M-Team站点，检查API认证信息
             if is_mteam:
@@ -3328,8 +3648,15 @@ class nexusinvitee(_PluginBase):
                     }
                 }
 
-            # 构建请求Session
-            session = requests.Session()
+            # 认证信息未变化时复用上次探测到的用户ID，跳过首页认证测试
+            site_key = str(site_id or site_name)
+            fingerprint = self._get_auth_fingerprint(site_info)
+            discovery = self.data_manager.get_discovery(site_key, fingerprint)
+            if discovery:
+                logger.debug(f"站点 {site_name} 使用缓存的探测结果: 用户ID={discovery.get('user_id')}")
+
+            # 构建请求Session（同站请求经过限流）
+            session = ThrottledSession(self._host_throttle)
             
             # 根据站点类型设置不同的请求头
             if is_mteam:
@@ -3344,9 +3671,8 @@ class nexusinvitee(_PluginBase):
                 })
                 
                 # 测试API认证是否有效
-                test_url = site_url
-                test_response = session.get(test_url, timeout=(10, 30))
-                if test_response.status_code >= 400:
+                test_response = None if discovery else session.get(site_url, timeout=(10, 30))
+                if test_response is not None and test_response.status_code >= 400:
                     logger.error(f"站点 {site_name} API认证测试失败，状态码: {test_response.status_code}")
                     return {
                         "error": f"API认证失败，请检查Token是否有效，状态码: {test_response.status_code}",
@@ -3376,9 +3702,8 @@ class nexusinvitee(_PluginBase):
                 })
                 
                 # 尝试验证Cookie有效性
-                test_url = site_url
-                test_response = session.get(test_url, timeout=(10, 30))
-                if test_response.status_code >= 400:
+                test_response = None if discovery else session.get(site_url, timeout=(10, 30))
+                if test_response is not None and test_response.status_code >= 400:
                     logger.error(f"站点 {site_name} Cookie验证失败，状态码: {test_response.status_code}")
                     return {
                         "error": f"Cookie验证失败，状态码: {test_response.status_code}",
@@ -3393,28 +3718,36 @@ class nexusinvitee(_PluginBase):
             # 使用站点处理器
             logger.info(f"站点 {site_name} 开始处理邀请数据")
             
-            # 根据站点类型选择不同的处理器
-            if is_mteam:
-                logger.info(f"站点 {site_name} 使用M-Team处理器")
-                from plugins.nexusinvitee.sites.mteam import MTeamHandler
-                handler = MTeamHandler()
-            elif "hdchina" in site_url.lower():
-                logger.info(f"站点 {site_name} 使用HDChina处理器")
-                from plugins.nexusinvitee.sites.hdchina import HDChinaHandler
-                handler = HDChinaHandler()
-            else:
-                # 查找匹配的处理器
-                handler = ModuleLoader.get_handler_for_site(site_url, self._site_handlers)
-                if not handler:
-                    # 如果找不到合适的处理器，使用通用NexusPHP处理器
-                    logger.info(f"站点 {site_name} 未找到专用处理器，使用默认NexusPHP处理器")
-                    from plugins.nexusinvitee.sites.nexusphp import NexusPhpHandler
-                    handler = NexusPhpHandler()
-            
             # 使用处理器解析邀请页面
+            handler.cached_user_id = discovery.get("user_id")
+            handler.page_cache = self.page_cache
+            handler.parse_pool = parse_pool
+            handler.known_invitees = self._get_known_invitees(site_name)
             site_data = handler.parse_invite_page(site_info, session)
+            failure = self._get_refresh_failure(site_data)
             
+            # 缓存的探测结果失效（认证失败/页面不存在）时清除缓存，重新探测一次
+            if discovery and failure and re.search(self._rediscover_pattern, failure, re.IGNORECASE):
+                logger.info(f"站点 {site_name} 使用缓存的用户ID访问失败({failure})，重新探测")
+                self.data_manager.clear_discovery(site_key)
+                discovery = {}
+                handler = self.handler_registry.get_handler(site_url)
+                handler.page_cache = self.page_cache
+                handler.parse_pool = parse_pool
+                handler.known_invitees = self._get_known_invitees(site_name)
+                site_data = handler.parse_invite_page(site_info, session)
+                failure = self._get_refresh_failure(site_data)
             
+            if not failure and (not discovery or discovery.get("user_id") != handler.user_id):
+                self.data_manager.save_discovery(site_key, fingerprint, handler.user_id)
+            
+            # 增量翻页沿用上次完整翻页的时间
+            if site_data.pop("incremental", False):
+                previous = self.data_manager.get_site_data(site_name).get("data", {})
+                site_data["full_crawl_time"] = previous.get("full_crawl_time", 0)
+            else:
+                site_data["full_crawl_time"] = int(time.time())
+
             # 检查站点数据结构是否正确
             if "invite_status" in site_data:
                 # 检查临时邀请数量
@@ -3442,6 +3775,16 @@ class nexusinvitee(_PluginBase):
                 }
             }
 
+    @staticmethod
+    def _site_records_to_json(record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将站点记录中的后宫成员转换为字典，用于接口返回
+        """
+        data = record.get("data", {})
+        if "invitees" not in data:
+            return record
+        return {**record, "data": {**data, "invitees": to_dicts(data["invitees"])}}
+
     def get_invitees(self, apikey: str = None, site_name: str = None) -> dict:
         """
         获取后宫成员API接口
@@ -3466,7 +3809,8 @@ class nexusinvitee(_PluginBase):
                 "code": 0,
                 "message": "获取成功",
                 "data": {
-                    "sites": site_data,
+                    "sites": self._site_records_to_json(site_data) if site_name else {
+                        name: self._site_records_to_json(record) for name, record in site_data.items()},
                     "last_update": last_update
             }
             }
@@ -3474,6 +3818,140 @@ class nexusinvitee(_PluginBase):
             logger.error(f"获取后宫成员失败: {str(e)}")
             return {"code": 1, "message": f"获取后宫成员失败: {str(e)}"}
 
+    def get_invitee_trend(self, apikey: str = None, site_name: str = None, key: str = None,
+                          days: int = 7, window: int = 7, limit: int = 50) -> dict:
+        """
+        获取后宫成员分享率趋势API接口
+        :param apikey: API令牌
+        :param site_name: 站点名称，为空时返回所有站点
+        :param key: 成员标识（个人主页地址或用户名），指定时同时返回历史样本
+        :param days: 预测天数
+        :param window: 参与趋势拟合的最近天数
+        :param limit: 最多返回的成员数，按预测分享率从低到高排序
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        try:
+            days, window, limit = int(days), int(window), int(limit)
+            site_names = [site_name] if site_name else self.history.get_site_names()
+            results = []
+            for name in site_names:
+                # 成员标识到当前成员信息的映射，用于补充用户名
+                current = keyed_invitees(self.data_manager.get_site_data(name).get("data", {}).get("invitees", []))
+                trends = self.history.get_trends(name, window_days=window, project_days=days)
+                for invitee_key, invitee_trend in trends.items():
+                    if key and key not in (invitee_key, current.get(invitee_key, {}).get("username")):
+                        continue
+                    item = {
+                        "site_name": name,
+                        "key": invitee_key,
+                        "username": current.get(invitee_key, {}).get("username", invitee_key),
+                        **invitee_trend
+                    }
+                    if key:
+                        item["series"] = self.history.get_series(name, invitee_key, as_dict=True)
+                    results.append(item)
+
+            # 预测分享率低的成员排在前面，无预测值的排在最后
+            results.sort(key=lambda x: (x["projected_ratio"] is None, x["projected_ratio"] or 0))
+            return {
+                "code": 0,
+                "message": "获取成功",
+                "data": {
+                    "total": len(results),
+                    "invitees": results[:limit] if limit > 0 else results
+                }
+            }
+        except Exception as e:
+            logger.error(f"获取后宫成员趋势失败: {str(e)}")
+            return {"code": 1, "message": f"获取后宫成员趋势失败: {str(e)}"}
+
+    def _get_invitee_index(self) -> InviteeIndex:
+        """
+        获取后宫成员查询索引，数据版本变化时重建
+        :return: 查询索引
+        """
+        version = self.data_manager.get_version()
+        if self._invitee_index is None or self._invitee_index_version != version:
+            self._invitee_index = InviteeIndex(self.data_manager.get_site_data())
+            self._invitee_index_version = version
+        return self._invitee_index
+
+    def query_invitees(self, apikey: str = None, site: str = None, health: str = None,
+                       enabled: str = None, search: str = None, sort: str = "severity",
+                       order: str = "asc", offset: int = 0, limit: int = 50) -> dict:
+        """
+        分页查询后宫成员API接口
+        :param apikey: API令牌
+        :param site: 站点名称，多个用逗号分隔
+        :param health: 分享率健康状态，多个用逗号分隔
+        :param enabled: 启用状态(yes/no)，为空时不过滤
+        :param search: 用户名或邮箱关键字
+        :param sort: 排序字段(severity/site/username/ratio/uploaded/downloaded/seeding)
+        :param order: 排序方向(asc/desc)，severity升序时最需要关注的成员在前
+        :param offset: 起始位置
+        :param limit: 每页数量，0表示全部
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        try:
+            enabled_filter = None
+            if enabled not in (None, ""):
+                enabled_filter = str(enabled).lower() in ("yes", "true", "1")
+            result = self._get_invitee_index().query(site=site, health=health, enabled=enabled_filter,
+                                                     search=search, sort=sort, order=order,
+                                                     offset=int(offset), limit=int(limit))
+            return {"code": 0, "message": "获取成功", "data": result}
+        except Exception as e:
+            logger.error(f"查询后宫成员失败: {str(e)}")
+            return {"code": 1, "message": f"查询后宫成员失败: {str(e)}"}
+
+    def get_schedule(self, apikey: str = None) -> dict:
+        """
+        获取站点刷新调度状态API接口
+        :param apikey: API令牌
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        states = self.refresh_scheduler.get_states() if self.refresh_scheduler else {}
+        sites = [{
+            "site_name": site_name,
+            "next_refresh": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state["next_due"])),
+            "interval_hours": round(state["interval"] / 3600, 1),
+            **state
+        } for site_name, state in sorted(states.items(), key=lambda item: item[1]["next_due"])]
+        return {
+            "code": 0,
+            "message": "获取成功",
+            "data": {
+                "adaptive": self._adaptive_schedule,
+                "sites": sites
+            }
+        }
+
+    def get_metrics(self, apikey: str = None, limit: int = 5, with_requests: bool = False) -> dict:
+        """
+        获取刷新性能统计API接口
+        :param apikey: API令牌
+        :param limit: 返回的刷新次数
+        :param with_requests: 是否返回每个请求的记录
+        """
+        if apikey and apikey != settings.API_TOKEN:
+            return {"code": 1, "message": "API令牌错误!"}
+
+        with_requests = str(with_requests).lower() in ("true", "1", "yes")
+        return {
+            "code": 0,
+            "message": "获取成功",
+            "data": {
+                "runs": self.metrics.get_runs(limit=int(limit), with_requests=with_requests),
+                "slowest": self.metrics.get_slowest()
+            }
+        }
+
     def refresh_data(self, apikey: str = None) -> dict:
         """
         强制刷新所有站点数据API接口
@@ -3482,9 +3960,8 @@ class nexusinvitee(_PluginBase):
             return {"code": 1, "message": "API令牌错误!"}
 
         try:
-            # 重新加载站点处理器以确保使用最新的处理逻辑
-            self._site_handlers = ModuleLoader.load_site_handlers()
-            logger.info(f"已重新加载 {len(self._site_handlers)} 个站点处理器")
+            # 站点处理器文件有变化时重新加载，确保使用最新的处理逻辑
+            self.handler_registry.refresh_if_changed()
             
             # 调用refresh_all_sites方法刷新数据
             result = self.refresh_all_sites()
@@ -3608,24 +4085,32 @@ class nexusinvitee(_PluginBase):
             logger.error(f"获取用户ID失败: {str(e)}")
             return ""
 
-    def refresh_all_sites(self) -> Dict[str, int]:
+    def refresh_scheduled_sites(self) -> Dict[str, int]:
+        """
+        定时刷新：跳过熔断中的站点，开启自适应调度时只刷新到期的站点
+        """
+        return self.refresh_all_sites(force=False)
+
+    def refresh_all_sites(self, force: bool = True) -> Dict[str, int]:
         """
         刷新所有站点数据
+        :param force: 是否忽略调度状态刷新全部选择的站点（手动刷新）
         """
-        try:
-            # 设置刷新标志防止重复刷新
-            if hasattr(self, '_refreshing') and self._refreshing:
+        # 设置刷新标志防止重复刷新，被拒绝的调用不进入下方的清理流程
+        with self._refresh_lock:
+            if self._refreshing:
                 logger.warning("后宫管理系统数据刷新已在进行中，跳过重复刷新")
                 return {"success": 0, "error": 0, "message": "刷新已在进行中"}
-            
             self._refreshing = True
+
+        try:
+            self._force_full_crawl = force
             
             # 记录刷新开始 - 说明是增量更新模式
             logger.info("开始增量刷新站点数据，只更新选择的站点，失败时保留旧数据")
             
-            # 重新加载站点处理器
-            self._site_handlers = ModuleLoader.load_site_handlers()
-            logger.info(f"加载了 {len(self._site_handlers)} 个站点处理器")
+            # 站点处理器文件有变化时重新加载
+            self.handler_registry.refresh_if_changed()
             
             # 获取所有站点配置
             all_sites = self.sites.get_indexers()
@@ -3656,62 +4141,49 @@ class nexusinvitee(_PluginBase):
                 logger.debug(f"所有站点ID: {[site.get('id') for site in all_sites]}")
                 logger.debug(f"选择的站点ID: {self._nexus_sites}")
                 return {"success": 0, "error": 0, "message": "没有发现可供刷新的站点"}
+
+            # 定时刷新按调度状态筛选站点
+            if not force and self.refresh_scheduler:
+                due_sites = self.refresh_scheduler.due([site.get("name", "") for site in selected_sites],
+                                                       adaptive=self._adaptive_schedule)
+                order = {site_name: index for index, site_name in enumerate(due_sites)}
+                skipped = len(selected_sites) - len(due_sites)
+                selected_sites = sorted((site for site in selected_sites if site.get("name", "") in order),
+                                        key=lambda site: order[site.get("name", "")])
+                if skipped:
+                    logger.info(f"调度跳过 {skipped} 个未到期或熔断中的站点")
+                if not selected_sites:
+                    logger.debug("没有到期需要刷新的站点")
+                    return {"success": 0, "error": 0, "message": "没有到期需要刷新的站点"}
             
             # 统计成功/失败站点数
             success_count = 0
             error_count = 0
             error_details = []
+            success_sites = []
             
             # 获取现有数据
             existing_data = self.data_manager.get_site_data()
             
-            # 逐个刷新站点数据
-            for site in selected_sites:
+            # 并发刷新站点数据，每个站点完成后立即合并
+            metrics_run = self.metrics.start_run(forced=force)
+            # 停止服务时解析池会被关闭并置空，本次刷新固定使用开始时的解析池
+            parse_pool = self._parse_pool
+            refresher = SiteRefresher(max_workers=self._max_workers,
+                                      throttle=self._host_throttle or HostThrottle(self._request_interval))
+            fetch_site = functools.partial(self.__fetch_site, parse_pool=parse_pool)
+            for site, site_data in refresher.run(selected_sites, fetch_site):
                 site_name = site.get("name", "")
                 
-                logger.debug(f"开始获取站点 {site_name} 的后宫数据...")
-                
-                site_data = self._get_site_invite_data(site_name)
-                
-                # --- 修改开始: 增强失败判断逻辑 ---
-                is_successful = True
-                error_msg = ""
-                
-                if "error" in site_data:
-                    # 情况1: _get_site_invite_data 内部捕获到异常
-                    is_successful = False
-                    error_msg = site_data.get('error', '未知错误')
-                else:
-                    # 情况2: 检查 parse_invite_page 返回的 reason 是否表明失败
-                    invite_status = site_data.get("invite_status", {})
-                    reason = invite_status.get("reason", "")
-                    
-                    # 定义表明失败的关键字或模式 (即使没有异常)
-                    # 使用 r 前缀确保是原始字符串，避免反斜杠转义问题
-                    failure_indicators = [
-                        r"访问邀请页面失败",
-                        r"无法获取用户ID",
-                        r"未登录或Cookie已失效",
-                        r"初始化失败",
-                        r"网络错误",
-                        r"发生错误",
-                        r"解析站点.*时发生意外错误",
-                        r"站点信息不完整", # 加入对站点信息不完整的检查
-                    ]
-                    
-                    # 使用正则表达式匹配，因为 "解析站点..." 包含变量
-                    if reason and any(re.search(indicator, reason, re.IGNORECASE) for indicator in failure_indicators):
-                        is_successful = False
-                        error_msg = reason # 使用 handler 返回的具体原因作为错误消息
+                # 判断是否刷新失败（异常或 handler 返回的原因表明失败）
+                error_msg = self._get_refresh_failure(site_data)
                         
-                # --- 修改结束 ---
-                        
-                if not is_successful:
-                    if not error_msg: # 确保总有一个错误消息
-                        error_msg = "未知原因导致刷新失败"
+                if error_msg:
                     logger.error(f"站点 {site_name} 数据刷新失败: {error_msg}")
                     error_count += 1
                     error_details.append({"site_name": site_name, "msg": error_msg})
+                    if self.refresh_scheduler:
+                        self.refresh_scheduler.record_failure(site_name, error_msg)
                     
                     # 保留旧数据逻辑 (保持不变)
                     old_data = existing_data.get(site_name, {}).get("data", {})
@@ -3754,13 +4226,39 @@ class nexusinvitee(_PluginBase):
                         else:
                             logger.info(f"站点 {site_name} 不可邀请原因: {reason}")
 
+                    # 增量翻页末尾沿用的已保存成员不是本次抓取的数据，不计入历史
+                    reused = site_data.pop("reused_invitees", 0)
                     # 保存站点数据 (保持不变)
                     self.data_manager.update_site_data(site_name, site_data)
+                    # 记录成员分享率/上传/下载历史
+                    self.history.record(site_name, invitees[:len(invitees) - reused])
+                    success_sites.append(site_name)
                     success_count += 1
             
+            self.metrics.finish_run(metrics_run)
+            logger.info(f"站点抓取耗时 {metrics_run['total_ms'] / 1000:.1f} 秒")
+            if self.page_cache:
+                cache_stats = self.page_cache.pop_stats()
+                logger.info(f"页面缓存: 未修改(304) {cache_stats['not_modified']} 页，内容未变 {cache_stats['unchanged']} 页，"
+                            f"重新解析 {cache_stats['parsed']} 页")
+            if parse_pool and parse_pool.enabled:
+                parse_stats = parse_pool.pop_stats()
+                logger.info(f"页面解析: 子进程 {parse_stats['pool']} 页，当前线程 {parse_stats['thread']} 页")
+
+            # 取走本次刷新产生的后宫成员变化事件
+            change_events = self.data_manager.pop_change_events()
+            if change_events:
+                logger.info(f"本次刷新产生 {len(change_events)} 条后宫成员变化事件")
+
+            # 按成员是否变化调整各站点的刷新间隔
+            if self.refresh_scheduler:
+                changed_sites = {event.get("site_name") for event in change_events}
+                for site_name in success_sites:
+                    self.refresh_scheduler.record_success(site_name, site_name in changed_sites)
+
             # 发送通知
             if self._notify:
-                self._send_refresh_notification(success_count, error_count, error_details)
+                self._send_refresh_notification(success_count, error_count, error_details, change_events)
             
             logger.info(f"增量刷新完成: 成功 {success_count} 个站点, 失败 {error_count} 个站点")
             
@@ -3768,57 +4266,66 @@ class nexusinvitee(_PluginBase):
             
         finally:
             # 清除刷新标志
-            self._refreshing = False
+            with self._refresh_lock:
+                self._refreshing = False
     
-    def _send_refresh_notification(self, success_count, error_count,error_details:List=None):
+    def __fetch_site(self, site: Dict[str, Any], parse_pool: Optional[ParsePool] = None) -> Dict[str, Any]:
         """
-        发送刷新结果通知
+        在刷新线程中获取单个站点数据
+        :param site: 站点信息
+        :param parse_pool: 本次刷新使用的多进程解析池
+        :return: 站点数据
         """
-        try:
-            # 从data_manager获取站点数据
-            cached_data = {}
-            site_data = self.data_manager.get_site_data()
-            for site_name, site_info in site_data.items():
-                cached_data[site_name] = site_info
-                
-            # 计算所有站点统计信息
-            total_invitees = 0
-            total_low_ratio = 0
-            total_banned = 0
-            total_no_data = 0
-
-            for site_name, cache in cached_data.items():
-                site_cache_data = cache.get("data", {})
-                invitees = []
-                
-                # 尝试不同的数据结构路径获取邀请列表
-                possible_paths = [
-                    ["invitees"],
-                    ["data", "invitees"],
-                    ["data", "data", "invitees"]
-                ]
-                
-                for path in possible_paths:
-                    result = get_nested_value(site_cache_data, path, [])
-                    if result:
-                        invitees = result
-                        break
-
-                # 统计各项数据
-                total_invitees += len(invitees)
+        site_name = site.get("name", "")
+        logger.debug(f"开始获取站点 {site_name} 的后宫数据...")
+        with self.metrics.site(site_name):
+            return self._get_site_invite_data(site_name, parse_pool=parse_pool)
 
-                # 统计用户状态 - 使用ratio_health字段
-                banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-                low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-                no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
+    @staticmethod
+    def _format_change_events(change_events: List[dict], limit: int = 5) -> str:
+        """
+        格式化后宫成员变化事件
+        :param change_events: 变化事件列表
+        :param limit: 每类事件最多列出的成员数
+        :return: 通知文本
+        """
+        sections = [
+            ("🆕 新增成员", lambda e: e["type"] == EVENT_NEW),
+            ("👋 离开成员", lambda e: e["type"] == EVENT_REMOVED),
+            ("🚫 新被禁用", lambda e: e["type"] == EVENT_BANNED),
+            ("📉 分享率变差", lambda e: e["type"] == EVENT_HEALTH and e.get("worse")),
+            ("📈 分享率好转", lambda e: e["type"] == EVENT_HEALTH and not e.get("worse")),
+        ]
+        text = ""
+        for title, match in sections:
+            events = [event for event in change_events if match(event)]
+            if not events:
+                continue
+            names = []
+            for event in events[:limit]:
+                name = f"[{event['site_name']}]{event.get('username', '')}"
+                if event["type"] == EVENT_HEALTH:
+                    name += f"({event.get('old')}→{event.get('new')})"
+                names.append(name)
+            more = f" 等{len(events)}人" if len(events) > limit else ""
+            text += f"{title}: {len(events)}人 - {', '.join(names)}{more}\n"
+        return text
 
-                # 累加到总数
-                total_banned += banned_count
-                total_low_ratio += low_ratio_count
-                total_no_data += no_data_count
+    def _send_refresh_notification(self, success_count, error_count,error_details:List=None,
+                                   change_events: List[dict] = None):
+        """
+        发送刷新结果通知
+        """
+        try:
+            # 所有站点统计信息（写入时已汇总）
+            summary = self.data_manager.get_summary()
+            total_invitees = summary["invitees"]
+            total_low_ratio = summary["low_ratio"]
+            total_banned = summary["banned"]
+            total_no_data = summary["no_data"]
+            logger.info(f"统计结果: 站点={summary['sites']}, 总人数={total_invitees}, 低分享率={total_low_ratio}, "
+                        f"已禁用={total_banned}, 无数据={total_no_data}")
 
-                logger.info(f"站点 {site_name} 统计结果: 总人数={len(invitees)}, 低分享率={low_ratio_count}, 已禁用={banned_count}, 无数据={no_data_count}")
-            
             title = "后宫管理系统 - 增量刷新结果"
             if success_count > 0 or error_count > 0:
                 # --- 修改开始: 添加图标美化通知文本 ---
@@ -3834,6 +4341,10 @@ class nexusinvitee(_PluginBase):
                 text += f"⚠️ 分享率低于1.0: {total_low_ratio}人\n"
                 text += f"🚫 已禁用用户: {total_banned}人\n"
                 text += f"🔄 无数据用户: {total_no_data}人\n\n"
+                if change_events:
+                    text += "📋 本次变化:\n"
+                    text += self._format_change_events(change_events)
+                    text += "\n"
                 # --- 修改结束 ---
                 
                 # 添加刷新时间
@@ -3853,6 +4364,14 @@ class nexusinvitee(_PluginBase):
         """
         注册插件公共服务
         """
+        if self._enabled and self._adaptive_schedule:
+            return [{
+                "id": "nexusinvitee",
+                "name": "后宫管理系统",
+                "trigger": "interval",
+                "func": self.refresh_scheduled_sites,
+                "kwargs": {"minutes": self._schedule_tick_minutes}
+            }]
         if self._enabled and self._cron:
             try:
                 # 检查是否为5位cron表达式
@@ -3861,7 +4380,7 @@ class nexusinvitee(_PluginBase):
                         "id": "nexusinvitee",
                         "name": "后宫管理系统",
                         "trigger": CronTrigger.from_crontab(self._cron),
-                        "func": self.refresh_all_sites,
+                        "func": self.refresh_scheduled_sites,
                         "kwargs": {}
                     }]
                 else:
@@ -3879,7 +4398,11 @@ class nexusinvitee(_PluginBase):
         """
         return {
             "/get_invitees": {"func": nexusinvitee.get_invitees, "methods": ["GET"], "desc": "获取所有站点邀请数据"},
-            "/refresh": {"func": nexusinvitee.refresh_data, "methods": ["GET"], "desc": "强制刷新站点数据"}
+            "/refresh": {"func": nexusinvitee.refresh_data, "methods": ["GET"], "desc": "强制刷新站点数据"},
+            "/invitee_trend": {"func": nexusinvitee.get_invitee_trend, "methods": ["GET"], "desc": "获取后宫成员分享率趋势"},
+            "/query_invitees": {"func": nexusinvitee.query_invitees, "methods": ["GET"], "desc": "分页查询后宫成员"},
+            "/schedule": {"func": nexusinvitee.get_schedule, "methods": ["GET"], "desc": "获取站点刷新调度状态"},
+            "/metrics": {"func": nexusinvitee.get_metrics, "methods": ["GET"], "desc": "获取刷新性能统计"}
         }
 
     def update_config(self, request: dict) -> Response:
@@ -3892,6 +4415,10 @@ class nexusinvitee(_PluginBase):
             self._notify = request.get("notify", False)
             self._cron = request.get("cron", "0 9 * * *")
             self._onlyonce = request.get("onlyonce", False)
+            self.__parse_refresh_config(request)
+            self._host_throttle = HostThrottle(self._request_interval)
+            # 配置变化后丢弃已渲染的页面
+            self._render_cache = {}
             
             # 获取选中站点列表
             self._nexus_sites = []
@@ -3948,16 +4475,13 @@ class nexusinvitee(_PluginBase):
 
     def _calculate_statistics(self, invitees):
         """
-        计算用户统计数据
+        计算用户统计数据，已保存站点的统计请使用DataManager.get_summary
         """
-        banned_count = sum(1 for i in invitees if i.get('enabled', '').lower() == 'no')
-        low_ratio_count = sum(1 for i in invitees if i.get('ratio_health') in ['warning', 'danger'])
-        no_data_count = sum(1 for i in invitees if i.get('ratio_health') == 'neutral')
-
+        summary = count_invitees(invitees)
         return {
-            'banned': banned_count,
-            'low_ratio': low_ratio_count,
-            'no_data': no_data_count
+            'banned': summary['banned'],
+            'low_ratio': summary['low_ratio'],
+            'no_data': summary['no_data']
         }
 
     def get_config(self, apikey: str) -> Response:
@@ -3974,7 +4498,13 @@ class nexusinvitee(_PluginBase):
                 "notify": self._notify,
                 "cron": self._cron,
                 "onlyonce": self._onlyonce,
-                "site_ids": self._nexus_sites
+                "site_ids": self._nexus_sites,
+                "max_workers": self._max_workers,
+                "request_interval": self._request_interval,
+                "page_size": self._page_size,
+                "full_crawl_days": self._full_crawl_days,
+                "parse_workers": self._parse_workers,
+                "adaptive_schedule": self._adaptive_schedule
             }
             return Response(success=True, message="获取成功", data=config)
         except Exception as e:
@@ -2,58 +2,283 @@
 数据管理模块
 """
 import os
+import sys
 import json
 import time
+import sqlite3
+import threading
 from typing import Dict, Any, List, Optional
 
 from app.log import logger
 
+from plugins.nexusinvitee.diff import diff_invitees, keyed_invitees
+from plugins.nexusinvitee.summary import summarize_site, merge_summaries
+from plugins.nexusinvitee.records import InviteeRecord, to_records
+
 
 class DataManager:
     """
     数据管理类
+
+    站点数据按站点逐行保存在SQLite（WAL模式）中，单个站点的更新是一次独立事务，
+    不再因为一个站点刷新而重写全部站点数据。
+    读取走进程级内存缓存，写入同时更新缓存并递增写版本号，返回的数据应视为只读。
+    后宫成员按成员逐行保存，刷新时与已保存的成员比对，只写入有变化的成员并产生变化事件。
+    缓存中的后宫成员为只读的InviteeRecord，写入时转换，数据库中仍保存原有的JSON结构。
+    站点汇总随写入更新，全局汇总由站点汇总相加，统计读取只与站点数相关
     """
-    
+    # 进程级读缓存：数据库文件 -> {"version": 写版本号, "sites": 站点数据, "last_update": 最后更新时间,
+    #                             "summaries": 站点汇总, "summary": 全局汇总}
+    _cache: Dict[str, Dict[str, Any]] = {}
+    _cache_lock = threading.RLock()
+
     def __init__(self, data_path: str):
         """
         初始化数据管理
         :param data_path: 数据目录路径
         """
         self.data_path = data_path
+        # 旧版JSON数据文件，仅用于一次性迁移
         self.data_file = os.path.join(data_path, "site_data.json")
-    
+        self.db_file = os.path.join(data_path, "site_data.db")
+        self._lock = DataManager._cache_lock
+        self._conn: Optional[sqlite3.Connection] = None
+        # 尚未被取走的后宫成员变化事件
+        self._events: List[Dict[str, Any]] = []
+        self._init_db()
+        self._migrate_json()
+        self._split_invitees()
+
+    def _init_db(self):
+        """
+        初始化数据库连接与表结构
+        """
+        try:
+            os.makedirs(self.data_path, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS site_data ("
+                "site_name TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, "
+                "last_update INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS site_invitees ("
+                "site_name TEXT NOT NULL, "
+                "invitee_key TEXT NOT NULL, "
+                "data TEXT NOT NULL, "
+                "PRIMARY KEY (site_name, invitee_key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS site_discovery ("
+                "site_key TEXT PRIMARY KEY, "
+                "fingerprint TEXT NOT NULL, "
+                "user_id TEXT, "
+                "updated INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"初始化站点数据库失败: {str(e)}")
+            self._conn = None
+
+    def _migrate_json(self):
+        """
+        将旧版site_data.json一次性迁移到数据库，迁移后原文件重命名保留
+        """
+        if not self._conn or not os.path.exists(self.data_file):
+            return
+        try:
+            with open(self.data_file, 'r', encoding='utf-8') as f:
+                legacy_data = json.load(f)
+            rows = []
+            for site_name, site_record in (legacy_data or {}).items():
+                if not isinstance(site_record, dict):
+                    continue
+                rows.append((site_name,
+                             json.dumps(site_record.get("data", {}), ensure_ascii=False),
+                             int(site_record.get("last_update", 0) or 0)))
+            with self._lock, self._conn:
+                # 已存在的站点以数据库为准
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO site_data (site_name, data, last_update) VALUES (?, ?, ?)", rows)
+            self._invalidate()
+            os.replace(self.data_file, f"{self.data_file}.migrated")
+            logger.info(f"已将 {len(rows)} 个站点数据从 site_data.json 迁移到数据库")
+        except Exception as e:
+            logger.error(f"迁移旧版站点数据文件失败: {str(e)}")
+
+    def _split_invitees(self):
+        """
+        将仍内嵌在站点数据中的后宫成员列表拆分为逐行保存
+        """
+        if not self._conn:
+            return
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT site_name, data, last_update FROM site_data WHERE data LIKE '%\"invitees\"%'").fetchall()
+                split = 0
+                with self._conn:
+                    for site_name, data, last_update in rows:
+                        site_data = json.loads(data)
+                        if "invitees" not in site_data:
+                            continue
+                        self._write_site(site_name, site_data, last_update, None)
+                        split += 1
+            if split:
+                logger.info(f"已将 {split} 个站点的后宫成员拆分为逐行保存")
+        except Exception as e:
+            logger.error(f"拆分站点后宫成员数据失败: {str(e)}")
+
+    def _write_site(self, site_name: str, site_data: Dict[str, Any], last_update: int,
+                    old_invitees: Optional[List[Dict[str, Any]]]):
+        """
+        在当前事务中写入单个站点的数据，后宫成员只写入有变化的行
+        :param site_name: 站点名称
+        :param site_data: 站点数据
+        :param last_update: 更新时间
+        :param old_invitees: 已保存的后宫成员，None表示站点首次保存
+        :return: 后宫成员差异
+        """
+        new = keyed_invitees(site_data.get("invitees", []))
+        diff = diff_invitees(site_name, keyed_invitees(old_invitees) if old_invitees is not None else None, new)
+        if old_invitees is None:
+            self._conn.execute("DELETE FROM site_invitees WHERE site_name = ?", (site_name,))
+        # 站点数据只保存成员顺序，成员内容保存在site_invitees表
+        row = {key: value for key, value in site_data.items() if key != "invitees"}
+        row["invitee_keys"] = list(new)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO site_data (site_name, data, last_update) VALUES (?, ?, ?)",
+            (site_name, json.dumps(row, ensure_ascii=False), last_update))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO site_invitees (site_name, invitee_key, data) VALUES (?, ?, ?)",
+            [(site_name, key, json.dumps(dict(invitee), ensure_ascii=False)) for key, invitee in diff.changed.items()])
+        self._conn.executemany(
+            "DELETE FROM site_invitees WHERE site_name = ? AND invitee_key = ?",
+            [(site_name, key) for key in diff.removed])
+        return diff
+
+    @staticmethod
+    def _to_record(data: str, last_update: int,
+                   invitees: Optional[Dict[str, InviteeRecord]] = None) -> Dict[str, Any]:
+        """
+        将数据库行转换为站点数据记录
+        :param data: 站点数据JSON
+        :param last_update: 更新时间
+        :param invitees: 该站点逐行保存的后宫成员（标识索引）
+        """
+        try:
+            site_data = json.loads(data)
+        except Exception as e:
+            logger.error(f"解析站点数据失败: {str(e)}")
+            site_data = {}
+        if "invitee_keys" in site_data:
+            invitees = invitees or {}
+            site_data["invitees"] = [invitees[key] for key in site_data.pop("invitee_keys") if key in invitees]
+        return {
+            "data": site_data,
+            "last_update": last_update
+        }
+
     def load_data(self) -> Dict[str, Any]:
         """
-        从文件加载数据
+        从数据库加载所有站点数据
         :return: 数据字典
         """
-        if not os.path.exists(self.data_file):
+        if not self._conn:
             return {}
-        
+
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with self._lock:
+                rows = self._conn.execute("SELECT site_name, data, last_update FROM site_data").fetchall()
+                invitee_rows = self._conn.execute("SELECT site_name, invitee_key, data FROM site_invitees").fetchall()
+            invitees: Dict[str, Dict[str, InviteeRecord]] = {}
+            for site_name, key, data in invitee_rows:
+                invitees.setdefault(site_name, {})[key] = InviteeRecord(json.loads(data))
+            return {sys.intern(site_name): self._to_record(data, last_update, invitees.get(site_name))
+                    for site_name, data, last_update in rows}
         except Exception as e:
-            logger.error(f"读取站点数据文件失败: {str(e)}")
+            logger.error(f"读取站点数据失败: {str(e)}")
             return {}
-    
+
+    def _cached(self) -> Dict[str, Any]:
+        """
+        获取缓存条目，首次访问时从数据库加载
+        :return: 缓存条目
+        """
+        with self._lock:
+            entry = DataManager._cache.get(self.db_file)
+            if entry is None:
+                sites = self.load_data()
+                entry = {
+                    "version": 0,
+                    "sites": sites,
+                    "last_update": max((record.get("last_update", 0) for record in sites.values()), default=0)
+                }
+                self._set_summaries(entry, {site_name: summarize_site(record.get("data", {}))
+                                            for site_name, record in sites.items()})
+                DataManager._cache[self.db_file] = entry
+            return entry
+
+    @staticmethod
+    def _set_summaries(entry: Dict[str, Any], summaries: Dict[str, Dict[str, int]]):
+        """
+        更新缓存条目中的站点汇总及全局汇总
+        :param entry: 缓存条目
+        :param summaries: 站点汇总
+        """
+        entry["summaries"] = summaries
+        entry["summary"] = merge_summaries(summaries.values())
+
+    def _invalidate(self):
+        """
+        写入失败等无法确定数据库状态时，丢弃缓存并推进版本号
+        """
+        with self._lock:
+            entry = DataManager._cache.pop(self.db_file, None)
+            if entry is not None:
+                reloaded = self._cached()
+                reloaded["version"] = entry["version"] + 1
+
+    def get_version(self) -> int:
+        """
+        获取数据写版本号，每次写入后递增
+        :return: 版本号
+        """
+        return self._cached()["version"]
+
     def save_data(self, data: Dict[str, Any]) -> bool:
         """
-        保存数据到文件
+        整体替换所有站点数据
         :param data: 数据字典
         :return: 是否成功
         """
+        if not self._conn:
+            return False
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            sites = {sys.intern(site_name): {"data": self._with_records(record.get("data", {})),
+                                 "last_update": int(record.get("last_update", 0) or 0)}
+                     for site_name, record in data.items()}
+            with self._lock:
+                with self._conn:
+                    self._conn.execute("DELETE FROM site_data")
+                    self._conn.execute("DELETE FROM site_invitees")
+                    for site_name, record in sites.items():
+                        self._write_site(site_name, record["data"], record["last_update"], None)
+                entry = self._cached()
+                entry["sites"] = sites
+                entry["last_update"] = max((record["last_update"] for record in sites.values()), default=0)
+                self._set_summaries(entry, {site_name: summarize_site(record["data"])
+                                            for site_name, record in sites.items()})
+                entry["version"] += 1
             return True
         except Exception as e:
-            logger.error(f"保存站点数据到文件失败: {str(e)}")
+            logger.error(f"保存站点数据失败: {str(e)}")
+            self._invalidate()
             return False
-    
+
     def update_site_data(self, site_name: str, site_data: Dict[str, Any]) -> bool:
         """
         更新指定站点的数据
@@ -61,52 +286,142 @@ class DataManager:
         :param site_data: 站点数据
         :return: 是否成功
         """
-        all_data = self.load_data()
-        
-        # 更新站点数据并添加时间戳
-        all_data[site_name] = {
-            "data": site_data,
-            "last_update": int(time.time())
-        }
-        
-        return self.save_data(all_data)
-    
+        if not self._conn:
+            return False
+        try:
+            site_name = sys.intern(site_name)
+            site_data = self._with_records(site_data)
+            last_update = int(time.time())
+            with self._lock:
+                entry = self._cached()
+                previous = entry["sites"].get(site_name)
+                old_invitees = previous.get("data", {}).get("invitees", []) if previous is not None else None
+                with self._conn:
+                    diff = self._write_site(site_name, site_data, last_update, old_invitees)
+                entry["sites"] = {**entry["sites"], site_name: {"data": site_data, "last_update": last_update}}
+                entry["last_update"] = max(entry["last_update"], last_update)
+                self._set_summaries(entry, {**entry["summaries"], site_name: summarize_site(site_data)})
+                entry["version"] += 1
+                self._events.extend(diff.events)
+            if diff:
+                logger.debug(f"站点 {site_name} 后宫成员变化: 写入 {len(diff.changed)} 人，移除 {len(diff.removed)} 人，"
+                             f"事件 {len(diff.events)} 条")
+            return True
+        except Exception as e:
+            logger.error(f"保存站点 {site_name} 数据失败: {str(e)}")
+            self._invalidate()
+            return False
+
+    @staticmethod
+    def _with_records(site_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将站点数据中的后宫成员转换为记录
+        :param site_data: 站点数据
+        :return: 后宫成员为InviteeRecord的站点数据副本
+        """
+        if not isinstance(site_data, dict) or "invitees" not in site_data:
+            return site_data
+        return {**site_data, "invitees": to_records(site_data["invitees"])}
+
     def get_site_data(self, site_name: Optional[str] = None) -> Dict[str, Any]:
         """
         获取站点数据
         :param site_name: 站点名称，如果为None则返回所有站点数据
         :return: 站点数据
         """
-        all_data = self.load_data()
-        
+        sites = self._cached()["sites"]
         if site_name:
-            return all_data.get(site_name, {})
-        return all_data
-    
+            return sites.get(site_name, {})
+        return dict(sites)
+
+    def get_summary(self, site_name: Optional[str] = None) -> Dict[str, int]:
+        """
+        获取统计汇总
+        :param site_name: 站点名称，如果为None则返回全局汇总
+        :return: 总人数、禁用、低分享率、无数据人数及永久/临时邀请数，全局汇总另含站点数
+        """
+        entry = self._cached()
+        if site_name:
+            return entry["summaries"].get(site_name) or summarize_site({})
+        return entry["summary"]
+
     def get_last_update_time(self) -> int:
         """
         获取最后更新时间
         :return: 时间戳
         """
-        all_data = self.load_data()
-        
-        update_times = []
-        for site_data in all_data.values():
-            if "last_update" in site_data:
-                update_times.append(site_data["last_update"])
-        
-        return max(update_times) if update_times else 0
-        
+        return self._cached()["last_update"]
+
     def clear_all_site_data(self) -> bool:
         """
         清空所有站点数据
         :return: 是否成功
         """
+        return self.save_data({})
+
+    def pop_change_events(self) -> List[Dict[str, Any]]:
+        """
+        取走自上次调用以来产生的后宫成员变化事件
+        :return: 事件列表，包含新增/离开/禁用/分享率健康等级变化
+        """
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def get_discovery(self, site_key: str, fingerprint: str) -> Dict[str, Any]:
+        """
+        获取站点的用户ID缓存
+        :param site_key: 站点标识
+        :param fingerprint: 认证信息指纹，与缓存不一致时视为未命中
+        :return: 缓存内容，未命中时返回空字典
+        """
+        if not self._conn:
+            return {}
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT fingerprint, user_id, updated FROM site_discovery WHERE site_key = ?",
+                    (site_key,)).fetchone()
+            if not row or row[0] != fingerprint:
+                return {}
+            return {"user_id": row[1], "updated": row[2]}
+        except Exception as e:
+            logger.error(f"读取站点 {site_key} 探测缓存失败: {str(e)}")
+            return {}
+
+    def save_discovery(self, site_key: str, fingerprint: str, user_id: Optional[str]) -> bool:
+        """
+        保存站点的用户ID
+        :param site_key: 站点标识
+        :param fingerprint: 认证信息指纹
+        :param user_id: 用户ID
+        :return: 是否成功
+        """
+        if not self._conn:
+            return False
         try:
-            if os.path.exists(self.data_file):
-                # 直接清空为空字典
-                return self.save_data({})
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO site_discovery (site_key, fingerprint, user_id, updated) "
+                    "VALUES (?, ?, ?, ?)",
+                    (site_key, fingerprint, user_id, int(time.time())))
             return True
         except Exception as e:
-            logger.error(f"清空站点数据失败: {str(e)}")
-            return False 
\ No newline at end of file
+            logger.error(f"保存站点 {site_key} 探测缓存失败: {str(e)}")
+            return False
+
+    def clear_discovery(self, site_key: str) -> bool:
+        """
+        清除站点的探测缓存
+        :param site_key: 站点标识
+        :return: 是否成功
+        """
+        if not self._conn:
+            return False
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM site_discovery WHERE site_key = ?", (site_key,))
+            return True
+        except Exception as e:
+            logger.error(f"清除站点 {site_key} 探测缓存失败: {str(e)}")
+            return False
@@ -0,0 +1,130 @@
+"""
+后宫成员增量比对模块
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+
+# 分享率健康等级，数值越大越危险
+HEALTH_LEVELS = {
+    "excellent": 0,
+    "good": 1,
+    "neutral": 2,
+    "unknown": 2,
+    "warning": 3,
+    "danger": 4,
+}
+
+# 变化事件类型
+EVENT_NEW = "new"
+EVENT_REMOVED = "removed"
+EVENT_BANNED = "banned"
+EVENT_HEALTH = "health"
+
+
+def invitee_key(invitee: Dict[str, Any]) -> str:
+    """
+    获取后宫成员的唯一标识，优先使用个人主页地址，其次用户名
+    :param invitee: 后宫成员
+    :return: 标识
+    """
+    return str(invitee.get("profile_url") or invitee.get("username") or invitee.get("email") or "")
+
+
+def is_banned(invitee: Dict[str, Any]) -> bool:
+    """
+    后宫成员是否已被禁用
+    """
+    return str(invitee.get("enabled", "")).lower() == "no"
+
+
+def keyed_invitees(invitees: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    按标识索引后宫成员列表，保持原有顺序，重复标识追加序号
+    :param invitees: 后宫成员列表
+    :return: 标识 -> 后宫成员
+    """
+    keyed = {}
+    for invitee in invitees or []:
+        if not isinstance(invitee, Mapping):
+            continue
+        key = invitee_key(invitee)
+        if key in keyed:
+            index = 2
+            while f"{key}#{index}" in keyed:
+                index += 1
+            key = f"{key}#{index}"
+        keyed[key] = invitee
+    return keyed
+
+
+class InviteeDiff:
+    """
+    一次刷新前后后宫成员的差异
+    """
+
+    def __init__(self, site_name: str):
+        self.site_name = site_name
+        # 新增或内容变化的成员：标识 -> 成员
+        self.changed: Dict[str, Dict[str, Any]] = {}
+        # 已离开的成员标识
+        self.removed: List[str] = []
+        # 结构化变化事件
+        self.events: List[Dict[str, Any]] = []
+
+    def __bool__(self):
+        return bool(self.changed or self.removed)
+
+    def add_event(self, event_type: str, invitee: Dict[str, Any], **extra) -> None:
+        """
+        记录一条变化事件
+        :param event_type: 事件类型
+        :param invitee: 相关的后宫成员
+        :param extra: 事件附加字段
+        """
+        self.events.append({
+            "type": event_type,
+            "site_name": self.site_name,
+            "username": invitee.get("username", ""),
+            "profile_url": invitee.get("profile_url", ""),
+            **extra
+        })
+
+
+def diff_invitees(site_name: str,
+                  old: Optional[Dict[str, Dict[str, Any]]],
+                  new: Dict[str, Dict[str, Any]]) -> InviteeDiff:
+    """
+    比对站点前后两次的后宫成员
+    :param site_name: 站点名称
+    :param old: 已保存的成员（标识索引），None表示站点首次保存，此时不产生事件
+    :param new: 本次获取的成员（标识索引）
+    :return: 差异
+    """
+    diff = InviteeDiff(site_name)
+    baseline = old is None
+    old = old or {}
+
+    for key, invitee in new.items():
+        previous = old.get(key)
+        if previous is None:
+            diff.changed[key] = invitee
+            if not baseline:
+                diff.add_event(EVENT_NEW, invitee)
+            continue
+        if previous == invitee:
+            continue
+        diff.changed[key] = invitee
+        if is_banned(invitee) and not is_banned(previous):
+            diff.add_event(EVENT_BANNED, invitee)
+        old_health = previous.get("ratio_health", "")
+        new_health = invitee.get("ratio_health", "")
+        if old_health != new_health and old_health in HEALTH_LEVELS and new_health in HEALTH_LEVELS:
+            diff.add_event(EVENT_HEALTH, invitee, old=old_health, new=new_health,
+                         worse=HEALTH_LEVELS[new_health] > HEALTH_LEVELS[old_health])
+
+    for key, invitee in old.items():
+        if key not in new:
+            diff.removed.append(key)
+            diff.add_event(EVENT_REMOVED, invitee)
+
+    return diff
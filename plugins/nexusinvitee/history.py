@@ -0,0 +1,367 @@
+"""
+后宫成员历史数据模块
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.log import logger
+
+from plugins.nexusinvitee.diff import keyed_invitees
+from plugins.nexusinvitee.normalize import INFINITE_RATIO, parse_ratio, size_to_bytes
+
+NAN = float("nan")
+# 每个样本记录的字段，上传/下载量单位为GiB
+FIELDS = ("ratio", "uploaded", "downloaded")
+
+
+def _size_to_gib(size_str: Any) -> float:
+    """
+    将大小字符串转换为GiB，缺失时返回NaN
+    """
+    if size_str is None or str(size_str).strip() == "":
+        return NAN
+    return size_to_bytes(size_str if isinstance(size_str, (int, float)) else str(size_str)) / 1024 ** 3
+
+
+def invitee_sample(invitee: Dict[str, Any]) -> Tuple[float, float, float]:
+    """
+    从后宫成员数据中提取一个样本
+    :param invitee: 后宫成员
+    :return: (分享率, 上传GiB, 下载GiB)，缺失的值为NaN
+    """
+    ratio = invitee.get("ratio_value")
+    if ratio is None:
+        try:
+            ratio = parse_ratio(str(invitee.get("ratio", "")).strip())
+        except ValueError:
+            ratio = NAN
+    if ratio >= INFINITE_RATIO:
+        ratio = math.inf
+    return float(ratio), _size_to_gib(invitee.get("uploaded")), _size_to_gib(invitee.get("downloaded"))
+
+
+class SiteHistory:
+    """
+    单个站点的列式历史数据
+
+    所有成员共享一条时间轴，每个字段是一个按"样本行 x 成员列"展开的float32数组，
+    成员在某次刷新中缺失时对应位置为NaN
+    """
+
+    def __init__(self, keys: Optional[List[str]] = None, timestamps: Optional[array] = None,
+                 columns: Optional[Dict[str, array]] = None):
+        self.keys: List[str] = list(keys or [])
+        self.index: Dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+        self.timestamps: array = timestamps if timestamps is not None else array("q")
+        self.columns: Dict[str, array] = columns or {field: array("f") for field in FIELDS}
+
+    def _rebuild(self, rows: List[int], cols: Optional[List[int]] = None):
+        """
+        只保留指定的样本行与成员列
+        """
+        width = len(self.keys)
+        cols = list(range(width)) if cols is None else cols
+        contiguous = cols == list(range(width))
+        for field, column in self.columns.items():
+            rebuilt = array("f")
+            for row in rows:
+                values = column[row * width:(row + 1) * width]
+                rebuilt.extend(values if contiguous else array("f", (values[col] for col in cols)))
+            self.columns[field] = rebuilt
+        self.timestamps = array("q", (self.timestamps[row] for row in rows))
+        if not contiguous:
+            self.keys = [self.keys[col] for col in cols]
+            self.index = {key: i for i, key in enumerate(self.keys)}
+
+    def _widen(self, new_keys: List[str]):
+        """
+        为新出现的成员增加列，已有样本行补NaN
+        """
+        width = len(self.keys)
+        self.keys.extend(new_keys)
+        self.index.update({key: width + i for i, key in enumerate(new_keys)})
+        if not self.timestamps:
+            return
+        pad = array("f", [NAN]) * len(new_keys)
+        for field, column in self.columns.items():
+            widened = array("f")
+            for row in range(len(self.timestamps)):
+                widened.extend(column[row * width:(row + 1) * width])
+                widened.extend(pad)
+            self.columns[field] = widened
+
+    def append(self, timestamp: int, samples: Dict[str, Tuple[float, float, float]]):
+        """
+        追加一次刷新的样本
+        :param timestamp: 时间戳
+        :param samples: 成员标识 -> (分享率, 上传GiB, 下载GiB)
+        """
+        new_keys = [key for key in samples if key not in self.index]
+        if new_keys:
+            self._widen(new_keys)
+        width = len(self.keys)
+        rows = {field: array("f", [NAN]) * width for field in FIELDS}
+        for key, values in samples.items():
+            col = self.index[key]
+            for field, value in zip(FIELDS, values):
+                rows[field][col] = value
+        self.timestamps.append(int(timestamp))
+        for field in FIELDS:
+            self.columns[field].extend(rows[field])
+
+    def compact(self, now: int, recent_seconds: int, retention_seconds: int):
+        """
+        降采样与过期清理：近期样本全部保留，更早的样本每天只保留最后一个，超出保留期的样本删除；
+        不再有任何数据的成员列一并删除
+        """
+        recent_rows = []
+        daily_rows: Dict[int, int] = {}
+        for row, timestamp in enumerate(self.timestamps):
+            if timestamp < now - retention_seconds:
+                continue
+            if timestamp >= now - recent_seconds:
+                recent_rows.append(row)
+            else:
+                daily_rows[timestamp // 86400] = row
+        rows = sorted(daily_rows.values()) + recent_rows
+        if len(rows) == len(self.timestamps):
+            return
+        self._rebuild(rows)
+
+        width = len(self.keys)
+        alive = [col for col in range(width)
+                 if any(not math.isnan(value) for field in FIELDS for value in self.columns[field][col::width])]
+        if len(alive) != width:
+            self._rebuild(list(range(len(self.timestamps))), alive)
+
+    def series(self, key: str) -> List[Tuple[int, float, float, float]]:
+        """
+        获取单个成员的历史样本
+        :param key: 成员标识
+        :return: [(时间戳, 分享率, 上传GiB, 下载GiB)]，按时间升序
+        """
+        col = self.index.get(key)
+        if col is None:
+            return []
+        # 按成员列跨步切片，避免逐行遍历
+        width = len(self.keys)
+        ratio, uploaded, downloaded = (self.columns[field][col::width] for field in FIELDS)
+        return [sample for sample in zip(self.timestamps, ratio, uploaded, downloaded)
+                if not (math.isnan(sample[1]) and math.isnan(sample[2]) and math.isnan(sample[3]))]
+
+    def to_row(self) -> Tuple[str, bytes, bytes, bytes, bytes]:
+        """
+        序列化为数据库行
+        """
+        return (json.dumps(self.keys, ensure_ascii=False), self.timestamps.tobytes(),
+                *(self.columns[field].tobytes() for field in FIELDS))
+
+    @classmethod
+    def from_row(cls, keys: str, timestamps: bytes, *columns: bytes) -> "SiteHistory":
+        """
+        从数据库行反序列化
+        """
+        loaded_timestamps = array("q")
+        loaded_timestamps.frombytes(timestamps)
+        loaded_columns = {}
+        for field, blob in zip(FIELDS, columns):
+            loaded_columns[field] = array("f")
+            loaded_columns[field].frombytes(blob)
+        return cls(json.loads(keys), loaded_timestamps, loaded_columns)
+
+
+def _json_number(value: Optional[float], digits: int = 4) -> Any:
+    """
+    转换为可序列化为JSON的数值，NaN为None，无穷大为"∞"
+    """
+    if value is None or math.isnan(value):
+        return None
+    if math.isinf(value):
+        return "∞"
+    return round(value, digits)
+
+
+def _slope(points: List[Tuple[float, float]]) -> Optional[float]:
+    """
+    最小二乘拟合斜率
+    """
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    if not denominator:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator
+
+
+def trend(series: List[Tuple[int, float, float, float]], window_days: int = 7,
+          project_days: int = 7) -> Dict[str, Any]:
+    """
+    根据历史样本计算成员的变化趋势与预测分享率
+    :param series: 成员历史样本
+    :param window_days: 参与拟合的最近天数
+    :param project_days: 预测天数
+    :return: 趋势数据
+    """
+    if not series:
+        return {}
+    last_ts, ratio, uploaded, downloaded = series[-1]
+    window = [sample for sample in series if sample[0] >= last_ts - window_days * 86400]
+
+    def fit(index: int) -> Optional[float]:
+        points = [((sample[0] - last_ts) / 86400, sample[index]) for sample in window
+                  if math.isfinite(sample[index])]
+        return _slope(points)
+
+    ratio_slope, upload_slope, download_slope = fit(1), fit(2), fit(3)
+    projected = None
+    if upload_slope is not None and download_slope is not None and math.isfinite(uploaded) \
+            and math.isfinite(downloaded):
+        future_download = downloaded + max(download_slope, 0) * project_days
+        if future_download > 0:
+            projected = (uploaded + max(upload_slope, 0) * project_days) / future_download
+    if projected is None and ratio_slope is not None and math.isfinite(ratio):
+        projected = max(ratio + ratio_slope * project_days, 0)
+
+    return {
+        "samples": len(series),
+        "first_time": series[0][0],
+        "last_time": last_ts,
+        "ratio": _json_number(ratio),
+        "uploaded_gb": _json_number(uploaded),
+        "downloaded_gb": _json_number(downloaded),
+        "ratio_per_day": _json_number(ratio_slope),
+        "uploaded_gb_per_day": _json_number(upload_slope),
+        "downloaded_gb_per_day": _json_number(download_slope),
+        "projected_ratio": _json_number(projected),
+        "project_days": project_days
+    }
+
+
+class HistoryStore:
+    """
+    后宫成员历史数据存储
+
+    每个站点一行，成员标识列表与各字段数组以二进制保存，读取后按站点常驻内存
+    """
+    # 近期样本全部保留的时长
+    RECENT_SECONDS = 24 * 3600
+    # 历史保留时长
+    RETENTION_SECONDS = 30 * 86400
+
+    def __init__(self, data_path: str):
+        """
+        初始化历史数据存储
+        :param data_path: 数据目录路径
+        """
+        self.db_file = os.path.join(data_path, "invitee_history.db")
+        self._lock = threading.RLock()
+        self._sites: Dict[str, SiteHistory] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            os.makedirs(data_path, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS site_history ("
+                "site_name TEXT PRIMARY KEY, "
+                "keys TEXT NOT NULL, "
+                "timestamps BLOB NOT NULL, "
+                "ratio BLOB NOT NULL, "
+                "uploaded BLOB NOT NULL, "
+                "downloaded BLOB NOT NULL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.error(f"初始化后宫历史数据库失败: {str(e)}")
+            self._conn = None
+
+    def _load(self, site_name: str) -> SiteHistory:
+        """
+        获取站点历史数据，首次访问时从数据库加载
+        """
+        history = self._sites.get(site_name)
+        if history is not None:
+            return history
+        row = None
+        if self._conn:
+            row = self._conn.execute(
+                "SELECT keys, timestamps, ratio, uploaded, downloaded FROM site_history WHERE site_name = ?",
+                (site_name,)).fetchone()
+        history = SiteHistory.from_row(*row) if row else SiteHistory()
+        self._sites[site_name] = history
+        return history
+
+    def get_site_names(self) -> List[str]:
+        """
+        获取有历史数据的站点
+        """
+        if not self._conn:
+            return []
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT site_name FROM site_history")]
+
+    def record(self, site_name: str, invitees: List[Dict[str, Any]], timestamp: Optional[int] = None) -> int:
+        """
+        记录一次刷新的成员样本，并执行降采样与过期清理
+        :param site_name: 站点名称
+        :param invitees: 后宫成员列表
+        :param timestamp: 时间戳，默认当前时间
+        :return: 记录的成员数
+        """
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        samples = {key: invitee_sample(invitee) for key, invitee in keyed_invitees(invitees).items()}
+        try:
+            with self._lock:
+                history = self._load(site_name)
+                history.append(timestamp, samples)
+                history.compact(timestamp, self.RECENT_SECONDS, self.RETENTION_SECONDS)
+                if self._conn:
+                    with self._conn:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO site_history "
+                            "(site_name, keys, timestamps, ratio, uploaded, downloaded) VALUES (?, ?, ?, ?, ?, ?)",
+                            (site_name, *history.to_row()))
+            return len(samples)
+        except Exception as e:
+            logger.error(f"记录站点 {site_name} 后宫历史数据失败: {str(e)}")
+            self._sites.pop(site_name, None)
+            return 0
+
+    def get_series(self, site_name: str, key: str, as_dict: bool = False) -> List[Any]:
+        """
+        获取成员的历史样本
+        :param site_name: 站点名称
+        :param key: 成员标识
+        :param as_dict: 是否转换为可直接序列化为JSON的字典
+        :return: 历史样本
+        """
+        with self._lock:
+            series = self._load(site_name).series(key)
+        if not as_dict:
+            return series
+        return [{"time": timestamp,
+                 "ratio": _json_number(ratio),
+                 "uploaded_gb": _json_number(uploaded),
+                 "downloaded_gb": _json_number(downloaded)}
+                for timestamp, ratio, uploaded, downloaded in series]
+
+    def get_trends(self, site_name: str, window_days: int = 7, project_days: int = 7) -> Dict[str, Dict[str, Any]]:
+        """
+        获取站点所有成员的趋势
+        :param site_name: 站点名称
+        :param window_days: 参与拟合的最近天数
+        :param project_days: 预测天数
+        :return: 成员标识 -> 趋势数据
+        """
+        with self._lock:
+            history = self._load(site_name)
+            series = {key: history.series(key) for key in history.keys}
+        return {key: trend(samples, window_days, project_days) for key, samples in series.items() if samples}
@@ -0,0 +1,283 @@
+"""
+刷新性能统计模块
+
+站点抓取期间通过线程局部变量记录经ThrottledSession发出的每个请求，
+按URL归类到各阶段；翻页及魔力值商店的页面解析由解析处记录实测耗时。
+最近若干次刷新的统计保存在环形缓冲区中
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+# 阶段
+PHASE_AUTH = "auth"
+PHASE_USER_ID = "user_id"
+PHASE_INVITE_PAGE = "invite_page"
+PHASE_PAGINATION = "pagination"
+PHASE_BONUS_SHOP = "bonus_shop"
+PHASE_SEND_INVITE = "send_invite"
+PHASE_API = "api"
+PHASE_OTHER = "other"
+PHASE_THROTTLE = "throttle"
+PHASE_PARSE = "parse"
+
+PHASE_NAMES = {
+    PHASE_AUTH: "首页/登录检查",
+    PHASE_USER_ID: "获取用户ID",
+    PHASE_INVITE_PAGE: "邀请页",
+    PHASE_PAGINATION: "邀请列表翻页",
+    PHASE_BONUS_SHOP: "魔力商店",
+    PHASE_SEND_INVITE: "发邀权限检查",
+    PHASE_API: "API请求",
+    PHASE_OTHER: "其他请求",
+    PHASE_THROTTLE: "限流等待",
+    PHASE_PARSE: "页面解析",
+}
+
+_local = threading.local()
+
+
+def classify_url(url: str) -> str:
+    """
+    根据URL判断请求所属阶段
+    :param url: 请求地址
+    :return: 阶段
+    """
+    try:
+        parsed = urlparse(url)
+    except Exception:
+        return PHASE_OTHER
+    path = parsed.path.lower()
+    query = parse_qs(parsed.query)
+    if "/api/" in path:
+        return PHASE_API
+    if "mybonus" in path:
+        return PHASE_BONUS_SHOP
+    if "sendinvite" in path or query.get("type") == ["new"]:
+        return PHASE_SEND_INVITE
+    if "invite" in path:
+        page = (query.get("page") or ["0"])[0]
+        return PHASE_PAGINATION if page not in ("", "0") else PHASE_INVITE_PAGE
+    if "usercp" in path or "userdetails" in path:
+        return PHASE_USER_ID
+    if path in ("", "/", "/index.php"):
+        return PHASE_AUTH
+    return PHASE_OTHER
+
+
+class SiteMetrics:
+    """
+    单个站点一次抓取的请求及阶段耗时
+    """
+
+    def __init__(self, site_name: str):
+        self.site_name = site_name
+        self.started = time.perf_counter()
+        self.requests: List[Dict[str, Any]] = []
+        self._urls: Dict[str, int] = {}
+        self.wait_seconds = 0.0
+        self.parse_ms = 0.0
+        # 翻页等场景会在多个线程中记录同一站点
+        self._lock = threading.Lock()
+
+    def record_request(self, method: str, url: str, status: Optional[int], seconds: float,
+                       ttfb: Optional[float] = None, size: int = 0, wait: float = 0.0, error: str = ""):
+        """
+        记录一次请求
+        :param method: 请求方法
+        :param url: 请求地址
+        :param status: 响应状态码，请求异常时为None
+        :param seconds: 请求总耗时（含下载响应体）
+        :param ttfb: 收到响应头的耗时
+        :param size: 响应字节数
+        :param wait: 请求前的限流等待时长
+        :param error: 异常类型
+        """
+        with self._lock:
+            # 同一地址再次请求视为重试
+            retries = self._urls.get(url, 0)
+            self._urls[url] = retries + 1
+            self.wait_seconds += wait
+            self.requests.append({
+                "method": method.upper(),
+                "url_class": classify_url(url),
+                "status": status,
+                "ms": round(seconds * 1000, 1),
+                "ttfb_ms": round(ttfb * 1000, 1) if ttfb is not None else None,
+                "bytes": size,
+                "retry": retries,
+                "error": error
+            })
+
+    def record_parse(self, ms: float):
+        """
+        记录一次页面解析
+        :param ms: 解析耗时（毫秒）
+        """
+        with self._lock:
+            self.parse_ms += ms
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        汇总站点耗时
+        :return: 站点统计
+        """
+        total_ms = (time.perf_counter() - self.started) * 1000
+        phases: Dict[str, float] = {}
+        for request in self.requests:
+            phases[request["url_class"]] = phases.get(request["url_class"], 0) + request["ms"]
+        http_ms = sum(phases.values())
+        wait_ms = self.wait_seconds * 1000
+        if wait_ms:
+            phases[PHASE_THROTTLE] = wait_ms
+        if self.parse_ms:
+            phases[PHASE_PARSE] = self.parse_ms
+        return {
+            "site_name": self.site_name,
+            "total_ms": round(total_ms, 1),
+            "http_ms": round(http_ms, 1),
+            "requests": len(self.requests),
+            "bytes": sum(request["bytes"] for request in self.requests),
+            "errors": sum(1 for request in self.requests if request["error"] or (request["status"] or 0) >= 400),
+            "retries": sum(1 for request in self.requests if request["retry"]),
+            "phases": {phase: round(ms, 1) for phase, ms in phases.items()},
+            "request_log": self.requests
+        }
+
+
+def current_site_metrics() -> Optional[SiteMetrics]:
+    """
+    获取当前线程正在记录的站点统计
+    """
+    return getattr(_local, "site", None)
+
+
+def record_parse(ms: float):
+    """
+    将页面解析耗时计入当前线程正在记录的站点统计
+    :param ms: 解析耗时（毫秒）
+    """
+    metrics = current_site_metrics()
+    if metrics is not None:
+        metrics.record_parse(ms)
+
+
+def bind_site_metrics(func: Callable) -> Callable:
+    """
+    绑定当前线程正在记录的站点统计，使函数在其他线程中发出的请求也计入该站点
+    :param func: 要在其他线程中执行的函数
+    :return: 包装后的函数，当前未在记录时原样返回
+    """
+    metrics = current_site_metrics()
+    if metrics is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        _local.site = metrics
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.site = None
+
+    return wrapper
+
+
+class MetricsRecorder:
+    """
+    刷新性能记录器，保存最近MAX_RUNS次刷新
+    """
+    MAX_RUNS = 20
+
+    def __init__(self, max_runs: int = MAX_RUNS):
+        self._lock = threading.Lock()
+        self._runs: deque = deque(maxlen=max_runs)
+        self._current: Optional[Dict[str, Any]] = None
+
+    def start_run(self, forced: bool) -> Dict[str, Any]:
+        """
+        开始记录一次刷新
+        :param forced: 是否为手动刷新
+        :return: 刷新记录
+        """
+        run = {"started": int(time.time()), "forced": forced, "total_ms": 0, "sites": [],
+               "_perf": time.perf_counter()}
+        with self._lock:
+            self._current = run
+        return run
+
+    def finish_run(self, run: Dict[str, Any]):
+        """
+        结束记录一次刷新并放入环形缓冲区
+        :param run: 刷新记录
+        """
+        run["total_ms"] = round((time.perf_counter() - run.pop("_perf")) * 1000, 1)
+        with self._lock:
+            if self._current is run:
+                self._current = None
+            self._runs.append(run)
+
+    @contextmanager
+    def site(self, site_name: str) -> Iterator[SiteMetrics]:
+        """
+        在当前线程记录一个站点的抓取，结束后计入当前刷新
+        :param site_name: 站点名称
+        """
+        metrics = SiteMetrics(site_name)
+        _local.site = metrics
+        try:
+            yield metrics
+        finally:
+            _local.site = None
+            with self._lock:
+                if self._current is not None:
+                    self._current["sites"].append(metrics.summary())
+
+    def get_runs(self, limit: int = 5, with_requests: bool = False) -> List[Dict[str, Any]]:
+        """
+        获取最近的刷新记录
+        :param limit: 返回数量
+        :param with_requests: 是否包含逐个请求的记录
+        :return: 由新到旧的刷新记录
+        """
+        with self._lock:
+            runs = list(self._runs)[::-1][:max(0, limit)]
+        return [{**run, "sites": [site if with_requests else {k: v for k, v in site.items() if k != "request_log"}
+                                  for site in run["sites"]]} for run in runs]
+
+    def get_slowest(self, limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        汇总缓冲区内所有刷新，获取最慢的站点和阶段
+        :param limit: 返回数量
+        :return: {"sites": 按平均耗时排序的站点, "phases": 按累计耗时排序的阶段}
+        """
+        sites: Dict[str, Dict[str, Any]] = {}
+        phases: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            runs = list(self._runs)
+        for run in runs:
+            for site in run["sites"]:
+                item = sites.setdefault(site["site_name"], {"site_name": site["site_name"], "runs": 0,
+                                                            "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+                item["runs"] += 1
+                item["total_ms"] += site["total_ms"]
+                item["max_ms"] = max(item["max_ms"], site["total_ms"])
+                item["errors"] += site["errors"]
+                for phase, ms in site["phases"].items():
+                    phase_item = phases.setdefault(phase, {"phase": phase, "name": PHASE_NAMES.get(phase, phase),
+                                                           "total_ms": 0.0, "max_ms": 0.0, "count": 0})
+                    phase_item["total_ms"] += ms
+                    phase_item["max_ms"] = max(phase_item["max_ms"], ms)
+                    phase_item["count"] += 1
+        for item in sites.values():
+            item["avg_ms"] = round(item["total_ms"] / item["runs"], 1)
+            item["total_ms"] = round(item["total_ms"], 1)
+        for item in phases.values():
+            item["avg_ms"] = round(item["total_ms"] / item["count"], 1)
+            item["total_ms"] = round(item["total_ms"], 1)
+        return {
+            "sites": sorted(sites.values(), key=lambda x: x["avg_ms"], reverse=True)[:limit],
+            "phases": sorted(phases.values(), key=lambda x: x["total_ms"], reverse=True)[:limit]
+        }
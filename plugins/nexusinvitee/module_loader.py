@@ -2,67 +2,156 @@
 模块加载器模块
 """
 import os
+import sys
 import importlib
 import inspect
-from typing import List, Type, Dict, Any
+import threading
+from typing import List, Type, Dict, Optional
 
 from app.log import logger
 from plugins.nexusinvitee.sites import _ISiteHandler
 
 
-class ModuleLoader:
+class HandlerRegistry:
     """
-    模块加载器类
+    站点处理器注册表
+
+    插件初始化时加载一次，按site_schema建立索引，站点URL的匹配结果按URL缓存，
+    专用处理器优先匹配，通用NexusPHP处理器兜底；仅当处理器文件修改时间变化时才重新加载
     """
-    
-    @staticmethod
-    def load_site_handlers() -> List[Type[_ISiteHandler]]:
+    # 通用处理器标识，无专用处理器匹配时使用
+    DEFAULT_SCHEMA = "nexusphp"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sites_dir = os.path.join(os.path.dirname(__file__), "sites")
+        # 匹配顺序：专用处理器在前，通用处理器在后
+        self._handlers: List[Type[_ISiteHandler]] = []
+        self._by_schema: Dict[str, Type[_ISiteHandler]] = {}
+        # 站点URL -> 处理器类 的匹配缓存
+        self._by_url: Dict[str, Optional[Type[_ISiteHandler]]] = {}
+        # 处理器文件 -> 修改时间
+        self._mtimes: Dict[str, float] = {}
+
+    @property
+    def handlers(self) -> List[Type[_ISiteHandler]]:
+        """
+        已注册的处理器类列表
+        """
+        return list(self._handlers)
+
+    def _scan_mtimes(self) -> Dict[str, float]:
         """
-        加载所有站点处理器类
-        :return: 站点处理器类列表
+        获取处理器目录下所有模块文件的修改时间
         """
-        handlers = []
-        sites_dir = os.path.join(os.path.dirname(__file__), "sites")
-        
-        if not os.path.exists(sites_dir):
+        mtimes = {}
+        try:
+            with os.scandir(self._sites_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(".py"):
+                        mtimes[entry.name] = entry.stat().st_mtime
+        except FileNotFoundError:
             logger.error("站点处理器目录不存在")
-            return []
-        
-        # 遍历sites目录下的所有py文件
-        for filename in os.listdir(sites_dir):
-            if not filename.endswith(".py") or filename == "__init__.py":
-                continue
-            
-            module_name = filename[:-3]  # 去掉.py后缀
-            
+        return mtimes
+
+    @staticmethod
+    def _import(module_name: str, reload: bool):
+        """
+        导入模块，需要时重新加载
+        """
+        module = sys.modules.get(module_name)
+        if module is not None and reload:
+            return importlib.reload(module)
+        return importlib.import_module(module_name)
+
+    def load(self, changed: Optional[set] = None) -> int:
+        """
+        加载站点处理器并重建索引
+        :param changed: 需要重新加载的模块文件名，为None时只导入尚未加载的模块
+        :return: 处理器数量
+        """
+        with self._lock:
+            mtimes = self._scan_mtimes()
+            changed = changed or set()
+            # 基类变化后所有处理器都需要重新加载，保证继承关系一致
+            reload_all = "__init__.py" in changed
+            if reload_all:
+                self._import("plugins.nexusinvitee.sites", reload=True)
+
+            handlers = []
+            for filename in sorted(mtimes):
+                if filename == "__init__.py":
+                    continue
+                module_name = filename[:-3]
+                try:
+                    module = self._import(f"plugins.nexusinvitee.sites.{module_name}",
+                                          reload=reload_all or filename in changed)
+                    base = sys.modules["plugins.nexusinvitee.sites"]._ISiteHandler
+                    for name, obj in inspect.getmembers(module, inspect.isclass):
+                        if issubclass(obj, base) and obj is not base and obj.__module__ == module.__name__:
+                            handlers.append(obj)
+                except Exception as e:
+                    logger.error(f"加载站点处理器模块 {module_name} 失败: {str(e)}")
+
+            # 通用处理器放在最后，避免抢先匹配专用站点
+            handlers.sort(key=lambda handler: handler.site_schema == self.DEFAULT_SCHEMA)
+            self._handlers = handlers
+            self._by_schema = {handler.site_schema: handler for handler in handlers if handler.site_schema}
+            self._by_url = {}
+            self._mtimes = mtimes
+            logger.info(f"已注册站点处理器: {', '.join(handler.__name__ for handler in handlers)}")
+            return len(handlers)
+
+    def refresh_if_changed(self) -> bool:
+        """
+        处理器文件有变化时重新加载
+        :return: 是否重新加载
+        """
+        mtimes = self._scan_mtimes()
+        if mtimes == self._mtimes and self._handlers:
+            return False
+        changed = {name for name, mtime in mtimes.items() if self._mtimes.get(name) != mtime}
+        logger.info(f"站点处理器文件有变化，重新加载: {', '.join(sorted(changed)) or '已删除模块'}")
+        self.load(changed)
+        return True
+
+    def get_by_schema(self, site_schema: str) -> Optional[Type[_ISiteHandler]]:
+        """
+        按站点类型标识获取处理器类
+        :param site_schema: 站点类型标识
+        :return: 处理器类
+        """
+        return self._by_schema.get(site_schema)
+
+    def get_handler_class(self, site_url: str) -> Optional[Type[_ISiteHandler]]:
+        """
+        获取匹配站点的处理器类，结果按URL缓存
+        :param site_url: 站点URL
+        :return: 处理器类，未匹配时返回通用处理器
+        """
+        key = (site_url or "").strip().lower()
+        if key in self._by_url:
+            return self._by_url[key]
+        handler_class = None
+        for handler in self._handlers:
             try:
-                # 动态导入模块
-                module = importlib.import_module(f"plugins.nexusinvitee.sites.{module_name}")
-                
-                # 查找模块中继承了_ISiteHandler的类
-                for name, obj in inspect.getmembers(module):
-                    if (inspect.isclass(obj) and 
-                        issubclass(obj, _ISiteHandler) and 
-                        obj != _ISiteHandler):
-                        handlers.append(obj)
-                        logger.info(f"加载站点处理器: {obj.__name__}")
-            
+                if handler.match(site_url):
+                    handler_class = handler
+                    break
             except Exception as e:
-                logger.error(f"加载站点处理器模块 {module_name} 失败: {str(e)}")
-        
-        return handlers
-    
-    @staticmethod
-    def get_handler_for_site(site_url: str, handlers: List[Type[_ISiteHandler]]) -> _ISiteHandler:
+                logger.error(f"处理器 {handler.__name__} 匹配站点 {site_url} 失败: {str(e)}")
+        if handler_class is None:
+            # 没有专用处理器的站点（如HDChina）按通用NexusPHP页面结构解析
+            handler_class = self._by_schema.get(self.DEFAULT_SCHEMA)
+            logger.info(f"站点 {site_url} 未找到专用处理器，使用默认NexusPHP处理器")
+        self._by_url[key] = handler_class
+        return handler_class
+
+    def get_handler(self, site_url: str) -> Optional[_ISiteHandler]:
         """
         获取匹配站点的处理器实例
         :param site_url: 站点URL
-        :param handlers: 处理器类列表
         :return: 处理器实例
         """
-        for handler_class in handlers:
-            if handler_class.match(site_url):
-                return handler_class()
-        
-        # 如果没有找到匹配的处理器，返回None
-        return None 
\ No newline at end of file
+        handler_class = self.get_handler_class(site_url)
+        return handler_class() if handler_class else None
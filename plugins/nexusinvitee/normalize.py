@@ -0,0 +1,251 @@
+"""
+大小/分享率标准化模块
+
+解析结果按输入字符串缓存，同一页面、同一站点中重复出现的取值只解析一次
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.log import logger
+
+# 代表无限分享率的数值
+INFINITE_RATIO = 1e20
+# 表示无限分享率的文本（小写）
+INFINITE_TEXTS = frozenset(['∞', 'inf.', 'inf', 'infinite', '无限'])
+# 表示0的大小文本（小写）
+ZERO_SIZES = frozenset(['0', '', '0b', '0.00 kb', '0.00 b', '0.0 kb', '0kb', '0.00', '0.0'])
+
+SIZE_UNITS = {
+    'B': 1,
+    'KB': 1024,
+    'KIB': 1024,
+    'MB': 1024 ** 2,
+    'MIB': 1024 ** 2,
+    'GB': 1024 ** 3,
+    'GIB': 1024 ** 3,
+    'TB': 1024 ** 4,
+    'TIB': 1024 ** 4,
+    'PB': 1024 ** 5,
+    'PIB': 1024 ** 5,
+    'EB': 1024 ** 6,
+    'EIB': 1024 ** 6,
+    'ZB': 1024 ** 7,
+    'ZIB': 1024 ** 7,
+    'YB': 1024 ** 8,
+    'YIB': 1024 ** 8
+}
+
+# 健康状态对应的默认分享率标签
+HEALTH_LABELS = {
+    "excellent": ["无限", "green"],
+    "good": ["良好", "green"],
+    "warning": ["较低", "orange"],
+    "danger": ["危险", "red"],
+    "neutral": ["无数据", "grey"],
+    "unknown": ["未知", "grey"],
+}
+
+_size_pattern = re.compile(r'([\d.]+)\s*([KMGTPEZY]?i?B)', re.IGNORECASE)
+# 两侧都是数字的逗号视为千分位分隔符
+_thousands_pattern = re.compile(r'(?<=\d),(?=\d)')
+
+
+def size_to_bytes(size_str: Any) -> float:
+    """
+    将大小字符串转换为字节数
+    :param size_str: 大小字符串，数值视为字节数
+    :return: 字节数，无法解析或为其他类型（如None）时返回0
+    """
+    if isinstance(size_str, str):
+        return _parse_size(size_str)
+    if isinstance(size_str, (int, float)):
+        return float(size_str)
+    return 0
+
+
+@lru_cache(maxsize=4096)
+def _parse_size(size_str: str) -> float:
+    """
+    解析大小字符串，结果按字符串缓存
+    """
+    if not size_str or size_str.strip() == '':
+        logger.debug("空的大小字符串")
+        return 0
+
+    # 处理特殊情况
+    if size_str.lower() in ('inf.', 'inf') or size_str == '∞':
+        logger.debug(f"识别到无限大值: {size_str}")
+        return INFINITE_RATIO
+
+    # 标准化字符串，替换逗号为点
+    size_str = size_str.replace(',', '.')
+    matches = _size_pattern.match(size_str)
+    if not matches:
+        # 尝试匹配仅有数字的情况
+        try:
+            return float(size_str)
+        except ValueError:
+            logger.debug(f"无法解析大小字符串: {size_str}")
+            return 0
+
+    size_num, unit = matches.groups()
+    try:
+        size_value = float(size_num)
+    except ValueError:
+        logger.debug(f"无法转换大小值为浮点数: {size_num}")
+        return 0
+
+    unit = unit.upper()
+    if unit not in SIZE_UNITS:
+        logger.debug(f"未知的大小单位: {unit}")
+        return size_value
+    return size_value * SIZE_UNITS[unit]
+
+
+def sizes_to_bytes(size_strs: Iterable[Any]) -> List[float]:
+    """
+    批量将一列大小字符串转换为字节数
+    :param size_strs: 大小字符串列表
+    :return: 字节数列表
+    """
+    parsed: Dict[Any, float] = {}
+    result = []
+    for size_str in size_strs:
+        if not isinstance(size_str, str):
+            result.append(size_to_bytes(size_str))
+            continue
+        value = parsed.get(size_str)
+        if value is None:
+            value = parsed[size_str] = size_to_bytes(size_str)
+        result.append(value)
+    return result
+
+
+@lru_cache(maxsize=4096)
+def parse_ratio(ratio_text: str) -> float:
+    """
+    解析分享率文本，正确处理千分位逗号
+    :param ratio_text: 分享率文本
+    :return: 分享率，无限时返回INFINITE_RATIO
+    :raises ValueError: 无法解析时
+    """
+    if ratio_text.lower() in INFINITE_TEXTS:
+        return INFINITE_RATIO
+    # 先移除千分位逗号，剩余的逗号视为小数点
+    return float(_thousands_pattern.sub('', ratio_text).replace(',', '.'))
+
+
+def ratio_text(uploaded: str, downloaded: str) -> str:
+    """
+    根据上传下载量计算分享率文本
+    :param uploaded: 上传量
+    :param downloaded: 下载量
+    :return: 分享率字符串
+    """
+    up_bytes, down_bytes = sizes_to_bytes((uploaded, downloaded))
+    if down_bytes == 0:
+        return "∞" if up_bytes > 0 else "0"
+    return f"{up_bytes / down_bytes:.3f}"
+
+
+def format_size(size_bytes: float) -> str:
+    """
+    格式化文件大小
+    :param size_bytes: 字节数
+    :return: 格式化后的大小字符串
+    """
+    if not isinstance(size_bytes, (int, float)):
+        return str(size_bytes)
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024.0
+    return f"{size_bytes:.2f} PB"
+
+
+def health_from_ratio(ratio: float) -> Tuple[str, List[str]]:
+    """
+    根据分享率数值获取健康状态和标签
+    """
+    if ratio >= 4.0:
+        return "excellent", ["极好", "text-success"]
+    elif ratio >= 2.0:
+        return "good", ["良好", "text-success"]
+    elif ratio >= 1.0:
+        return "good", ["正常", "text-success"]
+    elif ratio > 0:
+        return ("warning", ["较低", "text-warning"]) if ratio >= 0.4 else ("danger", ["危险", "text-error"])
+    return "neutral", ["无数据", "text-grey"]
+
+
+def ratio_health(ratio_str: Optional[str], uploaded: Any, downloaded: Any) -> Tuple[str, List[str]]:
+    """
+    根据分享率文本或上传下载量计算分享率健康度
+    :param ratio_str: 分享率文本
+    :param uploaded: 上传量（字符串或数值）
+    :param downloaded: 下载量（字符串或数值）
+    :return: 健康状态和标签
+    """
+    # 优先使用上传下载直接计算分享率（如果都是数值类型）
+    numeric = isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float))
+    if numeric and downloaded > 0:
+        return health_from_ratio(uploaded / downloaded)
+
+    # 检查是否是无数据情况（上传下载都是0）
+    if isinstance(uploaded, str) and isinstance(downloaded, str):
+        is_no_data = uploaded.lower() in ('0', '', '0.0', '0b') and downloaded.lower() in ('0', '', '0.0', '0b')
+    else:
+        is_no_data = numeric and uploaded == 0 and downloaded == 0
+    if is_no_data:
+        return "neutral", ["无数据", "text-grey"]
+
+    if not ratio_str:
+        return "neutral", ["无效", "text-grey"]
+    if ratio_str.lower() in INFINITE_TEXTS:
+        return "excellent", ["分享率无限", "text-success"]
+    try:
+        return health_from_ratio(parse_ratio(ratio_str))
+    except ValueError:
+        logger.debug(f"分享率转换错误: {ratio_str}")
+        return "neutral", ["无效", "text-grey"]
+
+
+def classify_invitees(invitees: List[Dict[str, Any]], zero_sizes: frozenset = ZERO_SIZES,
+                      missing_size: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    一次遍历为整个后宫列表标记无数据状态、分享率健康状态与标签
+    :param invitees: 后宫成员列表，需已解析ratio/ratio_value
+    :param zero_sizes: 视为0的大小文本（小写）
+    :param missing_size: 缺少上传/下载字段时使用的默认值，None表示不判断为无数据
+    :return: 原列表
+    """
+    for invitee in invitees:
+        uploaded = invitee.get("uploaded", missing_size)
+        downloaded = invitee.get("downloaded", missing_size)
+        if isinstance(uploaded, str) and isinstance(downloaded, str):
+            is_no_data = uploaded.lower() in zero_sizes and downloaded.lower() in zero_sizes
+        elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
+            is_no_data = uploaded == 0 and downloaded == 0
+        else:
+            is_no_data = False
+        if is_no_data:
+            invitee["data_status"] = "无数据"
+
+        ratio_value = invitee.get("ratio_value")
+        if is_no_data:
+            health = "neutral"
+        elif ratio_value is None:
+            health = "excellent" if invitee.get("ratio") == "∞" else "unknown"
+        elif ratio_value >= INFINITE_RATIO:
+            health = "excellent"
+        elif ratio_value >= 1.0:
+            health = "good"
+        elif ratio_value >= 0.5:
+            health = "warning"
+        else:
+            health = "danger"
+        invitee["ratio_health"] = health
+        if is_no_data or "ratio_label" not in invitee:
+            invitee["ratio_label"] = list(HEALTH_LABELS[health])
+    return invitees
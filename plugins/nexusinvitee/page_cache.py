@@ -0,0 +1,197 @@
+"""
+页面缓存模块
+
+记录每个抓取页面的内容指纹、ETag/Last-Modified及解析结果：
+支持条件请求的站点返回304时直接复用解析结果；
+未返回304但页面主体内容指纹未变化时同样跳过解析
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from app.log import logger
+
+# NexusPHP页面主体内容的起止标记，顶部用户信息栏与页脚（页面生成耗时）每次访问都会变化，不计入指纹
+_CONTENT_START = 'class="mainouter"'
+_CONTENT_END = 'id="footer"'
+
+
+def content_fingerprint(html_content: str) -> str:
+    """
+    计算页面主体内容指纹
+    :param html_content: 页面HTML
+    :return: 指纹
+    """
+    html_content = html_content or ""
+    start = html_content.find(_CONTENT_START)
+    start = start if start >= 0 else 0
+    end = html_content.find(_CONTENT_END, start)
+    end = end if end >= 0 else len(html_content)
+    return hashlib.sha1(html_content[start:end].encode("utf-8", "ignore")).hexdigest()
+
+
+class PageCache:
+    """
+    页面解析结果缓存
+    """
+    # 超过该时长未访问的页面缓存被清理（秒）
+    RETENTION = 30 * 86400
+
+    def __init__(self, data_path: str, version: str = ""):
+        """
+        初始化页面缓存
+        :param data_path: 数据目录路径
+        :param version: 解析器版本，版本变化后旧的解析结果不再复用
+        """
+        self.db_file = os.path.join(data_path, "page_cache.db")
+        self.version = version
+        self._lock = threading.Lock()
+        self._stats = {"not_modified": 0, "unchanged": 0, "parsed": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            os.makedirs(data_path, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS page_cache ("
+                    "url TEXT PRIMARY KEY, "
+                    "version TEXT NOT NULL, "
+                    "content_hash TEXT NOT NULL, "
+                    "etag TEXT, "
+                    "last_modified TEXT, "
+                    "parsed TEXT NOT NULL, "
+                    "fetched_at INTEGER NOT NULL, "
+                    "checked_at INTEGER NOT NULL)"
+                )
+                self._conn.execute("DELETE FROM page_cache WHERE checked_at < ?",
+                                   (int(time.time()) - self.RETENTION,))
+        except Exception as e:
+            logger.error(f"初始化页面缓存数据库失败: {str(e)}")
+            self._conn = None
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        获取页面缓存
+        :param url: 页面地址
+        :return: 缓存记录，不存在或解析器版本不一致时返回None
+        """
+        if not self._conn:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT content_hash, etag, last_modified, parsed, fetched_at FROM page_cache "
+                    "WHERE url = ? AND version = ?", (url, self.version)).fetchone()
+        except Exception as e:
+            logger.error(f"读取页面缓存失败: {str(e)}")
+            return None
+        if not row:
+            return None
+        return {"content_hash": row[0], "etag": row[1], "last_modified": row[2],
+                "parsed": json.loads(row[3]), "fetched_at": row[4]}
+
+    def get_fresh(self, url: str, max_age: int) -> Optional[Any]:
+        """
+        获取有效期内的解析结果
+        :param url: 页面地址
+        :param max_age: 有效期（秒），从上次重新解析算起
+        :return: 解析结果，过期或不存在时返回None
+        """
+        entry = self.get(url)
+        if entry and time.time() - entry["fetched_at"] < max_age:
+            return entry["parsed"]
+        return None
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """
+        获取条件请求头
+        :param url: 页面地址
+        :return: If-None-Match/If-Modified-Since，没有缓存时为空
+        """
+        entry = self.get(url)
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def lookup(self, url: str, response: requests.Response) -> Optional[Any]:
+        """
+        根据响应判断页面是否未变化，未变化时返回缓存的解析结果
+        :param url: 页面地址
+        :param response: 页面响应
+        :return: 缓存的解析结果，需要重新解析时返回None
+        """
+        entry = self.get(url)
+        if not entry:
+            return None
+        if response.status_code == 304:
+            self._touch(url)
+            self._count("not_modified")
+            return entry["parsed"]
+        if response.status_code == 200 and content_fingerprint(response.text) == entry["content_hash"]:
+            self._touch(url, response)
+            self._count("unchanged")
+            return entry["parsed"]
+        return None
+
+    def store(self, url: str, response: requests.Response, parsed: Any):
+        """
+        保存页面解析结果
+        :param url: 页面地址
+        :param response: 页面响应
+        :param parsed: 解析结果，需可序列化为JSON
+        """
+        self._count("parsed")
+        if not self._conn or response.status_code != 200:
+            return
+        now = int(time.time())
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO page_cache "
+                    "(url, version, content_hash, etag, last_modified, parsed, fetched_at, checked_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, self.version, content_fingerprint(response.text), response.headers.get("ETag"),
+                     response.headers.get("Last-Modified"), json.dumps(parsed, ensure_ascii=False), now, now))
+        except Exception as e:
+            logger.error(f"保存页面缓存失败: {str(e)}")
+
+    def _touch(self, url: str, response: requests.Response = None):
+        """
+        更新页面最近校验时间及新的ETag/Last-Modified
+        """
+        if not self._conn:
+            return
+        try:
+            with self._lock, self._conn:
+                if response is not None:
+                    self._conn.execute(
+                        "UPDATE page_cache SET checked_at = ?, etag = ?, last_modified = ? WHERE url = ?",
+                        (int(time.time()), response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                         url))
+                else:
+                    self._conn.execute("UPDATE page_cache SET checked_at = ? WHERE url = ?",
+                                       (int(time.time()), url))
+        except Exception as e:
+            logger.error(f"更新页面缓存失败: {str(e)}")
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def pop_stats(self) -> Dict[str, int]:
+        """
+        取出并清零缓存命中统计
+        :return: {"not_modified": 304次数, "unchanged": 指纹未变次数, "parsed": 重新解析次数}
+        """
+        with self._lock:
+            stats, self._stats = self._stats, dict.fromkeys(self._stats, 0)
+        return stats
@@ -0,0 +1,300 @@
+"""
+后宫列表翻页模块
+"""
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import requests
+
+from app.log import logger
+
+from plugins.nexusinvitee.metrics import bind_site_metrics, record_parse
+from plugins.nexusinvitee.page_cache import PageCache
+
+
+class InviteePaginator:
+    """
+    后宫列表并发翻页器
+
+    从首页的分页链接推断总页数，按小窗口并发预取后续页面，
+    按页序解析合并，保留"空页/与上一页重复/不足一页"三种停止条件；
+    传入页面缓存时使用条件请求，页面未变化则复用上次的解析结果；
+    传入上次保存的成员列表时按页比对，连续多页与保存的列表一致即停止翻页，其余页沿用保存的成员；
+    按注册时间正序排列的站点新成员出现在末页，分页栏显示的成员总数与保存的不一致时不提前停止
+    """
+    # 每页后宫成员数量，不足则视为最后一页
+    PAGE_SIZE = 50
+    # 最大翻页数，防止无限循环
+    MAX_PAGES = 100
+    # 默认预取窗口
+    WINDOW = 3
+    # 增量翻页时连续多少页与保存的列表一致即停止
+    MATCH_PAGES = 2
+
+    # 分页链接中的页码，NexusPHP的分页链接通常是以"?"开头的相对地址
+    _page_link_pattern = re.compile(r'href=["\'](?:[^"\']*invite\.php)?\?[^"\']*?page=(\d+)', re.IGNORECASE)
+    # 分页栏中各页的成员序号范围，如"<b>101&nbsp;-&nbsp;123</b>"，最大的结束序号即成员总数
+    _page_range_pattern = re.compile(r'<b>\s*(\d+)(?:\s|&nbsp;)+-(?:\s|&nbsp;)+(\d+)\s*</b>', re.IGNORECASE)
+
+    def __init__(self, session: requests.Session, site_name: str,
+                 page_url: Callable[[int], str],
+                 parse_page: Callable[[str], List[Dict[str, Any]]],
+                 window: int = WINDOW,
+                 page_size: int = PAGE_SIZE,
+                 max_pages: int = MAX_PAGES,
+                 next_link_texts: Optional[Sequence[str]] = None,
+                 page_cache: Optional[PageCache] = None,
+                 known_invitees: Optional[List[Dict[str, Any]]] = None,
+                 match_pages: int = MATCH_PAGES,
+                 parse_submit: Optional[Callable[[str], Future]] = None):
+        """
+        初始化翻页器
+        :param session: 已配置好的请求会话
+        :param site_name: 站点名称
+        :param page_url: 根据页码（首页为0）生成页面URL
+        :param parse_page: 解析页面HTML，返回后宫成员列表
+        :param window: 并发预取窗口大小，同一主机的并发请求数另受限流器（HostThrottle）限制
+        :param page_size: 每页成员数量
+        :param max_pages: 最大页数
+        :param next_link_texts: 如站点需要"下一页"链接才继续翻页，传入链接文字
+        :param page_cache: 页面缓存
+        :param known_invitees: 上次保存的后宫成员列表（按页序），传入时增量翻页
+        :param match_pages: 增量翻页时连续一致多少页即停止
+        :param parse_submit: 提交页面到解析池的函数（见ParsePool.bind），传入时同一批页面并行解析
+        """
+        self.session = session
+        self.site_name = site_name
+        self.page_url = page_url
+        self.parse_page = parse_page
+        self.window = max(1, int(window or 1))
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.page_cache = page_cache
+        self.known_invitees = known_invitees or []
+        self.match_pages = max(1, int(match_pages or 1))
+        self.parse_submit = parse_submit
+        # 是否因与保存的列表一致而提前停止
+        self.stopped_early = False
+        # 提前停止时沿用的已保存成员数量，位于返回列表末尾，不是本次抓取的数据
+        self.reused_count = 0
+        self._next_link_pattern = None
+        if next_link_texts:
+            texts = "|".join(re.escape(text) for text in next_link_texts)
+            self._next_link_pattern = re.compile(rf'<a\b[^>]*>(?:(?!</a>).){{0,200}}?(?:{texts})', re.IGNORECASE | re.S)
+        # 每页的抓取与解析耗时
+        self.page_stats: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def invitee_ids(invitees: List[Dict[str, Any]]) -> set:
+        """
+        获取一页后宫成员的标识集合，用于重复页检测
+        """
+        return {invitee.get('profile_url') or invitee.get('username') for invitee in invitees}
+
+    def discover_last_page(self, html_content: str) -> Optional[int]:
+        """
+        从页面中的分页链接推断最后一页页码
+        :param html_content: 页面HTML
+        :return: 最后一页页码（首页为0），无法推断时返回None
+        """
+        pages = [int(page) for page in self._page_link_pattern.findall(html_content or "")]
+        if not pages:
+            return None
+        return min(max(pages), self.max_pages - 1)
+
+    def discover_total(self, html_content: str) -> Optional[int]:
+        """
+        从分页栏的成员序号范围推断成员总数
+        :param html_content: 页面HTML
+        :return: 成员总数，分页栏中没有序号范围时返回None
+        """
+        ends = [int(end) for start, end in self._page_range_pattern.findall(html_content or "")
+                if int(start) <= int(end)]
+        return max(ends) if ends else None
+
+    def _known_pages(self, last_page: Optional[int], total: Optional[int] = None) -> List[set]:
+        """
+        将保存的成员列表按页切分为标识集合，页数与分页链接推断的不一致时（成员增减跨页）
+        或成员总数与分页栏显示的不一致时（新成员可能位于未比对的末页）返回空列表，执行完整翻页
+        """
+        if not self.known_invitees:
+            return []
+        known_count = (len(self.known_invitees) + self.page_size - 1) // self.page_size
+        if last_page is not None and last_page + 1 != known_count:
+            logger.info(f"站点 {self.site_name} 页数由 {known_count} 变为 {last_page + 1}，执行完整翻页")
+            return []
+        if total is not None and total != len(self.known_invitees):
+            logger.info(f"站点 {self.site_name} 成员数由 {len(self.known_invitees)} 变为 {total}，执行完整翻页")
+            return []
+        return [self.invitee_ids(self.known_invitees[start:start + self.page_size])
+                for start in range(0, len(self.known_invitees), self.page_size)]
+
+    def has_next_link(self, html_content: str) -> bool:
+        """
+        页面是否存在"下一页"链接，未配置链接文字时总是返回True
+        """
+        if not self._next_link_pattern:
+            return True
+        return bool(self._next_link_pattern.search(html_content or ""))
+
+    def _fetch(self, page: int) -> Dict[str, Any]:
+        """
+        抓取单个页面
+        """
+        url = self.page_url(page)
+        start = time.monotonic()
+        try:
+            headers = self.page_cache.request_headers(url) if self.page_cache else None
+            response = self.session.get(url, headers=headers, timeout=(10, 30))
+            response.raise_for_status()
+            cached = self.page_cache.lookup(url, response) if self.page_cache else None
+            return {"page": page, "url": url, "html": response.text, "response": response, "cached": cached,
+                    "fetch_ms": int((time.monotonic() - start) * 1000), "error": None}
+        except Exception as e:
+            return {"page": page, "url": url, "html": "", "response": None, "cached": None,
+                    "fetch_ms": int((time.monotonic() - start) * 1000), "error": e}
+
+    def collect(self, first_html: str, first_invitees: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        获取首页之后所有页面的后宫成员
+        :param first_html: 首页HTML
+        :param first_invitees: 首页解析出的后宫成员
+        :return: 后续页面的后宫成员（不含首页）
+        """
+        if len(first_invitees) < self.page_size:
+            logger.info(f"站点 {self.site_name} 首页后宫成员数量少于{self.page_size}人({len(first_invitees)}人)，不再查找后续页面")
+            return []
+        if not self.has_next_link(first_html):
+            logger.info(f"站点 {self.site_name} 没有找到下一页链接，停止获取")
+            return []
+
+        # 推断出的页数只用于确定预取范围，超出后仍按停止条件继续试探，避免推断偏小时漏页
+        last_page = self.discover_last_page(first_html)
+        known_end = last_page + 1 if last_page is not None else 0
+        if last_page:
+            logger.debug(f"站点 {self.site_name} 从分页链接推断共 {known_end} 页")
+
+        collected = []
+        previous_ids = self.invitee_ids(first_invitees)
+        known_pages = self._known_pages(last_page, self.discover_total(first_html))
+        # 连续与保存的列表一致的页数
+        matched = 1 if known_pages and previous_ids == known_pages[0] else 0
+        page = 1
+        stopped = False
+        if known_pages and matched >= self.match_pages:
+            logger.info(f"站点 {self.site_name} 首页与已保存的列表一致，停止翻页")
+            rest = self.known_invitees[self.page_size:]
+            self.stopped_early = True
+            self.reused_count = len(rest)
+            return rest
+        fetch = bind_site_metrics(self._fetch)
+        with ThreadPoolExecutor(max_workers=self.window, thread_name_prefix="nexusinvitee-page") as executor:
+            while page < self.max_pages and not stopped:
+                batch_end = known_end if page < known_end else self.max_pages
+                # 增量翻页连续一致时只预取达到停止条件所需的页数，避免多抓；出现不一致后恢复完整预取窗口
+                window = min(self.window, self.match_pages - matched) if matched else self.window
+                batch = list(range(page, min(page + max(1, window), batch_end)))
+                fetched_pages = list(executor.map(fetch, batch))
+                parsing = self._submit_parse(fetched_pages)
+                for fetched in fetched_pages:
+                    current = fetched["page"]
+                    if fetched["error"] is not None:
+                        logger.warning(f"站点 {self.site_name} 获取第 {current + 1} 页数据失败: {str(fetched['error'])}")
+                        stopped = True
+                        break
+                    logger.debug(f"站点 {self.site_name} 正在解析第 {current + 1} 页后宫成员数据: {fetched['url']}")
+                    parse_start = time.monotonic()
+                    cached = fetched["cached"]
+                    if cached is not None:
+                        invitees, has_next = cached["invitees"], cached["has_next"]
+                    else:
+                        invitees = self._parse_result(fetched, parsing.get(current)) or []
+                        has_next = self.has_next_link(fetched["html"])
+                        if self.page_cache:
+                            self.page_cache.store(fetched["url"], fetched["response"],
+                                                  {"invitees": invitees, "has_next": has_next})
+                    parse_ms = (time.monotonic() - parse_start) * 1000
+                    record_parse(parse_ms)
+                    self.page_stats.append({
+                        "page": current,
+                        "fetch_ms": fetched["fetch_ms"],
+                        "parse_ms": int(parse_ms),
+                        "count": len(invitees),
+                        "cached": cached is not None
+                    })
+
+                    if not invitees:
+                        logger.debug(f"站点 {self.site_name} 第 {current + 1} 页没有后宫成员数据，停止获取")
+                        stopped = True
+                        break
+                    current_ids = self.invitee_ids(invitees)
+                    if previous_ids and current_ids == previous_ids:
+                        logger.warning(f"站点 {self.site_name} 检测到第 {current + 1} 页内容与上一页重复，停止翻页")
+                        stopped = True
+                        break
+                    collected.extend(invitees)
+                    previous_ids = current_ids
+                    logger.debug(f"站点 {self.site_name} 第 {current + 1} 页解析到 {len(invitees)} 个后宫成员")
+
+                    if known_pages:
+                        matched = matched + 1 if current < len(known_pages) and current_ids == known_pages[current] else 0
+                        if matched >= self.match_pages:
+                            rest = self.known_invitees[(current + 1) * self.page_size:]
+                            logger.info(f"站点 {self.site_name} 连续 {matched} 页与已保存的列表一致，停止翻页，"
+                                        f"沿用已保存的 {len(rest)} 个后宫成员")
+                            collected.extend(rest)
+                            self.stopped_early = True
+                            self.reused_count = len(rest)
+                            stopped = True
+                            break
+
+                    if len(invitees) < self.page_size:
+                        logger.info(f"站点 {self.site_name} 第 {current + 1} 页后宫成员数量少于{self.page_size}人({len(invitees)}人)，停止获取")
+                        stopped = True
+                        break
+                    if not has_next:
+                        logger.info(f"站点 {self.site_name} 没有找到下一页链接，停止获取")
+                        stopped = True
+                        break
+                page += len(batch)
+
+        self._log_stats(len(collected))
+        return collected
+
+    def _submit_parse(self, fetched_pages: List[Dict[str, Any]]) -> Dict[int, Future]:
+        """
+        将一批抓取成功且未命中缓存的页面提交到解析池
+        :return: 页码 -> 解析结果
+        """
+        if not self.parse_submit:
+            return {}
+        return {fetched["page"]: self.parse_submit(fetched["html"]) for fetched in fetched_pages
+                if fetched["error"] is None and fetched["cached"] is None}
+
+    def _parse_result(self, fetched: Dict[str, Any], future: Optional[Future]) -> List[Dict[str, Any]]:
+        """
+        获取页面解析结果，解析池失败时在当前线程重新解析
+        """
+        if future is None:
+            return self.parse_page(fetched["html"])
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning(f"站点 {self.site_name} 第 {fetched['page'] + 1} 页多进程解析失败，改为在当前线程解析: {str(e)}")
+            return self.parse_page(fetched["html"])
+
+    def _log_stats(self, total: int):
+        """
+        输出翻页耗时统计
+        """
+        if not self.page_stats:
+            return
+        fetch_ms = sum(stat["fetch_ms"] for stat in self.page_stats)
+        parse_ms = sum(stat["parse_ms"] for stat in self.page_stats)
+        slowest = max(self.page_stats, key=lambda stat: stat["fetch_ms"] + stat["parse_ms"])
+        cached = sum(1 for stat in self.page_stats if stat["cached"])
+        logger.info(f"站点 {self.site_name} 翻页完成: 解析 {len(self.page_stats)} 页（复用缓存 {cached} 页），新增 {total} 人，"
+                    f"抓取耗时 {fetch_ms}ms，解析耗时 {parse_ms}ms，"
+                    f"最慢第 {slowest['page'] + 1} 页({slowest['fetch_ms']}ms/{slowest['parse_ms']}ms)")
@@ -0,0 +1,133 @@
+"""
+多进程页面解析模块
+
+后宫成员很多的站点翻页后需要解析大量页面，解析在请求线程中执行时受GIL限制只能串行。
+解析池把较大页面的HTML交给子进程解析，子进程只返回普通的后宫成员字典；
+小页面在当前线程解析，避免进程间传输的开销超过并行带来的收益。
+MoviePilot主进程中运行着调度器、Web服务等大量线程，fork时其他线程持有的锁会原样复制到子进程中导致死锁，
+因此子进程通过forkserver（Windows为spawn）创建，解析函数及站点处理类按模块名在子进程中重新导入
+"""
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from app.log import logger
+
+# 不使用fork：多线程进程中fork出的子进程可能因继承被占用的锁而死锁
+_context = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+class ParsePool:
+    """
+    后宫列表页面解析池
+    """
+    # 小于该长度的页面直接在当前线程解析
+    MIN_HTML_SIZE = 16 * 1024
+
+    def __init__(self, workers: int = 0, min_size: int = MIN_HTML_SIZE,
+                 initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        """
+        初始化解析池
+        :param workers: 解析进程数，0表示不启用
+        :param min_size: 交给子进程解析的最小页面长度
+        :param initializer: 子进程启动时调用的模块级函数，用于导入无法按模块名找到的解析函数
+        :param initargs: initializer的参数
+        """
+        self.workers = max(0, int(workers or 0))
+        self.min_size = min_size
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {"pool": 0, "thread": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def start(self):
+        """
+        启动解析进程，应在并发刷新线程启动前调用
+        """
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_context,
+                                                         initializer=self.initializer, initargs=self.initargs)
+            # 提交一个空任务使子进程立即创建
+            self._executor.submit(os.getpid).result(timeout=30)
+            logger.info(f"多进程解析已启动，进程数: {self.workers}")
+        except Exception as e:
+            logger.error(f"启动多进程解析失败，改为在当前线程解析: {str(e)}")
+            self.shutdown()
+            self.workers = 0
+
+    def submit(self, func: Callable, html_content: str, *args) -> Future:
+        """
+        提交页面解析
+        :param func: 模块级解析函数，调用方式为func(*args, html_content)，需可在子进程中按模块名导入
+        :param html_content: 页面HTML
+        :param args: 解析函数的其他参数，需可序列化
+        :return: 解析结果的Future
+        """
+        if self.enabled and self._executor is not None and len(html_content or "") >= self.min_size:
+            try:
+                future = self._executor.submit(func, *args, html_content)
+                self._count("pool")
+                return future
+            except Exception as e:
+                logger.error(f"提交多进程解析失败，改为在当前线程解析: {str(e)}")
+                self.workers = 0
+        future = Future()
+        try:
+            future.set_result(func(*args, html_content))
+        except Exception as e:
+            future.set_exception(e)
+        self._count("thread")
+        return future
+
+    def bind(self, func: Callable, *args) -> Callable[[str], Future]:
+        """
+        绑定解析函数及其参数
+        :return: 接收页面HTML、返回Future的函数
+        """
+        return functools.partial(self._submit_bound, func, args)
+
+    def _submit_bound(self, func: Callable, args: tuple, html_content: str) -> Future:
+        return self.submit(func, html_content, *args)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> dict:
+        """
+        获取解析统计
+        :return: {"pool": 子进程解析页数, "thread": 当前线程解析页数}
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def pop_stats(self) -> dict:
+        """
+        获取并清零解析统计，解析池在多次刷新间复用，每次刷新结束时取走本次的统计
+        :return: {"pool": 子进程解析页数, "thread": 当前线程解析页数}
+        """
+        with self._lock:
+            stats, self._stats = self._stats, {"pool": 0, "thread": 0}
+        return stats
+
+    def shutdown(self):
+        """
+        关闭解析进程
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
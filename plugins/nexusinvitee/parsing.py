@@ -0,0 +1,33 @@
+"""
+HTML解析模块
+"""
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from app.log import logger
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except Exception:
+    HTML_PARSER = "html.parser"
+
+# 只保留表格，用于翻页等只需要后宫列表的页面
+TABLES_ONLY = SoupStrainer("table")
+
+
+def make_soup(html_content: str, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """
+    构建BeautifulSoup对象，优先使用lxml解析器，未安装时回退到html.parser
+    :param html_content: HTML内容
+    :param parse_only: 只解析匹配的部分文档
+    :return: BeautifulSoup对象
+    """
+    try:
+        return BeautifulSoup(html_content, HTML_PARSER, parse_only=parse_only)
+    except Exception as e:
+        if HTML_PARSER == "html.parser":
+            raise
+        logger.warning(f"lxml解析页面失败，回退到html.parser: {str(e)}")
+        return BeautifulSoup(html_content, "html.parser", parse_only=parse_only)
@@ -0,0 +1,159 @@
+"""
+后宫成员查询索引模块
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional
+
+from plugins.nexusinvitee.diff import is_banned
+from plugins.nexusinvitee.normalize import parse_ratio, size_to_bytes
+
+# 需要关注的程度，数值越大越靠前：禁用 > 危险 > 警告 > 无数据 > 未知 > 正常
+SEVERITY = {
+    "danger": 4,
+    "warning": 3,
+    "neutral": 2,
+    "unknown": 1,
+    "good": 0,
+    "excellent": 0,
+}
+BANNED_SEVERITY = 5
+
+
+def _ratio_value(invitee: Dict[str, Any]) -> float:
+    """
+    获取可排序的分享率数值
+    """
+    ratio = invitee.get("ratio_value")
+    if isinstance(ratio, (int, float)):
+        return float(ratio)
+    try:
+        return parse_ratio(str(invitee.get("ratio") or "0"))
+    except ValueError:
+        return 0.0
+
+
+def _int_value(value: Any) -> int:
+    """
+    获取可排序的整数值
+    """
+    try:
+        return int(str(value).replace(",", "").strip() or 0)
+    except ValueError:
+        return 0
+
+
+class InviteeIndex:
+    """
+    后宫成员查询索引
+
+    基于一次数据快照构建：按站点/健康状态/启用状态建立倒排集合，
+    排序顺序在首次使用时计算并缓存，查询只复制返回的那一页数据
+    """
+    # 支持的排序字段
+    SORT_KEYS = ("severity", "site", "username", "ratio", "uploaded", "downloaded", "seeding")
+
+    def __init__(self, sites: Dict[str, Any]):
+        """
+        构建索引
+        :param sites: DataManager.get_site_data() 返回的站点数据
+        """
+        self.rows: List[Dict[str, Any]] = []
+        self.by_site: Dict[str, set] = {}
+        self.by_health: Dict[str, set] = {}
+        self.banned: set = set()
+        self._keys: Dict[str, List[Any]] = {key: [] for key in self.SORT_KEYS}
+        self._orders: Dict[str, List[int]] = {}
+
+        for site_name, record in sites.items():
+            invitees = (record or {}).get("data", {}).get("invitees", []) or []
+            site_rows = self.by_site.setdefault(site_name, set())
+            for invitee in invitees:
+                if not isinstance(invitee, Mapping):
+                    continue
+                row = len(self.rows)
+                health = invitee.get("ratio_health") or "unknown"
+                banned = is_banned(invitee)
+                self.rows.append({"site_name": site_name, "invitee": invitee,
+                                  "search": f"{invitee.get('username', '')}\n{invitee.get('email', '')}".lower()})
+                site_rows.add(row)
+                self.by_health.setdefault(health, set()).add(row)
+                if banned:
+                    self.banned.add(row)
+                keys = self._keys
+                keys["severity"].append(BANNED_SEVERITY if banned else SEVERITY.get(health, 1))
+                keys["site"].append(site_name)
+                keys["username"].append(str(invitee.get("username", "")).lower())
+                keys["ratio"].append(_ratio_value(invitee))
+                keys["uploaded"].append(size_to_bytes(str(invitee.get("uploaded") or "0")))
+                keys["downloaded"].append(size_to_bytes(str(invitee.get("downloaded") or "0")))
+                keys["seeding"].append(_int_value(invitee.get("seeding")))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _order(self, sort: str) -> List[int]:
+        """
+        获取按指定字段升序排列的行号，按严重程度排序时同级再按分享率升序
+        """
+        order = self._orders.get(sort)
+        if order is None:
+            values = self._keys[sort]
+            if sort == "severity":
+                ratios = self._keys["ratio"]
+                order = sorted(range(len(self.rows)), key=lambda row: (-values[row], ratios[row]))
+            else:
+                order = sorted(range(len(self.rows)), key=values.__getitem__)
+            self._orders[sort] = order
+        return order
+
+    def query(self, site: Optional[str] = None, health: Optional[str] = None,
+              enabled: Optional[bool] = None, search: Optional[str] = None,
+              sort: str = "severity", order: str = "asc",
+              offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """
+        查询后宫成员
+        :param site: 站点名称，多个用逗号分隔
+        :param health: 分享率健康状态(excellent/good/warning/danger/neutral/unknown)，多个用逗号分隔
+        :param enabled: 启用状态，None表示不过滤
+        :param search: 用户名或邮箱关键字
+        :param sort: 排序字段，见SORT_KEYS；severity升序即最需要关注的在前
+        :param order: asc/desc
+        :param offset: 起始位置
+        :param limit: 返回数量，0表示全部
+        :return: {"total": 匹配总数, "offset", "limit", "items": 当前页成员（附带site_name）}
+        """
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"不支持的排序字段: {sort}")
+
+        candidates: Optional[set] = None
+
+        def narrow(rows: set):
+            nonlocal candidates
+            candidates = rows if candidates is None else candidates & rows
+
+        if site:
+            narrow(set().union(*(self.by_site.get(name.strip(), set()) for name in site.split(","))))
+        if health:
+            narrow(set().union(*(self.by_health.get(name.strip(), set()) for name in health.split(","))))
+        if enabled is not None:
+            narrow(set(range(len(self.rows))) - self.banned if enabled else self.banned)
+        if search:
+            keyword = search.strip().lower()
+            pool = candidates if candidates is not None else range(len(self.rows))
+            candidates = {row for row in pool if keyword in self.rows[row]["search"]}
+
+        rows = self._order(sort)
+        if order == "desc":
+            rows = rows[::-1]
+        if candidates is not None:
+            rows = [row for row in rows if row in candidates]
+
+        offset = max(0, int(offset or 0))
+        limit = max(0, int(limit or 0))
+        page = rows[offset:offset + limit] if limit else rows[offset:]
+        return {
+            "total": len(rows),
+            "offset": offset,
+            "limit": limit,
+            "items": [{"site_name": self.rows[row]["site_name"], **self.rows[row]["invitee"]} for row in page]
+        }
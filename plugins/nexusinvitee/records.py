@@ -0,0 +1,231 @@
+"""
+后宫成员记录模块
+
+站点处理器解析得到的后宫成员是字段不固定的字典，成员数上万时每个字典都重复保存相同的键及
+'Yes'/'No'、健康状态、分享率标签等取值。InviteeRecord使用__slots__固定字段，
+启用状态与分享率健康状态按枚举保存，状态文本及分享率标签驻留共享，
+未出现的字段不占用空间，站点特有的字段保存在extra中。
+记录实现只读的Mapping接口，读取方式与原字典一致，保存时按原有JSON结构转换
+"""
+import sys
+import threading
+from collections.abc import Mapping
+from enum import IntEnum
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 缺失字段的占位值
+_MISSING = object()
+
+
+class Health(IntEnum):
+    """
+    分享率健康状态
+    """
+    EXCELLENT = 0
+    GOOD = 1
+    NEUTRAL = 2
+    UNKNOWN = 3
+    WARNING = 4
+    DANGER = 5
+
+
+class Enabled(IntEnum):
+    """
+    账号启用状态
+    """
+    NO = 0
+    YES = 1
+
+
+# 枚举与原有文本的对应关系，两个枚举的数值相互重叠，需分开保存
+_HEALTH_TEXT = {health: health.name.lower() for health in Health}
+_ENABLED_TEXT = {enabled: enabled.name.capitalize() for enabled in Enabled}
+_HEALTH_BY_TEXT = {text: health for health, text in _HEALTH_TEXT.items()}
+_ENABLED_BY_TEXT = {text: enabled for enabled, text in _ENABLED_TEXT.items()}
+# 取值较少、需驻留的文本字段
+_INTERNED_FIELDS = frozenset(["enabled", "ratio_health", "status", "data_status", "seed_time", "last_seed_report"])
+
+# 分享率标签驻留表：标签 -> 共享的元组
+_labels: Dict[tuple, tuple] = {}
+_labels_lock = threading.Lock()
+
+
+def intern_text(value: Any) -> Any:
+    """
+    驻留取值较少的文本字段，非字符串原样返回
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _intern_label(label: Any) -> Any:
+    """
+    分享率标签转为共享的元组，非字符串列表原样保存
+    """
+    if not isinstance(label, (list, tuple)) or not all(isinstance(part, str) for part in label):
+        return label
+    key = tuple(label)
+    shared = _labels.get(key)
+    if shared is None:
+        with _labels_lock:
+            shared = _labels.setdefault(key, tuple(sys.intern(part) for part in key))
+    return shared
+
+
+def _encode(field: str, value: Any) -> Any:
+    """
+    字段取值转换为保存形式
+    """
+    if isinstance(value, str):
+        if field == "enabled" and value in _ENABLED_BY_TEXT:
+            return _ENABLED_BY_TEXT[value]
+        if field == "ratio_health" and value in _HEALTH_BY_TEXT:
+            return _HEALTH_BY_TEXT[value]
+    if field == "ratio_label":
+        return _intern_label(value)
+    if field in _INTERNED_FIELDS:
+        return intern_text(value)
+    return value
+
+
+def _decode(value: Any) -> Any:
+    """
+    保存形式转换为原有的字典取值
+    """
+    if isinstance(value, Health):
+        return _HEALTH_TEXT[value]
+    if isinstance(value, Enabled):
+        return _ENABLED_TEXT[value]
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+class InviteeRecord(Mapping):
+    """
+    后宫成员记录，只读
+    """
+    # 常见字段，与原有字典的键一致
+    FIELDS = ("username", "email", "profile_url", "enabled", "status", "uploaded", "downloaded",
+              "ratio", "ratio_value", "ratio_health", "ratio_label", "seeding", "seeding_size",
+              "seed_time", "seed_magic", "seed_bonus", "last_seed_report", "last_seen", "data_status")
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, fields: Optional[Mapping] = None):
+        """
+        创建记录
+        :param fields: 成员字段，与站点处理器返回的字典结构一致
+        """
+        extra = None
+        for field, value in (fields or {}).items():
+            if field in _FIELD_SET:
+                object.__setattr__(self, field, _encode(field, value))
+            else:
+                if extra is None:
+                    extra = {}
+                extra[intern_text(field)] = value
+        object.__setattr__(self, "extra", extra)
+
+    @classmethod
+    def from_dict(cls, invitee: Mapping) -> "InviteeRecord":
+        """
+        从原有的字典结构创建记录，已是记录时直接返回
+        :param invitee: 后宫成员字典
+        :return: 记录
+        """
+        if isinstance(invitee, InviteeRecord):
+            return invitee
+        return cls(invitee)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为原有的字典结构
+        :return: 后宫成员字典
+        """
+        return {field: self[field] for field in self}
+
+    @property
+    def health(self) -> Optional[Health]:
+        """
+        分享率健康状态，未知取值时为None
+        """
+        value = getattr(self, "ratio_health", None)
+        return value if isinstance(value, Health) else None
+
+    @property
+    def banned(self) -> bool:
+        """
+        是否已被禁用
+        """
+        value = getattr(self, "enabled", None)
+        return value is Enabled.NO or (isinstance(value, str) and value.lower() == "no")
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("InviteeRecord 为只读记录")
+
+    def __getitem__(self, field: str) -> Any:
+        if field in _FIELD_SET:
+            value = getattr(self, field, _MISSING)
+            if value is _MISSING:
+                raise KeyError(field)
+            return _decode(value)
+        if self.extra and field in self.extra:
+            return self.extra[field]
+        raise KeyError(field)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if field in _FIELD_SET:
+            value = getattr(self, field, _MISSING)
+            return default if value is _MISSING else _decode(value)
+        return self.extra.get(field, default) if self.extra else default
+
+    def __contains__(self, field: object) -> bool:
+        if field in _FIELD_SET:
+            return hasattr(self, field)
+        return bool(self.extra) and field in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self.FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, field, _MISSING) for field in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, InviteeRecord):
+            return self._values() == other._values()
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return self.__class__, (self.to_dict(),)
+
+    def __repr__(self) -> str:
+        return f"InviteeRecord({self.to_dict()!r})"
+
+
+_FIELD_SET = frozenset(InviteeRecord.FIELDS)
+
+
+def to_records(invitees: Optional[Iterable[Any]]) -> List[InviteeRecord]:
+    """
+    将后宫成员列表转换为记录，跳过非字典项
+    :param invitees: 后宫成员列表
+    :return: 记录列表
+    """
+    return [InviteeRecord.from_dict(invitee) for invitee in invitees or [] if isinstance(invitee, Mapping)]
+
+
+def to_dicts(invitees: Optional[Iterable[Any]]) -> List[Dict[str, Any]]:
+    """
+    将记录列表转换为原有的字典结构，用于JSON输出
+    :param invitees: 记录或字典列表
+    :return: 字典列表
+    """
+    return [invitee.to_dict() if isinstance(invitee, InviteeRecord) else invitee for invitee in invitees or []]
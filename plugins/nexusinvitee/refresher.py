@@ -0,0 +1,184 @@
+"""
+并发刷新模块
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from app.log import logger
+
+from plugins.nexusinvitee.metrics import current_site_metrics
+
+
+class HostThrottle:
+    """
+    按站点主机限流：同一主机同时只刷新一个站点，相邻请求保持最小间隔，
+    且同时进行的请求数不超过max_requests（翻页预取窗口内的页面并发请求，超出的排队等待）
+    """
+    # 同一主机默认最大并发请求数，与翻页预取窗口一致
+    MAX_REQUESTS = 3
+
+    def __init__(self, min_interval: float = 0.5, max_requests: int = MAX_REQUESTS):
+        """
+        初始化主机限流器
+        :param min_interval: 同一主机两次请求之间的最小间隔（秒）
+        :param max_requests: 同一主机最大并发请求数
+        """
+        self.min_interval = max(0.0, float(min_interval or 0))
+        self.max_requests = max(1, int(max_requests or 1))
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        """
+        获取URL对应的主机名
+        :param url: URL
+        :return: 主机名（小写）
+        """
+        try:
+            return (urlparse(url).hostname or "").lower()
+        except Exception:
+            return ""
+
+    def host_lock(self, host: str) -> threading.Lock:
+        """
+        获取主机对应的站点级锁，保证同一主机并发度为1
+        :param host: 主机名
+        :return: 锁对象
+        """
+        with self._lock:
+            lock = self._host_locks.get(host)
+            if lock is None:
+                lock = threading.Lock()
+                self._host_locks[host] = lock
+            return lock
+
+    def request_slot(self, host: str) -> threading.BoundedSemaphore:
+        """
+        获取主机对应的请求信号量，限制同一主机的并发请求数
+        :param host: 主机名
+        :return: 信号量
+        """
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_requests)
+                self._host_slots[host] = slot
+            return slot
+
+    def wait(self, host: str):
+        """
+        等待直到允许向该主机发出下一个请求
+        :param host: 主机名
+        """
+        if not host or self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ThrottledSession(requests.Session):
+    """
+    发出请求前先经过主机限流的Session，正在记录性能统计时同时记录每个请求；
+    翻页预取等多线程共用同一Session时，同一主机的并发请求数受限流器的请求信号量限制
+    """
+
+    def __init__(self, throttle: HostThrottle = None):
+        super().__init__()
+        self.throttle = throttle
+
+    def request(self, method, url, *args, **kwargs):
+        wait_start = time.perf_counter()
+        if not self.throttle:
+            return self._send(wait_start, method, url, *args, **kwargs)
+        host = HostThrottle.get_host(url)
+        with self.throttle.request_slot(host):
+            self.throttle.wait(host)
+            return self._send(wait_start, method, url, *args, **kwargs)
+
+    def _send(self, wait_start: float, method, url, *args, **kwargs):
+        """
+        发出请求，正在记录性能统计时记录请求耗时及限流等待时长
+        """
+        metrics = current_site_metrics()
+        if metrics is None:
+            return super().request(method, url, *args, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception as e:
+            metrics.record_request(method, url, None, time.perf_counter() - started,
+                                   wait=started - wait_start, error=type(e).__name__)
+            raise
+        metrics.record_request(method, url, response.status_code, time.perf_counter() - started,
+                               ttfb=response.elapsed.total_seconds(), size=len(response.content or b""),
+                               wait=started - wait_start)
+        return response
+
+
+class SiteRefresher:
+    """
+    站点并发刷新器：有界线程池执行各站点抓取，按完成顺序返回结果
+    """
+
+    def __init__(self, max_workers: int = 4, throttle: HostThrottle = None):
+        """
+        初始化刷新器
+        :param max_workers: 全局最大并发站点数
+        :param throttle: 主机限流器
+        """
+        self.max_workers = max(1, int(max_workers or 1))
+        self.throttle = throttle or HostThrottle()
+
+    def _run_site(self, site: Dict[str, Any],
+                  fetch: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        在主机锁内执行单个站点的抓取
+        """
+        host = HostThrottle.get_host(site.get("url", ""))
+        with self.throttle.host_lock(host):
+            return fetch(site)
+
+    def run(self, sites: List[Dict[str, Any]],
+            fetch: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        并发抓取站点数据
+        :param sites: 站点信息列表
+        :param fetch: 单站点抓取函数，返回站点数据
+        :return: 按完成顺序产出 (站点信息, 站点数据)
+        """
+        if not sites:
+            return
+        workers = min(self.max_workers, len(sites))
+        logger.info(f"开始并发刷新 {len(sites)} 个站点，并发数: {workers}，同站请求间隔: {self.throttle.min_interval}秒")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nexusinvitee") as executor:
+            futures = {executor.submit(self._run_site, site, fetch): site for site in sites}
+            for future in as_completed(futures):
+                site = futures[future]
+                try:
+                    site_data = future.result()
+                except Exception as e:
+                    logger.error(f"站点 {site.get('name', '')} 刷新任务异常: {str(e)}")
+                    site_data = {
+                        "error": f"获取站点邀请数据失败: {str(e)}",
+                        "invite_status": {
+                            "can_invite": False,
+                            "permanent_count": 0,
+                            "temporary_count": 0,
+                            "reason": f"获取站点邀请数据失败: {str(e)}"
+                        }
+                    }
+                yield site, site_data
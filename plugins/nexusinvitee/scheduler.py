@@ -0,0 +1,211 @@
+"""
+站点刷新调度模块
+
+每个站点维护独立的下次刷新时间，按到期时间放入优先队列：
+数据经常变化的站点缩短刷新间隔，长期不变的站点逐步拉长；
+连续失败时指数退避，失败次数达到阈值后熔断，只在退避到期后试探一次
+"""
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.log import logger
+
+# 熔断状态
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class RefreshScheduler:
+    """
+    站点刷新调度器
+    """
+    # 默认刷新间隔及自适应范围（秒）
+    DEFAULT_INTERVAL = 24 * 3600
+    MIN_INTERVAL = 2 * 3600
+    MAX_INTERVAL = 3 * 86400
+    # 数据有变化时间隔缩短、无变化时间隔拉长的倍数
+    SHRINK_FACTOR = 0.5
+    GROW_FACTOR = 1.5
+    # 失败退避：首次退避时长、上限及触发熔断的连续失败次数
+    BASE_BACKOFF = 1800
+    MAX_BACKOFF = 2 * 86400
+    FAILURE_THRESHOLD = 3
+
+    def __init__(self, data_path: str):
+        """
+        初始化调度器
+        :param data_path: 数据目录路径
+        """
+        self.db_file = os.path.join(data_path, "refresh_schedule.db")
+        self._lock = threading.RLock()
+        self._states: Dict[str, Dict[str, Any]] = {}
+        # (下次刷新时间, 站点名称)，状态更新后旧条目保留在堆中，出堆时与状态比对丢弃
+        self._queue: List[Tuple[float, str]] = []
+        # 状态版本号，任何站点的调度或熔断状态变化后递增，用于判断渲染缓存是否失效
+        self._version = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            os.makedirs(data_path, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS site_schedule ("
+                "site_name TEXT PRIMARY KEY, "
+                "state TEXT NOT NULL)"
+            )
+            self._conn.commit()
+            for site_name, state in self._conn.execute("SELECT site_name, state FROM site_schedule"):
+                self._states[site_name] = json.loads(state)
+                heapq.heappush(self._queue, (self._states[site_name]["next_due"], site_name))
+        except Exception as e:
+            logger.error(f"初始化刷新调度数据库失败: {str(e)}")
+            self._conn = None
+
+    def _state(self, site_name: str) -> Dict[str, Any]:
+        """
+        获取站点调度状态，不存在时创建立即到期的状态
+        """
+        state = self._states.get(site_name)
+        if state is None:
+            state = self._states[site_name] = {
+                "interval": self.DEFAULT_INTERVAL,
+                "next_due": 0,
+                "failures": 0,
+                "circuit": CIRCUIT_CLOSED,
+                "last_run": 0,
+                "last_error": ""
+            }
+        return state
+
+    def _save(self, site_name: str, state: Dict[str, Any]):
+        """
+        保存站点调度状态并重新入队
+        """
+        self._version += 1
+        heapq.heappush(self._queue, (state["next_due"], site_name))
+        if not self._conn:
+            return
+        try:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO site_schedule (site_name, state) VALUES (?, ?)",
+                                   (site_name, json.dumps(state, ensure_ascii=False)))
+        except Exception as e:
+            logger.error(f"保存站点 {site_name} 调度状态失败: {str(e)}")
+
+    def due(self, site_names: Iterable[str], adaptive: bool = True, now: Optional[float] = None) -> List[str]:
+        """
+        获取到期需要刷新的站点，熔断中的站点到期后转为试探状态
+        :param site_names: 参与调度的站点
+        :param adaptive: 是否按自适应间隔调度，否则只跳过熔断中且未到重试时间的站点
+        :param now: 当前时间
+        :return: 按到期先后排序的站点名称
+        """
+        now = time.time() if now is None else now
+        site_names = list(site_names)
+        with self._lock:
+            if not adaptive:
+                result = [name for name in site_names
+                          if name not in self._states or self._states[name]["circuit"] != CIRCUIT_OPEN
+                          or self._states[name]["next_due"] <= now]
+            else:
+                selected = set(site_names)
+                result, seen, deferred = [], set(), []
+                # 从未调度过的站点立即到期
+                result.extend(name for name in site_names if name not in self._states)
+                seen.update(result)
+                while self._queue and self._queue[0][0] <= now:
+                    entry = heapq.heappop(self._queue)
+                    next_due, site_name = entry
+                    state = self._states.get(site_name)
+                    if not state or state["next_due"] != next_due or site_name in seen:
+                        continue
+                    if site_name in selected:
+                        seen.add(site_name)
+                        result.append(site_name)
+                    # 出堆的条目在状态更新前仍然有效，需放回队列
+                    deferred.append(entry)
+                for entry in deferred:
+                    heapq.heappush(self._queue, entry)
+            for site_name in result:
+                state = self._states.get(site_name)
+                if state and state["circuit"] == CIRCUIT_OPEN:
+                    state["circuit"] = CIRCUIT_HALF_OPEN
+                    self._version += 1
+                    logger.info(f"站点 {site_name} 熔断到期，试探刷新一次")
+            return result
+
+    def record_success(self, site_name: str, changed: bool, now: Optional[float] = None):
+        """
+        记录刷新成功，按数据是否变化调整刷新间隔
+        :param site_name: 站点名称
+        :param changed: 本次刷新数据是否有变化
+        :param now: 当前时间
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(site_name)
+            factor = self.SHRINK_FACTOR if changed else self.GROW_FACTOR
+            state["interval"] = int(min(self.MAX_INTERVAL, max(self.MIN_INTERVAL, state["interval"] * factor)))
+            if state["circuit"] != CIRCUIT_CLOSED:
+                logger.info(f"站点 {site_name} 刷新恢复，解除熔断")
+            state.update({
+                "next_due": now + state["interval"],
+                "failures": 0,
+                "circuit": CIRCUIT_CLOSED,
+                "last_run": now,
+                "last_error": ""
+            })
+            self._save(site_name, state)
+
+    def record_failure(self, site_name: str, error: str, now: Optional[float] = None):
+        """
+        记录刷新失败，指数退避，连续失败达到阈值或试探失败时熔断
+        :param site_name: 站点名称
+        :param error: 失败原因
+        :param now: 当前时间
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(site_name)
+            state["failures"] += 1
+            backoff = min(self.MAX_BACKOFF, self.BASE_BACKOFF * 2 ** (state["failures"] - 1))
+            if state["failures"] >= self.FAILURE_THRESHOLD or state["circuit"] == CIRCUIT_HALF_OPEN:
+                if state["circuit"] == CIRCUIT_CLOSED:
+                    logger.warning(f"站点 {site_name} 连续失败 {state['failures']} 次，熔断 {backoff // 60} 分钟")
+                state["circuit"] = CIRCUIT_OPEN
+            state.update({
+                "next_due": now + backoff,
+                "last_run": now,
+                "last_error": error
+            })
+            self._save(site_name, state)
+
+    def get_version(self) -> int:
+        """
+        获取状态版本号，每次调度或熔断状态变化后递增
+        :return: 版本号
+        """
+        with self._lock:
+            return self._version
+
+    def get_states(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取所有站点调度状态
+        :return: 站点名称 -> 状态副本
+        """
+        with self._lock:
+            return {site_name: dict(state) for site_name, state in self._states.items()}
+
+    def get_state(self, site_name: str) -> Dict[str, Any]:
+        """
+        获取站点调度状态
+        :param site_name: 站点名称
+        :return: 状态副本，从未调度过时为空
+        """
+        with self._lock:
+            return dict(self._states.get(site_name) or {})
@@ -3,13 +3,16 @@ NexusPHP站点邀请系统解析器基类
 """
 import re
 from abc import ABCMeta, abstractmethod
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
 from app.log import logger
+from plugins.nexusinvitee.parsing import make_soup
+from plugins.nexusinvitee.normalize import size_to_bytes, ratio_text
+from plugins.nexusinvitee.page_cache import PageCache
+from plugins.nexusinvitee.parse_pool import ParsePool
 
 
 class _ISiteHandler(metaclass=ABCMeta):
@@ -18,6 +21,16 @@ class _ISiteHandler(metaclass=ABCMeta):
     """
     # 站点类型标识
     site_schema = ""
+    # 缓存的用户ID，由插件在解析前设置，存在时跳过用户ID探测
+    cached_user_id: Optional[str] = None
+    # 本次解析使用的用户ID，解析完成后由插件写回缓存
+    user_id: Optional[str] = None
+    # 页面缓存，由插件在解析前设置，未设置时每次都重新解析
+    page_cache: Optional[PageCache] = None
+    # 上次保存的后宫成员列表，由插件在增量刷新时设置，翻页到与其一致的页即停止
+    known_invitees: Optional[List[Dict[str, Any]]] = None
+    # 多进程解析池，由插件在刷新时设置，未设置时在请求线程中解析
+    parse_pool: Optional[ParsePool] = None
     
     @classmethod
     @abstractmethod
@@ -39,10 +52,24 @@ class _ISiteHandler(metaclass=ABCMeta):
         """
         pass
 
+    def _get_user_id(self, session: requests.Session, site_url: str) -> Optional[str]:
+        """
+        获取用户ID，优先使用缓存的用户ID
+        :param session: 请求会话
+        :param site_url: 站点URL
+        :return: 用户ID
+        """
+        if self.cached_user_id:
+            logger.debug(f"站点 {site_url} 使用缓存的用户ID: {self.cached_user_id}")
+            self.user_id = self.cached_user_id
+            return self.user_id
+        self.user_id = self._discover_user_id(session, site_url)
+        return self.user_id
+
     @staticmethod
-    def _get_user_id(session: requests.Session, site_url: str) -> Optional[str]:
+    def _discover_user_id(session: requests.Session, site_url: str) -> Optional[str]:
         """
-        获取用户ID
+        访问个人信息页面探测用户ID
         :param session: 请求会话
         :param site_url: 站点URL
         :return: 用户ID
@@ -54,7 +81,7 @@ class _ISiteHandler(metaclass=ABCMeta):
             response.raise_for_status()
             
             # 解析页面获取用户ID
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
             
             # 方法1: 从个人信息链接获取
             user_link = soup.select_one('a[href*="userdetails.php"]')
@@ -82,77 +109,7 @@ class _ISiteHandler(metaclass=ABCMeta):
         :param size_str: 大小字符串
         :return: 字节数
         """
-        if not size_str or size_str.strip() == '':
-            logger.warning(f"空的大小字符串")
-            return 0
-
-        # 处理特殊情况
-        if size_str.lower() == 'inf.' or size_str.lower() == 'inf' or size_str == '∞':
-            logger.info(f"识别到无限大值: {size_str}")
-            return 1e20  # 使用一个非常大的数值代替无穷大
-
-        try:
-            # 标准化字符串，替换逗号为点
-            size_str = size_str.replace(',', '.')
-
-            # 分离数字和单位
-            # 正则表达式匹配数字部分和单位部分
-            matches = re.match(
-                r'([\d.]+)\s*([KMGTPEZY]?i?B)', size_str, re.IGNORECASE)
-
-            if not matches:
-                # 尝试匹配仅有数字的情况
-                try:
-                    return float(size_str)
-                except ValueError:
-                    logger.warning(f"无法解析大小字符串: {size_str}")
-                    return 0
-
-            size_num, unit = matches.groups()
-
-            # 尝试转换数字
-            try:
-                size_value = float(size_num)
-            except ValueError:
-                logger.warning(f"无法转换大小值为浮点数: {size_num}")
-                return 0
-
-            # 单位转换
-            unit = unit.upper()
-
-            units = {
-                'B': 1,
-                'KB': 1024,
-                'KIB': 1024,
-                'MB': 1024 ** 2,
-                'MIB': 1024 ** 2,
-                'GB': 1024 ** 3,
-                'GIB': 1024 ** 3,
-                'TB': 1024 ** 4,
-                'TIB': 1024 ** 4,
-                'PB': 1024 ** 5,
-                'PIB': 1024 ** 5,
-                'EB': 1024 ** 6,
-                'EIB': 1024 ** 6,
-                'ZB': 1024 ** 7,
-                'ZIB': 1024 ** 7,
-                'YB': 1024 ** 8,
-                'YIB': 1024 ** 8
-            }
-
-            # 处理简写单位
-            if unit in ['K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y']:
-                unit = unit + 'B'
-
-            if unit not in units:
-                logger.warning(f"未知的大小单位: {unit}")
-                return size_value  # 假设是字节
-
-            return size_value * units[unit]
-
-        except Exception as e:
-            logger.warning(f"转换大小字符串到字节时出错 '{size_str}': {str(e)}")
-            return 0
+        return size_to_bytes(size_str)
 
     @staticmethod
     def _calculate_ratio(uploaded: str, downloaded: str) -> str:
@@ -163,14 +120,7 @@ class _ISiteHandler(metaclass=ABCMeta):
         :return: 分享率字符串
         """
         try:
-            up_bytes = _ISiteHandler._convert_size_to_bytes(uploaded)
-            down_bytes = _ISiteHandler._convert_size_to_bytes(downloaded)
-            
-            if down_bytes == 0:
-                return "∞" if up_bytes > 0 else "0"
-            
-            ratio = up_bytes / down_bytes
-            return f"{ratio:.3f}"
+            return ratio_text(uploaded, downloaded)
         except Exception as e:
             logger.error(f"计算分享率失败: {str(e)}")
             return "0" 
\ No newline at end of file
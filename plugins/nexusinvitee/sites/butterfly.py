@@ -6,10 +6,12 @@ from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
 
 from app.log import logger
 from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitee.parsing import make_soup
+from plugins.nexusinvitee.paginator import InviteePaginator
+from plugins.nexusinvitee.normalize import parse_ratio, health_from_ratio, classify_invitees
 
 
 class ButterflyHandler(_ISiteHandler):
@@ -140,76 +142,20 @@ class ButterflyHandler(_ISiteHandler):
             except Exception as e:
                 logger.warning(f"站点 {site_name} 解析魔力值商店失败: {str(e)}")
             
-            # 检查第一页后宫成员数量，如果少于50人，则不再翻页
-            if len(invite_result["invitees"]) < 50:
-                logger.info(f"站点 {site_name} 首页后宫成员数量少于50人({len(invite_result['invitees'])}人)，不再查找后续页面")
-                # 如果成功解析到后宫成员，记录总数
-                if invite_result["invitees"]:
-                    logger.info(f"站点 {site_name} 共解析到 {len(invite_result['invitees'])} 个后宫成员")
-                # 不要在这里返回结果，继续执行后面的发送邀请页面访问代码
-            else:
-                # 尝试获取更多页面的后宫成员
-                current_page = 0  # 已获取了第一页，从第二页开始查找
-                max_pages = 100  # 防止无限循环
-                
-                # 从首页中查找下一页链接
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 继续获取后续页面，直到没有更多数据或达到最大页数
-                while current_page < max_pages:
-                    # 查找下一页链接 - 蝶粉站点特有的繁体翻页标识："下一頁"
-                    next_page_link = None
-                    pagination_links = soup.select('a')
-                    
-                    for link in pagination_links:
-                        link_text = link.get_text().strip()
-                        if "下一頁" in link_text or "下一页" in link_text:
-                            next_page_link = link.get('href')
-                            break
-                    
-                    # 如果找不到下一页链接，结束翻页
-                    if not next_page_link:
-                        logger.info(f"站点 {site_name} 没有找到下一页链接，停止获取")
-                        break
-                    
-                    # 构建下一页URL并请求
-                    # 使用正确的URL模板
-                    next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={current_page+1}")
-                    logger.info(f"站点 {site_name} 正在获取第 {current_page+2} 页后宫成员数据: {next_page_url}")
-                    
-                    try:
-                        next_response = session.get(next_page_url, timeout=(10, 30))
-                        next_response.raise_for_status()
-                        
-                        # 更新soup以便下次查找翻页链接
-                        soup = BeautifulSoup(next_response.text, 'html.parser')
-                        
-                        # 解析下一页数据
-                        next_page_result = self._parse_butterfly_invite_page(site_name, site_url, next_response.text, is_next_page=True)
-                        
-                        # 如果没有找到任何后宫成员，说明已到达最后一页
-                        if not next_page_result["invitees"]:
-                            logger.info(f"站点 {site_name} 第 {current_page+2} 页没有后宫成员数据，停止获取")
-                            break
-                        
-                        # 如果当前页面后宫成员少于50人，默认认为没有下一页，避免错误进入下一页
-                        if len(next_page_result["invitees"]) < 50:
-                            logger.info(f"站点 {site_name} 第 {current_page+2} 页后宫成员数量少于50人({len(next_page_result['invitees'])}人)，默认没有下一页")
-                            # 将当前页数据合并到结果中后退出循环
-                            invite_result["invitees"].extend(next_page_result["invitees"])
-                            logger.info(f"站点 {site_name} 第 {current_page+2} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                            break
-                        
-                        # 将下一页的后宫成员添加到结果中
-                        invite_result["invitees"].extend(next_page_result["invitees"])
-                        logger.info(f"站点 {site_name} 第 {current_page+2} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                        
-                        # 继续下一页
-                        current_page += 1
-                        
-                    except Exception as e:
-                        logger.warning(f"站点 {site_name} 获取第 {current_page+2} 页数据失败: {str(e)}")
-                        break
+            # 获取后续页面的后宫成员 - 蝶粉站点需存在繁体翻页标识"下一頁"才继续翻页
+            paginator = InviteePaginator(
+                session, site_name,
+                page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                parse_page=lambda html: self._parse_butterfly_invite_page(site_name, site_url, html, is_next_page=True)["invitees"],
+                next_link_texts=("下一頁", "下一页"),
+                page_cache=self.page_cache,
+                known_invitees=self.known_invitees
+            )
+            invite_result["invitees"].extend(paginator.collect(response.text, invite_result["invitees"]))
+            invite_result["incremental"] = paginator.stopped_early
+            invite_result["reused_invitees"] = paginator.reused_count
+            if invite_result["invitees"]:
+                logger.info(f"站点 {site_name} 共解析到 {len(invite_result['invitees'])} 个后宫成员")
             
             # 访问发送邀请页面，这是判断权限的关键
             send_invite_url = urljoin(site_url, f"invite.php?id={user_id}&type=new")
@@ -269,7 +215,7 @@ class ButterflyHandler(_ISiteHandler):
         }
         
         # 初始化BeautifulSoup对象
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         
         # 检查是否有特殊标题，如"我的后宫"或"邀請系統"等
         special_title = False
@@ -560,26 +506,8 @@ class ButterflyHandler(_ISiteHandler):
                                 
                                 # 尝试解析为浮点数 - 正确处理千分位逗号
                                 try:
-                                    # 使用更好的方法完全移除千分位逗号
-                                    normalized_ratio = ratio_text
-                                    # 循环处理，直到没有千分位逗号
-                                    while ',' in normalized_ratio:
-                                        # 检查每个逗号是否是千分位分隔符
-                                        comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                        for pos in comma_positions:
-                                            # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                                            if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                                                normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                                normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                                break
-                                        else:
-                                            # 如果没有找到千分位逗号，退出循环
-                                            break
-                                    
-                                    # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                                    normalized_ratio = normalized_ratio.replace(',', '.')
-                                    invitee["ratio_value"] = float(normalized_ratio)
-                                except (ValueError, TypeError):
+                                    invitee["ratio_value"] = parse_ratio(ratio_text)
+                                except ValueError:
                                     logger.warning(f"无法解析分享率: {ratio_text}")
                                     invitee["ratio_value"] = 0
                         
@@ -624,62 +552,13 @@ class ButterflyHandler(_ISiteHandler):
                         if "status" not in invitee:
                             invitee["status"] = "已禁用" if is_banned else "已確認"
                         
-                        # 检查是否是无数据情况（上传下载都是0）
-                        uploaded = invitee.get("uploaded", "0")
-                        downloaded = invitee.get("downloaded", "0")
-                        is_no_data = False
-                        
-                        # 字符串判断
-                        if isinstance(uploaded, str) and isinstance(downloaded, str):
-                            # 转换为小写进行比较
-                            uploaded_lower = uploaded.lower()
-                            downloaded_lower = downloaded.lower()
-                            # 检查所有可能的0值表示
-                            zero_values = ['0', '', '0b', '0.00 kb', '0.00 b', '0.0 kb', '0kb', '0b', '0.00', '0.0']
-                            is_no_data = any(uploaded_lower == val for val in zero_values) and \
-                                       any(downloaded_lower == val for val in zero_values)
-                        # 数值判断
-                        elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
-                            is_no_data = uploaded == 0 and downloaded == 0
-                        
-                        # 添加数据状态标记
-                        if is_no_data:
-                            invitee["data_status"] = "无数据"
-                            logger.debug(f"用户 {invitee.get('username')} 被标记为无数据状态")
-                        
-                        # 计算分享率健康状态
-                        if "ratio_value" in invitee:
-                            if is_no_data:
-                                invitee["ratio_health"] = "neutral"
-                                invitee["ratio_label"] = ["无数据", "grey"]
-                            elif invitee["ratio_value"] >= 1e20:
-                                invitee["ratio_health"] = "excellent"
-                                invitee["ratio_label"] = ["无限", "green"]
-                            elif invitee["ratio_value"] >= 1.0:
-                                invitee["ratio_health"] = "good"
-                                invitee["ratio_label"] = ["良好", "green"]
-                            elif invitee["ratio_value"] >= 0.5:
-                                invitee["ratio_health"] = "warning"
-                                invitee["ratio_label"] = ["较低", "orange"]
-                            else:
-                                invitee["ratio_health"] = "danger"
-                                invitee["ratio_label"] = ["危险", "red"]
-                        else:
-                            # 处理没有ratio_value的情况
-                            if is_no_data:
-                                invitee["ratio_health"] = "neutral" 
-                                invitee["ratio_label"] = ["无数据", "grey"]
-                            elif "ratio" in invitee and invitee["ratio"] == "∞":
-                                invitee["ratio_health"] = "excellent"
-                                invitee["ratio_label"] = ["无限", "green"]
-                            else:
-                                invitee["ratio_health"] = "unknown"
-                                invitee["ratio_label"] = ["未知", "grey"]
-                        
                         # 将用户数据添加到结果中
                         if invitee.get("username"):
                             result["invitees"].append(invitee.copy())
                 
+                # 整页统一计算无数据状态与分享率健康度
+                classify_invitees(result["invitees"], missing_size="0")
+
                 # 记录解析结果
                 if result["invitees"]:
                     if is_next_page:
@@ -704,7 +583,7 @@ class ButterflyHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # 1. 查找当前魔力值
             # 查找包含魔力值的文本，常见格式如 "魔力值: 1,234" "积分/魔力值/欢乐值: 1,234" 等
@@ -803,14 +682,4 @@ class ButterflyHandler(_ISiteHandler):
         """
         根据分享率数值获取健康状态和标签
         """
-        # 分享率健康度判断
-        if ratio >= 4.0:
-            return "excellent", ["极好", "text-success"]
-        elif ratio >= 2.0:
-            return "good", ["良好", "text-success"]
-        elif ratio >= 1.0:
-            return "good", ["正常", "text-success"]
-        elif ratio > 0:
-            return "warning" if ratio >= 0.4 else "danger", ["较低", "text-warning"] if ratio >= 0.4 else ["危险", "text-error"]
-        else:
-            return "neutral", ["无数据", "text-grey"] 
\ No newline at end of file
+        return health_from_ratio(ratio) 
\ No newline at end of file
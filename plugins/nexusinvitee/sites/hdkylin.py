@@ -8,10 +8,11 @@ from urllib.parse import urljoin
 import traceback
 
 import requests
-from bs4 import BeautifulSoup
 
 from app.log import logger
 from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitee.parsing import make_soup
+from plugins.nexusinvitee.normalize import parse_ratio
 
 
 class HdkylinHandler(_ISiteHandler):
@@ -68,37 +69,43 @@ class HdkylinHandler(_ISiteHandler):
             invite_page_html = "" # 初始化
             
             try:
-                # 尝试访问站点首页获取 info_block 来提取 user_id 和初始信息
-                index_response = session.get(site_url, timeout=(10, 30))
-                index_response.raise_for_status()
-                index_soup = BeautifulSoup(index_response.text, 'html.parser')
-                info_block = index_soup.select_one('#info_block')
-                
-                if info_block:
-                    info_block_text = info_block.get_text()
-                    # 从邀请链接提取用户ID
-                    invite_link_tag = info_block.select_one('a[href*="invite.php?id="]')
-                    if invite_link_tag and invite_link_tag.get('href'):
-                       match_id = re.search(r'id=(\d+)', invite_link_tag['href'])
-                       if match_id:
-                           user_id = match_id.group(1)
-                           logger.info(f"站点 {site_name} 从 info_block 提取到用户ID: {user_id}")
-                           invite_page_url = urljoin(site_url, f"invite.php?id={user_id}")
-                       else:
-                            logger.warning(f"站点 {site_name} 在 info_block 邀请链接中未找到用户ID")
-                else:
-                    logger.warning(f"站点 {site_name} 在首页未找到 #info_block")
-
-                # 如果无法从 info_block 获取 user_id，尝试通用方法
-                if not user_id:
+                # 有缓存的用户ID时直接访问邀请页面，info_block 从邀请页面获取
+                if self.cached_user_id:
                     user_id = self._get_user_id(session, site_url)
-                    if user_id:
-                        logger.info(f"站点 {site_name} 通过通用方法获取到用户ID: {user_id}")
-                        invite_page_url = urljoin(site_url, f"invite.php?id={user_id}")
+                    invite_page_url = urljoin(site_url, f"invite.php?id={user_id}")
+                else:
+                    # 尝试访问站点首页获取 info_block 来提取 user_id 和初始信息
+                    index_response = session.get(site_url, timeout=(10, 30))
+                    index_response.raise_for_status()
+                    index_soup = make_soup(index_response.text)
+                    info_block = index_soup.select_one('#info_block')
+                
+                    if info_block:
+                        info_block_text = info_block.get_text()
+                        # 从邀请链接提取用户ID
+                        invite_link_tag = info_block.select_one('a[href*="invite.php?id="]')
+                        if invite_link_tag and invite_link_tag.get('href'):
+                           match_id = re.search(r'id=(\d+)', invite_link_tag['href'])
+                           if match_id:
+                               user_id = match_id.group(1)
+                               self.user_id = user_id
+                               logger.info(f"站点 {site_name} 从 info_block 提取到用户ID: {user_id}")
+                               invite_page_url = urljoin(site_url, f"invite.php?id={user_id}")
+                           else:
+                                logger.warning(f"站点 {site_name} 在 info_block 邀请链接中未找到用户ID")
                     else:
-                         logger.error(f"站点 {site_name} 无法获取用户ID")
-                         result["invite_status"]["reason"] = "无法获取用户ID，请检查Cookie或站点是否可访问"
-                         return result
+                        logger.warning(f"站点 {site_name} 在首页未找到 #info_block")
+
+                    # 如果无法从 info_block 获取 user_id，尝试通用方法
+                    if not user_id:
+                        user_id = self._get_user_id(session, site_url)
+                        if user_id:
+                            logger.info(f"站点 {site_name} 通过通用方法获取到用户ID: {user_id}")
+                            invite_page_url = urljoin(site_url, f"invite.php?id={user_id}")
+                        else:
+                             logger.error(f"站点 {site_name} 无法获取用户ID")
+                             result["invite_status"]["reason"] = "无法获取用户ID，请检查Cookie或站点是否可访问"
+                             return result
 
             except Exception as e:
                  logger.error(f"站点 {site_name} 获取用户ID过程中出错: {str(e)}")
@@ -110,7 +117,7 @@ class HdkylinHandler(_ISiteHandler):
                 invite_response = session.get(invite_page_url, timeout=(10, 30))
                 invite_response.raise_for_status()
                 invite_page_html = invite_response.text
-                invite_soup = BeautifulSoup(invite_page_html, 'html.parser')
+                invite_soup = make_soup(invite_page_html)
 
                 # 解析 info_block (如果首页没取到，这里再取一次)
                 if not info_block_text:
@@ -196,7 +203,7 @@ class HdkylinHandler(_ISiteHandler):
                 bonus_url = urljoin(site_url, "mybonus.php")
                 bonus_response = session.get(bonus_url, timeout=(10, 30))
                 bonus_response.raise_for_status()
-                bonus_soup = BeautifulSoup(bonus_response.text, 'html.parser')
+                bonus_soup = make_soup(bonus_response.text)
 
                 # --- 解析当前魔力值 ---
                 # 更精确地定位包含魔力值的文本节点
@@ -304,7 +311,7 @@ class HdkylinHandler(_ISiteHandler):
 
     # 辅助方法：从页面解析邀请状态 (移植自NexusPhpHandler._parse_nexusphp_invite_page)
     def _parse_invite_status_from_page(self, site_name: str, html_content: str) -> Dict[str, Any]:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         invite_status = {"can_invite": False, "reason": "", "permanent_count": 0, "temporary_count": 0}
 
         # 1. 检查 info_block (如果存在)
@@ -400,7 +407,7 @@ class HdkylinHandler(_ISiteHandler):
 
     # 辅助方法：解析被邀请人表格 (移植自NexusPhpHandler._parse_nexusphp_invite_page)
     def _parse_invitee_table(self, site_name: str, html_content: str, site_url: str) -> List[Dict[str, Any]]:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         invitees = []
         # 麒麟站使用 table[border="1"] 作为主要用户表格
         invitee_tables = soup.select('table[border="1"]')
@@ -501,24 +508,13 @@ class HdkylinHandler(_ISiteHandler):
                         ratio_value = 1e20
                     else:
                         try:
-                            # 标准化处理
-                            normalized_ratio = ratio_str
-                            while ',' in normalized_ratio:
-                                comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                for pos in comma_positions:
-                                    if (pos > 0 and pos < len(normalized_ratio) - 1 and
-                                        normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                        normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                        break
-                                else: break
-                            normalized_ratio = normalized_ratio.replace(',', '.')
-                            ratio_value = float(normalized_ratio)
+                            ratio_value = parse_ratio(ratio_str)
 
                             # 判断健康度
                             if ratio_value >= 1.0: ratio_health = "good"; ratio_label = ["良好", "text-success"]
                             elif ratio_value >= 0.5: ratio_health = "warning"; ratio_label = ["较低", "text-warning"]
                             else: ratio_health = "danger"; ratio_label = ["危险", "text-error"]
-                        except (ValueError, TypeError):
+                        except ValueError:
                             ratio_health = "unknown"; ratio_label = ["无效", "text-grey"]
 
                 invitee["ratio_value"] = ratio_value
@@ -7,11 +7,12 @@ from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
 
 from app.log import logger
 from app.db.site_oper import SiteOper
 from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitee.parsing import make_soup
+from plugins.nexusinvitee.paginator import InviteePaginator
 
 
 class HHClubHandler(_ISiteHandler):
@@ -117,52 +118,16 @@ class HHClubHandler(_ISiteHandler):
             first_page_result = self._parse_hhclub_invitee_page(site_name, site_url, first_page_response.text)
             result["invitees"] = first_page_result["invitees"]
 
-            previous_page_invitee_ids = set()
-            if result["invitees"]:
-                first_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in result["invitees"]}
-                previous_page_invitee_ids = first_page_invitee_ids
-                logger.debug(f"站点 {site_name} 首页收集到 {len(previous_page_invitee_ids)} 个后宫ID用于重复检测")
-
-            if len(result["invitees"]) >= 50:
-                logger.info(f"站点 {site_name} 首页后宫成员数量达到50人，尝试获取后续页面...")
-                next_page = 1
-                max_pages = 100
-
-                while next_page < max_pages:
-                    next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={next_page}")
-                    logger.info(f"站点 {site_name} 正在获取第 {next_page+1} 页后宫成员数据: {next_page_url}")
-
-                    try:
-                        next_response = session.get(next_page_url, timeout=(10, 30))
-                        next_response.raise_for_status()
-                        next_page_result = self._parse_hhclub_invitee_page(site_name, site_url, next_response.text)
-
-                        if not next_page_result["invitees"]:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页没有后宫成员数据，停止获取")
-                            break
-
-                        current_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in next_page_result["invitees"]}
-
-                        if previous_page_invitee_ids and current_page_invitee_ids == previous_page_invitee_ids:
-                            logger.warning(f"站点 {site_name} 检测到第 {next_page+1} 页内容与上一页重复，停止翻页")
-                            break
-
-                        result["invitees"].extend(next_page_result["invitees"])
-                        logger.info(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-
-                        previous_page_invitee_ids = current_page_invitee_ids
-
-                        if len(next_page_result["invitees"]) < 50:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页后宫成员数量少于50人({len(next_page_result['invitees'])}人)，停止获取")
-                            break
-
-                        next_page += 1
-
-                    except Exception as e:
-                        logger.warning(f"站点 {site_name} 获取第 {next_page+1} 页数据失败: {str(e)}")
-                        break
-            else:
-                logger.info(f"站点 {site_name} 首页后宫成员数量少于50人({len(result['invitees'])}人)，不再查找后续页面")
+            paginator = InviteePaginator(
+                session, site_name,
+                page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                parse_page=lambda html: self._parse_hhclub_invitee_page(site_name, site_url, html)["invitees"],
+                page_cache=self.page_cache,
+                known_invitees=self.known_invitees
+            )
+            result["invitees"].extend(paginator.collect(first_page_response.text, result["invitees"]))
+            result["incremental"] = paginator.stopped_early
+            result["reused_invitees"] = paginator.reused_count
             # --- 后宫列表解析结束 ---
 
             # --- 获取魔力值和邀请价格 ---
@@ -214,7 +179,7 @@ class HHClubHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # 方法1: 查找包含"邀请"的行（原有逻辑）
             invite_row = soup.select_one('td.rowhead:-soup-contains("邀请") + td.rowfollow')
@@ -303,7 +268,7 @@ class HHClubHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # 首先检查是否有"对不起"消息 - 如果有，一定是不可邀请
             # 尝试多种可能的选择器来匹配"对不起"消息
@@ -417,7 +382,7 @@ class HHClubHandler(_ISiteHandler):
         }
 
         # 初始化BeautifulSoup对象
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
 
         # 检查是否有"没有被邀者"的提示信息
         no_invitee_div = soup.select_one('div:-soup-contains("没有被邀者")')
@@ -670,7 +635,7 @@ class HHClubHandler(_ISiteHandler):
         }
         
         # 初始化BeautifulSoup对象
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         
         try:
             # 1. 查找当前魔力值 - 憨憨站点特定格式
@@ -725,7 +690,7 @@ class HHClubHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # 查找用户信息面板
             user_panel = soup.select_one('#user-info-panel')
@@ -8,6 +8,7 @@ import re
 
 from app.log import logger
 from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitee.normalize import format_size, ratio_health, health_from_ratio
 
 
 class MTeamHandler(_ISiteHandler):
@@ -395,92 +396,16 @@ class MTeamHandler(_ISiteHandler):
         :param size_bytes: 字节数
         :return: 格式化后的大小字符串
         """
-        try:
-            if not isinstance(size_bytes, (int, float)):
-                return str(size_bytes)
-                
-            for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-                if size_bytes < 1024.0:
-                    return f"{size_bytes:.2f} {unit}"
-                size_bytes /= 1024.0
-            return f"{size_bytes:.2f} PB"
-        except Exception as e:
-            logger.warning(f"格式化大小失败: {str(e)}")
-            return "0 B"
+        return format_size(size_bytes)
     
     def _calculate_ratio_health(self, ratio_str, uploaded, downloaded):
         """
         计算分享率健康度
         """
-        try:
-            # 优先使用上传下载直接计算分享率（如果都是数值类型）
-            if isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)) and downloaded > 0:
-                ratio = uploaded / downloaded
-                # 使用计算结果生成适当的健康状态和标签
-                return self._get_health_from_ratio_value(ratio)
-                
-            # 检查是否是无数据情况（上传下载都是0）
-            is_no_data = False
-            if isinstance(uploaded, str) and isinstance(downloaded, str):
-                uploaded_zero = uploaded == '0' or uploaded == '' or uploaded == '0.0' or uploaded.lower() == '0b'
-                downloaded_zero = downloaded == '0' or downloaded == '' or downloaded == '0.0' or downloaded.lower() == '0b'
-                is_no_data = uploaded_zero and downloaded_zero
-            elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
-                is_no_data = uploaded == 0 and downloaded == 0
-
-            if is_no_data:
-                return "neutral", ["无数据", "text-grey"]
-                
-            # 处理无限分享率情况 - 增强检测逻辑
-            if not ratio_str:
-                return "neutral", ["无效", "text-grey"]
-                
-            # 统一处理所有表示无限的情况，忽略大小写
-            if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-                return "excellent", ["分享率无限", "text-success"]
-                
-            # 标准化分享率字符串 - 正确处理千分位逗号
-            try:
-                # 使用更好的方法完全移除千分位逗号
-                normalized_ratio = ratio_str
-                # 循环处理，直到没有千分位逗号
-                while ',' in normalized_ratio:
-                    # 检查每个逗号是否是千分位分隔符
-                    comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                    for pos in comma_positions:
-                        # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                        if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                            normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                            normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                            break
-                    else:
-                        # 如果没有找到千分位逗号，退出循环
-                        break
-                
-                # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                normalized_ratio = normalized_ratio.replace(',', '.')
-                ratio = float(normalized_ratio)
-                return self._get_health_from_ratio_value(ratio)
-            except (ValueError, TypeError) as e:
-                logger.error(f"分享率转换错误: {ratio_str}, 错误: {str(e)}")
-                return "neutral", ["无效", "text-grey"]
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"分享率计算错误: {str(e)}")
-            return "neutral", ["无效", "text-grey"]
+        return ratio_health(ratio_str, uploaded, downloaded)
             
     def _get_health_from_ratio_value(self, ratio):
         """
         根据分享率数值获取健康状态和标签
         """
-        # 分享率健康度判断
-        if ratio >= 4.0:
-            return "excellent", ["极好", "text-success"]
-        elif ratio >= 2.0:
-            return "good", ["良好", "text-success"]
-        elif ratio >= 1.0:
-            return "good", ["正常", "text-success"]
-        elif ratio > 0:
-            return "warning" if ratio >= 0.4 else "danger", ["较低", "text-warning"] if ratio >= 0.4 else ["危险", "text-error"]
-        else:
-            return "neutral", ["无数据", "text-grey"]
\ No newline at end of file
+        return health_from_ratio(ratio)
\ No newline at end of file
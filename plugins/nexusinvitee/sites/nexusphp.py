@@ -4,6 +4,7 @@
 import re
 from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin
+import time
 import traceback
 
 import requests
@@ -11,6 +12,21 @@ from bs4 import BeautifulSoup
 
 from app.log import logger
 from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitee.parsing import make_soup, TABLES_ONLY
+from plugins.nexusinvitee.paginator import InviteePaginator
+from plugins.nexusinvitee.metrics import record_parse
+from plugins.nexusinvitee.normalize import parse_ratio, ratio_health, health_from_ratio, classify_invitees
+
+
+def parse_nexusphp_invitees(handler_cls: type, site_name: str, html_content: str) -> List[Dict[str, Any]]:
+    """
+    解析后宫列表后续页，供解析池在子进程中调用
+    :param handler_cls: 站点处理类
+    :param site_name: 站点名称
+    :param html_content: 页面HTML
+    :return: 后宫成员列表
+    """
+    return handler_cls()._parse_nexusphp_invite_page(site_name, html_content, is_next_page=True)["invitees"]
 
 
 class NexusPhpHandler(_ISiteHandler):
@@ -19,6 +35,10 @@ class NexusPhpHandler(_ISiteHandler):
     """
     # 站点类型标识
     site_schema = "nexusphp"
+    # 上传下载均为这些值时视为无数据用户
+    ZERO_SIZES = frozenset(['0', '0.00 kb', '0b'])
+    # 魔力值商店邀请价格很少变化，在该时长内复用缓存的价格，只重新解析当前魔力值（秒）
+    BONUS_PRICE_TTL = 3 * 86400
     
     @classmethod
     def match(cls, site_url: str) -> bool:
@@ -143,7 +163,7 @@ class NexusPhpHandler(_ISiteHandler):
 
                         # Check page content for login prompts
                         html_content = response.text # Store content for later use if check passes
-                        soup_check = BeautifulSoup(html_content, 'html.parser')
+                        soup_check = make_soup(html_content)
                         login_elements = soup_check.select('form[action*="takelogin.php"], input[name="password"], div.error:-soup-contains("需要登录")')
                         login_text_match = re.search(r'(需要登录|请登录|login required|please log in)', html_content, re.IGNORECASE)
 
@@ -177,7 +197,7 @@ class NexusPhpHandler(_ISiteHandler):
             try:
                 logger.debug(f"站点 {site_name} 早期检查通过，开始执行页面解析...")
                 # Parse Invite Page (using html_content from Stage 1)
-                invite_result = self._parse_nexusphp_invite_page(site_name, html_content)
+                invite_result = self._parse_nexusphp_invite_page(site_name, html_content, soup=soup_check)
 
                 # Update result with parsed data
                 result["invite_status"].update({
@@ -191,9 +211,8 @@ class NexusPhpHandler(_ISiteHandler):
                 # --- Original Bonus Shop Parsing Logic --- (kept exactly as before)
                 try:
                     bonus_url = urljoin(site_url, "mybonus.php")
-                    bonus_response = session.get(bonus_url, timeout=(10, 30))
-                    if bonus_response.status_code == 200:
-                        bonus_data = self._parse_bonus_shop(site_name, bonus_response.text)
+                    bonus_data = self._fetch_bonus_shop(site_name, bonus_url, session)
+                    if bonus_data:
                         result["invite_status"]["bonus"] = bonus_data["bonus"]
                         result["invite_status"]["permanent_invite_price"] = bonus_data["permanent_invite_price"]
                         result["invite_status"]["temporary_invite_price"] = bonus_data["temporary_invite_price"]
@@ -237,58 +256,19 @@ class NexusPhpHandler(_ISiteHandler):
                 except Exception as e:
                     logger.warning(f"站点 {site_name} 解析魔力值商店失败: {str(e)}")
 
-                # --- Original Pagination Logic --- (kept exactly as before)
-                if len(result["invitees"]) >= 50:
-                    next_page = 1
-                    max_pages = 100
-                    previous_page_invitee_ids = set() # Initialize set to store previous page invitee identifiers
-                    
-                    # 从第一页数据中提取用户ID用于检测重复
-                    if result["invitees"]:
-                        first_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in result["invitees"]}
-                        previous_page_invitee_ids = first_page_invitee_ids
-                        logger.debug(f"站点 {site_name} 首页收集到 {len(previous_page_invitee_ids)} 个用户ID用于重复检测")
-                    
-                    while next_page < max_pages:
-                        # ... (pagination logic unchanged) ...
-                        next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={next_page}")
-                        logger.debug(f"站点 {site_name} 正在获取第 {next_page+1} 页后宫成员数据: {next_page_url}")
-                        try:
-                            next_response = session.get(next_page_url, timeout=(10, 30))
-                            next_response.raise_for_status()
-                            next_page_result = self._parse_nexusphp_invite_page(site_name, next_response.text, is_next_page=True)
-                            
-                            # --- Repetition Check START ---
-                            if not next_page_result["invitees"]:
-                                logger.debug(f"站点 {site_name} 第 {next_page+1} 页没有后宫成员数据，停止获取")
-                                break
-                                
-                            # Extract identifiers (e.g., profile URLs or usernames) for comparison
-                            # Using profile_url is generally more reliable
-                            current_page_invitee_ids = {invitee.get('profile_url') or invitee.get('username') for invitee in next_page_result["invitees"]}
-                            
-                            # Check if the current page content is identical to the previous one
-                            if previous_page_invitee_ids and current_page_invitee_ids == previous_page_invitee_ids:
-                                logger.warning(f"站点 {site_name} 检测到第 {next_page+1} 页内容与上一页重复，停止翻页")
-                                break
-                                
-                            # 只有在内容不重复时，才添加到结果中
-                            result["invitees"].extend(next_page_result["invitees"])
-                            logger.debug(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                            
-                            # Update previous page identifiers for the next iteration
-                            previous_page_invitee_ids = current_page_invitee_ids
-                            # --- Repetition Check END ---
-                            
-                            if len(next_page_result["invitees"]) < 50:
-                                logger.info(f"站点 {site_name} 第 {next_page+1} 页后宫成员数量少于50人，停止获取")
-                                break
-                            next_page += 1
-                        except Exception as e:
-                            logger.warning(f"站点 {site_name} 获取第 {next_page+1} 页数据失败: {str(e)}")
-                            break
-                else:
-                     logger.info(f"站点 {site_name} 首页后宫成员数量少于50人({len(result['invitees'])}人)，不再查找后续页面")
+                # --- Pagination Logic ---
+                paginator = InviteePaginator(
+                    session, site_name,
+                    page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                    parse_page=lambda html: self._parse_nexusphp_invite_page(site_name, html, is_next_page=True)["invitees"],
+                    page_cache=self.page_cache,
+                    known_invitees=self.known_invitees,
+                    parse_submit=self.parse_pool.bind(parse_nexusphp_invitees, type(self), site_name)
+                    if self.parse_pool else None
+                )
+                result["invitees"].extend(paginator.collect(html_content, result["invitees"]))
+                result["incremental"] = paginator.stopped_early
+                result["reused_invitees"] = paginator.reused_count
 
                 # --- Original Send Invite Page Check Logic --- (kept exactly as before)
                 send_invite_url = urljoin(site_url, f"invite.php?id={user_id}&type=new")
@@ -343,7 +323,7 @@ class NexusPhpHandler(_ISiteHandler):
                         details_html = details_response.text
                         
                         # Parse the user details page content
-                        soup_pter = BeautifulSoup(details_html, 'html.parser')
+                        soup_pter = make_soup(details_html)
                         
                         # Look for the specific VIP image tag on the userdetails page
                         vip_indicator = soup_pter.select_one('img[src*="pic/user_class/vip.png"], img[title*="挪威森林猫 VIP"]')
@@ -390,12 +370,14 @@ class NexusPhpHandler(_ISiteHandler):
         # If parsing was successful (not early_check_failed and no parsing error)
         return result
     
-    def _parse_nexusphp_invite_page(self, site_name: str, html_content: str, is_next_page: bool = False) -> Dict[str, Any]:
+    def _parse_nexusphp_invite_page(self, site_name: str, html_content: str, is_next_page: bool = False,
+                                    soup: Optional[BeautifulSoup] = None) -> Dict[str, Any]:
         """
         解析NexusPHP邀请页面HTML内容
         :param site_name: 站点名称
         :param html_content: HTML内容
         :param is_next_page: 是否是翻页内容，如果是则只提取后宫成员数据
+        :param soup: 已解析的页面对象，传入时直接复用
         :return: 解析结果
         """
         result = {
@@ -408,8 +390,9 @@ class NexusPhpHandler(_ISiteHandler):
             "invitees": []
         }
         
-        # 初始化BeautifulSoup对象
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # 初始化BeautifulSoup对象，翻页内容只需要解析表格
+        if soup is None:
+            soup = make_soup(html_content, parse_only=TABLES_ONLY if is_next_page else None)
         
         # 检查是否有特殊标题，如"我的后宫"或"邀請系統"等
         special_title = False
@@ -850,7 +833,8 @@ class NexusPhpHandler(_ISiteHandler):
                         if username_link:
                             invitee["username"] = username_link.get_text(strip=True)
                             href = username_link.get('href', '')
-                            invitee["profile_url"] = urljoin(soup.url if hasattr(soup, 'url') else "", href) if href else ""
+                            # 页面没有基址可用（soup.url实际是在整个文档中查找<url>标签），直接保留相对链接
+                            invitee["profile_url"] = href
                         else:
                             invitee["username"] = cell_text
                     
@@ -889,30 +873,8 @@ class NexusPhpHandler(_ISiteHandler):
                         
                         # 计算分享率数值
                         try:
-                            if ratio_text == '∞':
-                                invitee["ratio_value"] = 1e20  # 用一个非常大的数代表无限
-                            else:
-                                # 正确处理千分位逗号 - 使用更好的方法完全移除千分位逗号
-                                # 先将所有千分位逗号去掉，然后再处理小数点
-                                normalized_ratio = ratio_text
-                                # 循环处理，直到没有千分位逗号
-                                while ',' in normalized_ratio:
-                                    # 检查每个逗号是否是千分位分隔符
-                                    comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                                    for pos in comma_positions:
-                                        # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                                        if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                                            normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                                            normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                                            break
-                                    else:
-                                        # 如果没有找到千分位逗号，退出循环
-                                        break
-                                
-                                # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                                normalized_ratio = normalized_ratio.replace(',', '.')
-                                invitee["ratio_value"] = float(normalized_ratio)
-                        except (ValueError, TypeError):
+                            invitee["ratio_value"] = parse_ratio(ratio_text)
+                        except ValueError:
                             invitee["ratio_value"] = 0
                             logger.warning(f"无法解析分享率: {ratio_text}")
                     
@@ -971,62 +933,6 @@ class NexusPhpHandler(_ISiteHandler):
                 if "status" not in invitee:
                     invitee["status"] = "已禁用" if is_banned else "已确认"
                 
-                # 检查是否为无数据用户（上传和下载都为0）
-                is_no_data = False
-                if "uploaded" in invitee and "downloaded" in invitee:
-                    # 字符串判断
-                    if isinstance(invitee["uploaded"], str) and isinstance(invitee["downloaded"], str):
-                        is_no_data = (invitee["uploaded"] == '0' or invitee["uploaded"] == '0.00 KB' or 
-                                    invitee["uploaded"].lower() == '0b') and \
-                                    (invitee["downloaded"] == '0' or invitee["downloaded"] == '0.00 KB' or 
-                                    invitee["downloaded"].lower() == '0b')
-                    # 数值判断
-                    elif isinstance(invitee["uploaded"], (int, float)) and isinstance(invitee["downloaded"], (int, float)):
-                        is_no_data = invitee["uploaded"] == 0 and invitee["downloaded"] == 0
-
-                # 添加数据状态标记
-                if is_no_data:
-                    invitee["data_status"] = "无数据"
-                
-                # 计算分享率健康状态
-                if "ratio_value" in invitee:
-                    if is_no_data:
-                        invitee["ratio_health"] = "neutral"
-                        invitee["ratio_label"] = ["无数据", "grey"]
-                    elif invitee["ratio_value"] >= 1e20:
-                        invitee["ratio_health"] = "excellent"
-                    elif invitee["ratio_value"] >= 1.0:
-                        invitee["ratio_health"] = "good"
-                    elif invitee["ratio_value"] >= 0.5:
-                        invitee["ratio_health"] = "warning"
-                    else:
-                        invitee["ratio_health"] = "danger"
-                else:
-                    # 处理没有ratio_value的情况
-                    if is_no_data:
-                        invitee["ratio_health"] = "neutral" 
-                        invitee["ratio_label"] = ["无数据", "grey"]
-                    elif "ratio" in invitee and invitee["ratio"] == "∞":
-                        invitee["ratio_health"] = "excellent"
-                    else:
-                        invitee["ratio_health"] = "unknown"
-                
-                # 设置分享率标签
-                if "ratio_label" not in invitee:
-                    if "ratio_health" in invitee:
-                        if invitee["ratio_health"] == "excellent":
-                            invitee["ratio_label"] = ["无限", "green"]
-                        elif invitee["ratio_health"] == "good":
-                            invitee["ratio_label"] = ["良好", "green"]
-                        elif invitee["ratio_health"] == "warning":
-                            invitee["ratio_label"] = ["较低", "orange"]
-                        elif invitee["ratio_health"] == "danger":
-                            invitee["ratio_label"] = ["危险", "red"]
-                        elif invitee["ratio_health"] == "neutral":
-                            invitee["ratio_label"] = ["无数据", "grey"]
-                        else:
-                            invitee["ratio_label"] = ["未知", "grey"]
-                
                 # 将解析到的用户添加到列表中
                 if invitee.get("username"):
                     result["invitees"].append(invitee)
@@ -1038,14 +944,48 @@ class NexusPhpHandler(_ISiteHandler):
                 else:
                     logger.debug(f"站点 {site_name} 从首页解析到 {len(result['invitees'])} 个后宫成员")
                 break
-        
+
+        # 整页统一计算无数据状态与分享率健康度
+        classify_invitees(result["invitees"], self.ZERO_SIZES)
         return result
 
-    def _parse_bonus_shop(self, site_name: str, html_content: str) -> Dict[str, Any]:
+    def _fetch_bonus_shop(self, site_name: str, bonus_url: str, session: requests.Session) -> Optional[Dict[str, Any]]:
+        """
+        获取魔力值商店数据，页面未变化时复用缓存，邀请价格在BONUS_PRICE_TTL内只重新解析当前魔力值
+        :param site_name: 站点名称
+        :param bonus_url: 魔力值商店地址
+        :param session: 请求会话
+        :return: 魔力值和邀请价格信息，获取失败时返回None
+        """
+        cache = self.page_cache
+        headers = cache.request_headers(bonus_url) if cache else None
+        response = session.get(bonus_url, headers=headers, timeout=(10, 30))
+        cached = cache.lookup(bonus_url, response) if cache else None
+        if cached is not None:
+            logger.debug(f"站点 {site_name} 魔力值商店页面未变化，复用上次解析结果")
+            return cached
+        if response.status_code != 200:
+            return None
+
+        prices = cache.get_fresh(bonus_url, self.BONUS_PRICE_TTL) if cache else None
+        parse_start = time.monotonic()
+        bonus_data = self._parse_bonus_shop(site_name, response.text, with_prices=prices is None)
+        record_parse((time.monotonic() - parse_start) * 1000)
+        if prices is not None:
+            bonus_data["permanent_invite_price"] = prices["permanent_invite_price"]
+            bonus_data["temporary_invite_price"] = prices["temporary_invite_price"]
+            return bonus_data
+
+        if cache:
+            cache.store(bonus_url, response, bonus_data)
+        return bonus_data
+
+    def _parse_bonus_shop(self, site_name: str, html_content: str, with_prices: bool = True) -> Dict[str, Any]:
         """
         解析魔力值商店页面
         :param site_name: 站点名称
         :param html_content: HTML内容
+        :param with_prices: 是否解析邀请价格，否则只解析当前魔力值
         :return: 魔力值和邀请价格信息
         """
         result = {
@@ -1056,7 +996,7 @@ class NexusPhpHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # 1. 查找当前魔力值
             # 先尝试从特定HTML元素中提取魔力值
@@ -1332,6 +1272,9 @@ class NexusPhpHandler(_ISiteHandler):
                         except ValueError:
                             continue
             
+            if not with_prices:
+                return result
+
             # 2. 查找邀请价格
             # 查找表格
             tables = soup.select('table')
@@ -1457,115 +1400,25 @@ class NexusPhpHandler(_ISiteHandler):
         """
         计算分享率健康度
         """
-        try:
-            # 优先使用上传下载直接计算分享率（如果都是数值类型）
-            if isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)) and downloaded > 0:
-                ratio = uploaded / downloaded
-                # 使用计算结果生成适当的健康状态和标签
-                return self._get_health_from_ratio_value(ratio)
-                
-            # 检查是否是无数据情况（上传下载都是0）
-            is_no_data = False
-            if isinstance(uploaded, str) and isinstance(downloaded, str):
-                uploaded_zero = uploaded == '0' or uploaded == '' or uploaded == '0.0' or uploaded.lower() == '0b'
-                downloaded_zero = downloaded == '0' or downloaded == '' or downloaded == '0.0' or downloaded.lower() == '0b'
-                is_no_data = uploaded_zero and downloaded_zero
-            elif isinstance(uploaded, (int, float)) and isinstance(downloaded, (int, float)):
-                is_no_data = uploaded == 0 and downloaded == 0
-
-            if is_no_data:
-                return "neutral", ["无数据", "text-grey"]
-                
-            # 处理无限分享率情况 - 增强检测逻辑
-            if not ratio_str:
-                return "neutral", ["无效", "text-grey"]
-                
-            # 统一处理所有表示无限的情况，忽略大小写
-            if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-                return "excellent", ["分享率无限", "text-success"]
+        return ratio_health(ratio_str, uploaded, downloaded)
 
-            # 标准化分享率字符串 - 正确处理千分位逗号
-            try:
-                # 使用更好的方法完全移除千分位逗号
-                normalized_ratio = ratio_str
-                # 循环处理，直到没有千分位逗号
-                while ',' in normalized_ratio:
-                    # 检查每个逗号是否是千分位分隔符
-                    comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                    for pos in comma_positions:
-                        # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                        if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                            normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                            normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                            break
-                    else:
-                        # 如果没有找到千分位逗号，退出循环
-                        break
-                
-                # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-                normalized_ratio = normalized_ratio.replace(',', '.')
-                ratio = float(normalized_ratio)
-                return self._get_health_from_ratio_value(ratio)
-            except (ValueError, TypeError) as e:
-                logger.error(f"分享率转换错误: {ratio_str}, 错误: {str(e)}")
-                return "neutral", ["无效", "text-grey"]
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"分享率计算错误: {str(e)}")
-            return "neutral", ["无效", "text-grey"]
-            
     def _get_health_from_ratio_value(self, ratio):
         """
         根据分享率数值获取健康状态和标签
         """
-        # 分享率健康度判断
-        if ratio >= 4.0:
-            return "excellent", ["极好", "text-success"]
-        elif ratio >= 2.0:
-            return "good", ["良好", "text-success"]
-        elif ratio >= 1.0:
-            return "good", ["正常", "text-success"]
-        elif ratio > 0:
-            return "warning" if ratio >= 0.4 else "danger", ["较低", "text-warning"] if ratio >= 0.4 else ["危险", "text-error"]
-        else:
-            return "neutral", ["无数据", "text-grey"]
+        return health_from_ratio(ratio)
 
     def _check_ratio(self, row_data, row_html):
         """
         检查分享率是否满足条件
         """
         ratio_str = row_data.get("ratio") or ""
-        
-        # 处理无限分享率情况
-        if ratio_str == '∞' or ratio_str.lower() in ['inf.', 'inf', 'infinite', '无限']:
-            return True
-
         try:
-            # 标准化字符串 - 正确处理千分位逗号
-            # 使用更好的方法完全移除千分位逗号
-            normalized_ratio = ratio_str
-            # 循环处理，直到没有千分位逗号
-            while ',' in normalized_ratio:
-                # 检查每个逗号是否是千分位分隔符
-                comma_positions = [pos for pos, char in enumerate(normalized_ratio) if char == ',']
-                for pos in comma_positions:
-                    # 如果逗号后面是数字，且前面也是数字，则视为千分位逗号
-                    if (pos > 0 and pos < len(normalized_ratio) - 1 and 
-                        normalized_ratio[pos-1].isdigit() and normalized_ratio[pos+1].isdigit()):
-                        normalized_ratio = normalized_ratio[:pos] + normalized_ratio[pos+1:]
-                        break
-                else:
-                    # 如果没有找到千分位逗号，退出循环
-                    break
-            
-            # 最后，将任何剩余的逗号替换为小数点（可能是小数点表示）
-            normalized_ratio = normalized_ratio.replace(',', '.')
-            
-            ratio = float(normalized_ratio) if normalized_ratio else 0
+            ratio = parse_ratio(ratio_str) if ratio_str else 0
             min_ratio = self.config.get("min_ratio", 0.5)
             if ratio < min_ratio:
                 return False
             return True
-        except (ValueError, TypeError):
+        except ValueError:
             # 转换失败时也返回True，避免误判
             return True
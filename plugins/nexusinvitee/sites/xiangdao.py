@@ -6,10 +6,11 @@ from typing import Dict, Any, List, Optional
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
 
 from app.log import logger
 from plugins.nexusinvitee.sites import _ISiteHandler
+from plugins.nexusinvitee.parsing import make_soup
+from plugins.nexusinvitee.paginator import InviteePaginator
 
 
 class XiangdaoHandler(_ISiteHandler):
@@ -118,52 +119,19 @@ class XiangdaoHandler(_ISiteHandler):
             invitee_result = self._parse_xiangdao_invitee_page(site_name, site_url, invitee_response.text)
             result["invitees"] = invitee_result["invitees"]
             
-            # 检查第一页后宫成员数量，如果少于50人，则不再翻页
-            if len(result["invitees"]) < 50:
-                logger.info(f"站点 {site_name} 首页后宫成员数量少于50人({len(result['invitees'])}人)，不再查找后续页面")
-                # 如果成功解析到后宫成员，记录总数
-                if result["invitees"]:
-                    logger.info(f"站点 {site_name} 共解析到 {len(result['invitees'])} 个后宫成员")
-            else:
-                # 尝试获取更多页面的后宫成员
-                next_page = 1  # 从第二页开始，因为第一页已经解析过了
-                max_pages = 100  # 防止无限循环
-                
-                # 继续获取后续页面，直到没有更多数据或达到最大页数
-                while next_page < max_pages:
-                    next_page_url = urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={next_page}")
-                    logger.info(f"站点 {site_name} 正在获取第 {next_page+1} 页后宫成员数据: {next_page_url}")
-                    
-                    try:
-                        next_response = session.get(next_page_url, timeout=(10, 30))
-                        next_response.raise_for_status()
-                        
-                        # 解析下一页数据
-                        next_page_result = self._parse_xiangdao_invitee_page(site_name, site_url, next_response.text)
-                        
-                        # 如果没有找到任何后宫成员，说明已到达最后一页
-                        if not next_page_result["invitees"]:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页没有后宫成员数据，停止获取")
-                            break
-                        
-                        # 如果当前页面后宫成员少于50人，默认认为没有下一页，避免错误进入下一页
-                        if len(next_page_result["invitees"]) < 50:
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页后宫成员数量少于50人({len(next_page_result['invitees'])}人)，默认没有下一页")
-                            # 将当前页数据合并到结果中后退出循环
-                            result["invitees"].extend(next_page_result["invitees"])
-                            logger.info(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                            break
-                        
-                        # 将下一页的后宫成员添加到结果中
-                        result["invitees"].extend(next_page_result["invitees"])
-                        logger.info(f"站点 {site_name} 第 {next_page+1} 页解析到 {len(next_page_result['invitees'])} 个后宫成员")
-                        
-                        # 继续下一页
-                        next_page += 1
-                        
-                    except Exception as e:
-                        logger.warning(f"站点 {site_name} 获取第 {next_page+1} 页数据失败: {str(e)}")
-                        break
+            # 获取后续页面的后宫成员
+            paginator = InviteePaginator(
+                session, site_name,
+                page_url=lambda page: urljoin(site_url, f"invite.php?id={user_id}&menu=invitee&page={page}"),
+                parse_page=lambda html: self._parse_xiangdao_invitee_page(site_name, site_url, html)["invitees"],
+                page_cache=self.page_cache,
+                known_invitees=self.known_invitees
+            )
+            result["invitees"].extend(paginator.collect(invitee_response.text, result["invitees"]))
+            result["incremental"] = paginator.stopped_early
+            result["reused_invitees"] = paginator.reused_count
+            if result["invitees"]:
+                logger.info(f"站点 {site_name} 共解析到 {len(result['invitees'])} 个后宫成员")
             
             # 获取魔力值商店页面，解析魔力值和邀请价格
             try:
@@ -243,7 +211,7 @@ class XiangdaoHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # 查找包含"邀请"的行
             invite_row = soup.select_one('td.rowhead:-soup-contains("邀请") + td.rowfollow')
@@ -301,7 +269,7 @@ class XiangdaoHandler(_ISiteHandler):
         
         try:
             # 初始化BeautifulSoup对象
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content)
             
             # 检查邀请按钮文本，判断邀请权限
             invite_button = soup.select_one('form[action*="invite.php"] input[type="submit"]')
@@ -342,7 +310,7 @@ class XiangdaoHandler(_ISiteHandler):
         }
         
         # 初始化BeautifulSoup对象
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         
         # 查找后宫用户表格
         invitee_table = soup.select_one('table[border="1"]')
@@ -554,7 +522,7 @@ class XiangdaoHandler(_ISiteHandler):
         }
         
         # 初始化BeautifulSoup对象
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = make_soup(html_content)
         
         try:
             # 1. 查找当前魔力值 - 象岛特定格式
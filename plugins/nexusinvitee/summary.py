@@ -0,0 +1,97 @@
+"""
+统计汇总模块
+
+站点写入时计算一次站点汇总，全局汇总由各站点汇总相加得到，读取方无需再遍历全部后宫成员
+"""
+from typing import Any, Dict, Iterable, List
+
+from plugins.nexusinvitee.diff import is_banned
+from plugins.nexusinvitee.normalize import parse_ratio
+
+# 汇总字段
+SUMMARY_FIELDS = ("invitees", "banned", "low_ratio", "no_data", "permanent_invites", "temporary_invites")
+
+# 兼容旧数据结构的取值路径
+_DATA_PATHS = (
+    (),
+    ("data",),
+    ("data", "data"),
+)
+
+
+def _find(site_data: Dict[str, Any], key: str, default: Any) -> Any:
+    """
+    依次从各层数据结构中查找字段，返回第一个非空值
+    """
+    for path in _DATA_PATHS:
+        current = site_data
+        for part in path:
+            current = current.get(part) if isinstance(current, dict) else None
+        value = current.get(key) if isinstance(current, dict) else None
+        if value and isinstance(value, type(default)):
+            return value
+    return default
+
+
+def _is_low_ratio(invitee: Dict[str, Any]) -> bool:
+    """
+    是否低分享率：优先使用ratio_health，没有健康状态的站点按分享率数值判断
+    """
+    health = invitee.get("ratio_health")
+    if health:
+        return health in ("warning", "danger")
+    try:
+        ratio = parse_ratio(str(invitee.get("ratio") or "0"))
+    except ValueError:
+        return False
+    return 0 < ratio < 1
+
+
+def count_invitees(invitees: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    统计后宫成员状态
+    :param invitees: 后宫成员列表
+    :return: 总人数、禁用、低分享率、无数据人数
+    """
+    banned = low_ratio = no_data = 0
+    for invitee in invitees:
+        if is_banned(invitee):
+            banned += 1
+        if invitee.get("ratio_health") == "neutral":
+            no_data += 1
+        elif _is_low_ratio(invitee):
+            low_ratio += 1
+    return {
+        "invitees": len(invitees),
+        "banned": banned,
+        "low_ratio": low_ratio,
+        "no_data": no_data
+    }
+
+
+def summarize_site(site_data: Dict[str, Any]) -> Dict[str, int]:
+    """
+    计算单个站点的汇总
+    :param site_data: 站点数据
+    :return: 汇总数据
+    """
+    invite_status = _find(site_data or {}, "invite_status", {})
+    summary = count_invitees(_find(site_data or {}, "invitees", []))
+    summary["permanent_invites"] = int(invite_status.get("permanent_count", 0) or 0)
+    summary["temporary_invites"] = int(invite_status.get("temporary_count", 0) or 0)
+    return summary
+
+
+def merge_summaries(summaries: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """
+    合并多个站点的汇总
+    :param summaries: 站点汇总
+    :return: 全局汇总，额外包含站点数
+    """
+    total = dict.fromkeys(SUMMARY_FIELDS, 0)
+    total["sites"] = 0
+    for summary in summaries:
+        total["sites"] += 1
+        for field in SUMMARY_FIELDS:
+            total[field] += summary.get(field, 0)
+    return total
@@ -1,5 +1,4 @@
 import datetime
-import hashlib
 import os
 import re
 import threading
@@ -20,6 +19,11 @@ from app.plugins import _PluginBase
 from app.schemas.types import EventType, NotificationType
 from app.utils.system import SystemUtils
 
+from plugins.smarthardlink.dedupe import MIB, StagedHasher, bucket_by_size, full_digest, same_content
+from plugins.smarthardlink.hash_index import HashIndex
+from plugins.smarthardlink.hash_pool import DevicePool, ReadMeter, parse_device_workers
+from plugins.smarthardlink.scanner import scan_files
+
 lock = threading.Lock()
 
 
@@ -31,7 +35,7 @@ class smarthardlink(_PluginBase):
     # 插件图标
     plugin_icon = "https://raw.githubusercontent.com/madrays/MoviePilot-Plugins/main/icons/hardlink.png"
     # 插件版本
-    plugin_version = "1.0.5"
+    plugin_version = "1.1.0"
     # 插件作者
     plugin_author = "madrays"
     # 作者主页
@@ -54,12 +58,23 @@ class smarthardlink(_PluginBase):
     _exclude_extensions = ""
     _exclude_keywords = ""
     _hash_buffer_size = 65536  # 计算哈希时的缓冲区大小，默认64KB
+    _partial_hash_mb = 4  # 部分摘要阶段头尾各读取的大小，单位MiB，0表示直接计算完整哈希
+    _partial_samples = 3  # 部分摘要阶段中间采样窗口数
+    _verify_content = False  # 创建硬链接前逐字节比对确认
+    _hash_workers = 1  # 每个设备同时读取的文件数
+    _device_workers = ""  # 按路径单独配置所在设备的并发数，每行“路径:并发数”
+    _max_read_mbps = 0  # 全局读取速度上限，单位MB/s，0表示不限速
     _dry_run = True  # 默认为试运行模式，不实际创建硬链接
     _hash_cache = {}  # 保存文件哈希值的缓存
     _process_count = 0  # 处理的文件计数
     _hardlink_count = 0  # 创建的硬链接计数
     _saved_space = 0  # 节省的空间统计，单位字节
     _skipped_hardlinks_count = 0 # 新增：跳过的已存在硬链接计数
+    _hash_skipped_bytes = 0  # 大小唯一、无需读取的字节数
+    _read_stats = {}  # 各阶段读取的字节数
+    _index_hits = 0  # 直接使用哈希索引、未读取内容的文件数
+    _read_meter: Optional[ReadMeter] = None  # 最近一次扫描的读取计量器
+    _scan_running = False  # 是否正在扫描
 
     # 退出事件
     _event = threading.Event()
@@ -99,6 +114,34 @@ class smarthardlink(_PluginBase):
                 logger.warning(f"无法将配置中的 hash_buffer_size '{hash_buffer_size_val}' 解析为整数，使用默认值 65536")
                 self._hash_buffer_size = 65536
             # --- 加固结束 ---
+            # --- 分阶段哈希配置 ---
+            partial_hash_mb_val = config.get("partial_hash_mb")
+            try:
+                self._partial_hash_mb = max(0, int(partial_hash_mb_val)) if partial_hash_mb_val not in (None, "") else 4
+            except (ValueError, TypeError):
+                logger.warning(f"无法将配置中的 partial_hash_mb '{partial_hash_mb_val}' 解析为整数，使用默认值 4")
+                self._partial_hash_mb = 4
+            partial_samples_val = config.get("partial_samples")
+            try:
+                self._partial_samples = max(0, int(partial_samples_val)) if partial_samples_val not in (None, "") else 3
+            except (ValueError, TypeError):
+                logger.warning(f"无法将配置中的 partial_samples '{partial_samples_val}' 解析为整数，使用默认值 3")
+                self._partial_samples = 3
+            self._verify_content = bool(config.get("verify_content"))
+            # --- 并行读取及限速配置 ---
+            hash_workers_val = config.get("hash_workers")
+            try:
+                self._hash_workers = max(1, int(hash_workers_val)) if hash_workers_val not in (None, "") else 1
+            except (ValueError, TypeError):
+                logger.warning(f"无法将配置中的 hash_workers '{hash_workers_val}' 解析为整数，使用默认值 1")
+                self._hash_workers = 1
+            self._device_workers = config.get("device_workers") or ""
+            max_read_mbps_val = config.get("max_read_mbps")
+            try:
+                self._max_read_mbps = max(0, int(max_read_mbps_val)) if max_read_mbps_val not in (None, "") else 0
+            except (ValueError, TypeError):
+                logger.warning(f"无法将配置中的 max_read_mbps '{max_read_mbps_val}' 解析为整数，使用默认值 0")
+                self._max_read_mbps = 0
             self._dry_run = bool(config.get("dry_run"))
 
         # 停止现有任务
@@ -143,6 +186,12 @@ class smarthardlink(_PluginBase):
                 "exclude_extensions": self._exclude_extensions,
                 "exclude_keywords": self._exclude_keywords,
                 "hash_buffer_size": self._hash_buffer_size,
+                "partial_hash_mb": self._partial_hash_mb,
+                "partial_samples": self._partial_samples,
+                "verify_content": self._verify_content,
+                "hash_workers": self._hash_workers,
+                "device_workers": self._device_workers,
+                "max_read_mbps": self._max_read_mbps,
                 "dry_run": self._dry_run,
             }
         )
@@ -226,30 +275,41 @@ class smarthardlink(_PluginBase):
         else:
             return f"{size_bytes / (1024 * 1024 * 1024):.2f} GB"
 
+    def _format_read_stats(self) -> str:
+        """
+        格式化各阶段读取量
+        """
+        text = (f"采样 {self._format_size(self._read_stats.get('partial', 0))} / "
+                f"完整 {self._format_size(self._read_stats.get('full', 0))}")
+        if self._verify_content:
+            text += f" / 比对 {self._format_size(self._read_stats.get('verify', 0))}"
+        if self._index_hits:
+            text += f"（索引命中 {self._index_hits} 次）"
+        return text
+
     def calculate_file_hash(self, file_path):
         """
         计算文件的SHA1哈希值
         """
+        return self._hash_file(file_path)[0]
+
+    def _hash_file(self, file_path) -> Tuple[Optional[str], int]:
+        """
+        计算文件的SHA1哈希值
+        :return: (哈希值, 读取的字节数)，失败时哈希值为None
+        """
         # 检查缓存
         if file_path in self._hash_cache:
-            return self._hash_cache[file_path]
+            return self._hash_cache[file_path], 0
 
         try:
-            hash_sha1 = hashlib.sha1()
-            with open(file_path, "rb") as f:
-                while True:
-                    data = f.read(self._hash_buffer_size)
-                    if not data:
-                        break
-                    hash_sha1.update(data)
-            
-            file_hash = hash_sha1.hexdigest()
+            file_hash, read = full_digest(file_path, self._hash_buffer_size, self._read_meter)
             # 保存到缓存
             self._hash_cache[file_path] = file_hash
-            return file_hash
+            return file_hash, read
         except Exception as e:
             logger.error(f"计算文件 {file_path} 哈希值失败: {str(e)}")
-            return None
+            return None, 0
 
     def is_excluded(self, file_path: str) -> bool:
         """
@@ -276,6 +336,16 @@ class smarthardlink(_PluginBase):
 
         return False
 
+    def _is_excluded_dir(self, dir_path: str) -> bool:
+        """
+        检查目录是否位于排除目录下，位于排除目录下的目录无需遍历
+        """
+        if self._exclude_dirs:
+            for exclude_dir in self._exclude_dirs.split("\n"):
+                if exclude_dir and dir_path.startswith(exclude_dir):
+                    return True
+        return False
+
     def _save_link_history(self, summary: Dict[str, Any]):
         """
         保存硬链接操作历史记录
@@ -308,6 +378,11 @@ class smarthardlink(_PluginBase):
             self._saved_space = 0
             self._hash_cache = {}
             self._skipped_hardlinks_count = 0 # 重置跳过计数
+            self._hash_skipped_bytes = 0
+            self._read_stats = {"partial": 0, "full": 0, "verify": 0}
+            self._index_hits = 0
+            self._read_meter = ReadMeter(self._max_read_mbps)
+            self._scan_running = True
             
             logger.info("开始扫描目录并处理重复文件 ...")
             logger.warning("提醒：本插件仍处于开发试验阶段，请确保数据安全")
@@ -337,7 +412,6 @@ class smarthardlink(_PluginBase):
             scan_dirs = self._scan_dirs.split("\n")
             
             # 第一步：收集所有文件并计算哈希值
-            file_hashes = {}  # {hash: [(file_path, file_size), ...]}
             all_files = []  # 存储所有符合条件的文件路径和大小
             
             # 首先收集所有文件信息，避免在遍历时计算哈希
@@ -350,34 +424,23 @@ class smarthardlink(_PluginBase):
                 file_count = 0
                 
                 try:
-                    for root, dirs, files in os.walk(scan_dir):
+                    # 每个文件只stat一次，大小、inode等信息随文件贯穿后续哈希与链接阶段
+                    for entry in scan_files(scan_dir, skip_dir=self._is_excluded_dir):
+                        file_count += 1
                         # 定期报告进度
-                        if file_count > 0 and file_count % 1000 == 0:
+                        if file_count % 1000 == 0:
                             logger.info(f"目录 {scan_dir} 已发现 {file_count} 个文件")
                             
-                        for file_name in files:
-                            file_count += 1
-                            file_path = os.path.join(root, file_name)
+                        # 检查排除条件
+                        if self.is_excluded(entry.path):
+                            continue
+                            
+                        # 检查文件大小
+                        if entry.size < self._min_size * 1024:  # 转换为字节
+                            continue
                             
-                            # 跳过符号链接
-                            if os.path.islink(file_path):
-                                continue
-                                
-                            # 检查排除条件
-                            if self.is_excluded(file_path):
-                                continue
-                                
-                            try:
-                                # 检查文件大小
-                                file_size = os.path.getsize(file_path)
-                                if file_size < self._min_size * 1024:  # 转换为字节
-                                    continue
-                                    
-                                # 添加到待处理文件列表
-                                all_files.append((file_path, file_size))
-                                
-                            except Exception as e:
-                                logger.error(f"获取文件信息失败 {file_path}: {str(e)}")
+                        # 添加到待处理文件列表
+                        all_files.append(entry)
                     
                     logger.info(f"目录 {scan_dir} 扫描完成，共发现 {file_count} 个文件")
                 except Exception as e:
@@ -387,29 +450,41 @@ class smarthardlink(_PluginBase):
             total_files = len(all_files)
             logger.info(f"符合条件的文件总数: {total_files}")
             
-            # 根据文件大小排序，优先处理大文件，可以更快发现重复文件节省空间
-            all_files.sort(key=lambda x: x[1], reverse=True)
+            # 按文件大小分组，大小唯一的文件不可能重复，无需计算哈希
+            size_groups, size_stats = bucket_by_size(all_files)
+            self._process_count = total_files
+            self._hash_skipped_bytes = size_stats["skipped_bytes"]
+            logger.info(f"按大小分组：{size_stats['skipped']} 个文件大小唯一，跳过读取 "
+                        f"{self._format_size(size_stats['skipped_bytes'])}；"
+                        f"{size_stats['candidates']} 个文件需计算哈希，共 {self._format_size(size_stats['candidate_bytes'])}")
             
-            # 处理文件并计算哈希值
-            for idx, (file_path, file_size) in enumerate(all_files):
-                # 定期报告进度
-                if idx > 0 and (idx % 100 == 0 or idx == total_files - 1):
-                    logger.info(f"已处理 {idx}/{total_files} 个文件 ({(idx/total_files*100):.1f}%)")
-                
-                try:
-                    # 计算哈希值
-                    file_hash = self.calculate_file_hash(file_path)
-                    if not file_hash:
-                        continue
-                        
-                    # 记录文件信息
-                    if file_hash not in file_hashes:
-                        file_hashes[file_hash] = []
-                    file_hashes[file_hash].append((file_path, file_size))
-                    
-                    self._process_count += 1
-                except Exception as e:
-                    logger.error(f"处理文件 {file_path} 时出错: {str(e)}")
+            # 分阶段计算大小冲突文件的哈希值：部分摘要仍相同的文件才计算完整哈希
+            # 分组已按文件大小从大到小排列，优先处理大文件
+            def report_progress(hashed: int):
+                if hashed % 100 == 0:
+                    progress = self._read_meter.snapshot()
+                    eta = self._format_time(progress["eta"]) if progress["eta"] is not None else "未知"
+                    logger.info(f"已计算 {hashed} 个文件的完整哈希，速度 {self._format_size(progress['speed'])}/s，"
+                                f"预计剩余 {eta}")
+
+            # 未变化的文件直接使用上次扫描保存的摘要；按设备并行读取，全局限速
+            hash_index = HashIndex(str(self.get_data_path()))
+            hash_pool = DevicePool(self._hash_workers, parse_device_workers(self._device_workers))
+            try:
+                hasher = StagedHasher(self._hash_file, self._hash_buffer_size,
+                                      edge_size=self._partial_hash_mb * MIB, samples=self._partial_samples,
+                                      index=hash_index, pool=hash_pool, meter=self._read_meter)
+                file_hashes = hasher.find(size_groups, progress=report_progress)
+                index_stats = hash_index.pop_stats()
+            finally:
+                hash_pool.shutdown()
+                hash_index.close()
+            self._read_stats.update(partial=hasher.stats["partial_bytes"], full=hasher.stats["full_bytes"])
+            self._index_hits = index_stats["hits"]
+            logger.info(f"部分摘要：{hasher.stats['partial_files']} 个文件，读取 {self._format_size(hasher.stats['partial_bytes'])}，"
+                        f"排除 {hasher.stats['partial_dropped']} 个文件；"
+                        f"完整哈希：{hasher.stats['full_files']} 个文件，读取 {self._format_size(hasher.stats['full_bytes'])}；"
+                        f"哈希索引：命中 {index_stats['hits']} 次，未命中 {index_stats['misses']} 次")
             
             # 找出重复文件的数量
             duplicate_count = sum(len(files) - 1 for files in file_hashes.values() if len(files) > 1)
@@ -425,6 +500,8 @@ class smarthardlink(_PluginBase):
                     f"━━━━━━━━━━\n"
                     f"🕐 时间：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
                     f"📁 已扫描：{self._process_count} 个文件\n"
+                    f"⚡ 大小唯一免读取：{self._format_size(self._hash_skipped_bytes)}\n"
+                    f"📖 读取：{self._format_read_stats()}\n"
                     f"🔍 结果：未发现重复文件\n"
                     f"━━━━━━━━━━"
                 )
@@ -442,37 +519,42 @@ class smarthardlink(_PluginBase):
                     logger.info(f"已处理 {processed_count}/{duplicate_count} 个重复文件 ({(processed_count/duplicate_count*100):.1f}%)")
                     
                 # 按文件路径排序，保持第一个文件作为源文件
-                files.sort(key=lambda x: x[0])
-                source_file, source_size = files[0]
+                files.sort(key=lambda x: x.path)
+                source = files[0]
+                source_file = source.path
                 
                 logger.info(f"发现重复文件组 (SHA1: {file_hash}):")
                 logger.info(f"  保留源文件: {source_file}")
                 
-                # --- 获取源文件的 inode 和设备号 ---
-                try:
-                    source_stat = os.stat(source_file)
-                    source_inode = source_stat.st_ino
-                    source_dev = source_stat.st_dev
-                except OSError as e:
-                    logger.error(f"  无法获取源文件 {source_file} 的状态信息: {e}，跳过此组")
-                    continue
-                # --- 获取结束 ---
-                
-                # 处理重复文件
-                for dup_file, dup_size in files[1:]:
+                # 处理重复文件，设备号与inode使用扫描时的stat结果
+                for dup in files[1:]:
+                    dup_file, dup_size = dup.path, dup.size
                     logger.info(f"  检查重复文件: {dup_file}")
                     
                     # --- 检查是否已是硬链接 ---
-                    try:
-                        dup_stat = os.stat(dup_file)
-                        # 必须在同一设备上且 inode 相同
-                        if dup_stat.st_dev == source_dev and dup_stat.st_ino == source_inode:
-                            logger.info(f"  文件 {dup_file} 已是源文件的硬链接，跳过")
-                            self._skipped_hardlinks_count += 1
-                            continue # 跳过此文件，处理下一个重复文件
-                    except OSError as e:
-                        logger.warning(f"  无法获取重复文件 {dup_file} 的状态信息: {e}，继续尝试硬链接")
+                    # 必须在同一设备上且 inode 相同
+                    if dup.dev == source.dev and dup.ino == source.ino:
+                        logger.info(f"  文件 {dup_file} 已是源文件的硬链接，跳过")
+                        self._skipped_hardlinks_count += 1
+                        continue # 跳过此文件，处理下一个重复文件
                     # --- 检查结束 ---
+
+                    # 创建硬链接前逐字节比对，试运行模式同样比对以保证统计结果一致
+                    if self._verify_content:
+                        try:
+                            self._read_meter.set_phase("verify")
+                            self._read_meter.add_total(2 * dup_size, 2)
+                            identical, read = same_content(source_file, dup_file, self._hash_buffer_size,
+                                                           self._read_meter)
+                            self._read_meter.file_done()
+                            self._read_meter.file_done()
+                            self._read_stats["verify"] += read
+                        except OSError as e:
+                            logger.error(f"  逐字节比对 {dup_file} 失败: {e}，跳过此文件")
+                            continue
+                        if not identical:
+                            logger.warning(f"  文件 {dup_file} 与源文件SHA1相同但内容不同，跳过")
+                            continue
                     
                     if self._dry_run:
                         logger.info(f"  试运行模式：将创建从 {source_file} 到 {dup_file} 的硬链接")
@@ -503,7 +585,7 @@ class smarthardlink(_PluginBase):
                                         # 如果硬链接意外创建成功但后续步骤失败，先删除错误的硬链接
                                         try:
                                             dup_stat_after_link = os.stat(dup_file)
-                                            if dup_stat_after_link.st_dev == source_dev and dup_stat_after_link.st_ino == source_inode:
+                                            if dup_stat_after_link.st_dev == source.dev and dup_stat_after_link.st_ino == source.ino:
                                                 os.remove(dup_file)
                                         except OSError:
                                             pass # 如果获取状态或删除失败，继续尝试恢复
@@ -515,6 +597,8 @@ class smarthardlink(_PluginBase):
                                 logger.error(f"  创建硬链接失败: {str(e)}")
             
             mode_str = "试运行" if self._dry_run else "实际运行"
+            if self._verify_content:
+                logger.info(f"逐字节比对读取 {self._format_size(self._read_stats['verify'])}")
             logger.info(f"处理完成！({mode_str}模式) 共处理文件 {self._process_count} 个，创建硬链接 {self._hardlink_count} 个，节省空间 {self._format_size(self._saved_space)}")
             run_status = f"完成 ({mode_str})"
 
@@ -541,6 +625,7 @@ class smarthardlink(_PluginBase):
                 )
             )
         finally:
+            self._scan_running = False
             # --- 统一保存历史记录 (无论成功或失败) ---
             run_end_time = datetime.datetime.now()
             self._save_link_history({
@@ -551,6 +636,10 @@ class smarthardlink(_PluginBase):
                 "processed_files": self._process_count,
                 "hardlinks_created": self._hardlink_count, # Record count even in dry run
                 "skipped_hardlinks": self._skipped_hardlinks_count, # 添加跳过计数
+                "hash_skipped_bytes": self._hash_skipped_bytes,
+                "hash_skipped_formatted": self._format_size(self._hash_skipped_bytes),
+                "read_bytes": dict(self._read_stats),
+                "index_hits": self._index_hits,
                 "space_saved": self._saved_space,
                 "space_saved_formatted": self._format_size(self._saved_space), # Record saved space even in dry run
                 "mode": "试运行" if self._dry_run else "实际运行",
@@ -570,6 +659,8 @@ class smarthardlink(_PluginBase):
                 f"━━━━━━━━━━\n"
                 f"🕐 时间：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
                 f"📁 扫描文件：{self._process_count} 个\n"
+                f"⚡ 大小唯一免读取：{self._format_size(self._hash_skipped_bytes)}\n"
+                f"📖 读取：{self._format_read_stats()}\n"
                 f"🔍 重复文件：{self._hardlink_count} 个\n"
                 f"⏭️ 已跳过链接：{self._skipped_hardlinks_count} 个\n"
                 f"💾 可节省空间：{self._format_size(self._saved_space)}\n"
@@ -584,6 +675,8 @@ class smarthardlink(_PluginBase):
                 f"━━━━━━━━━━\n"
                 f"🕐 时间：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
                 f"📁 扫描文件：{self._process_count} 个\n"
+                f"⚡ 大小唯一免读取：{self._format_size(self._hash_skipped_bytes)}\n"
+                f"📖 读取：{self._format_read_stats()}\n"
                 f"🔗 已创建硬链接：{self._hardlink_count} 个\n"
                 f"⏭️ 已跳过链接：{self._skipped_hardlinks_count} 个\n"
                 f"💾 已节省空间：{self._format_size(self._saved_space)}\n"
@@ -632,6 +725,13 @@ class smarthardlink(_PluginBase):
                 "methods": ["GET"],
                 "summary": "智能硬链接扫描",
                 "description": "扫描目录并处理重复文件",
+            },
+            {
+                "path": "/hash_progress",
+                "endpoint": self.api_progress,
+                "methods": ["GET"],
+                "summary": "哈希计算进度",
+                "description": "获取当前或最近一次扫描的读取吞吐量及预计剩余时间",
             }
         ]
 
@@ -663,6 +763,20 @@ class smarthardlink(_PluginBase):
             "saved_space_formatted": self._format_size(self._saved_space)
         })
 
+    def api_progress(self) -> schemas.Response:
+        """
+        API获取哈希计算进度
+        """
+        if not self._read_meter:
+            return schemas.Response(success=True, data={"running": False})
+        progress = self._read_meter.snapshot()
+        progress.update({
+            "running": self._scan_running,
+            "speed_formatted": f"{self._format_size(progress['speed'])}/s",
+            "eta_formatted": self._format_time(progress["eta"]) if progress["eta"] is not None else "",
+        })
+        return schemas.Response(success=True, data=progress)
+
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         # --- Reverting Switch style and making Alerts more compact --- 
         return [
@@ -848,6 +962,125 @@ class smarthardlink(_PluginBase):
                                     },
                                 ]
                             },
+                            # Staged Hash Row
+                            {
+                                'component': 'VRow',
+                                'class': 'align-center mb-2',
+                                'content': [
+                                    {
+                                        'component': 'VCol',
+                                        'props': {"cols": 12, "sm": 4},
+                                        'content': [
+                                            {
+                                                'component': 'VTextField',
+                                                'props': {
+                                                    'model': 'partial_hash_mb',
+                                                    'label': '采样摘要头尾大小（MiB）',
+                                                    'placeholder': '4',
+                                                    'type': 'number',
+                                                    'hint': '大小相同的文件先读取头尾及中间采样比对，不同才跳过完整哈希。0为直接计算完整哈希',
+                                                    'persistent-hint': True,
+                                                    'variant': 'outlined'
+                                                },
+                                            }
+                                        ],
+                                    },
+                                    {
+                                        'component': 'VCol',
+                                        'props': {"cols": 12, "sm": 4},
+                                        'content': [
+                                            {
+                                                'component': 'VTextField',
+                                                'props': {
+                                                    'model': 'partial_samples',
+                                                    'label': '中间采样数',
+                                                    'placeholder': '3',
+                                                    'type': 'number',
+                                                    'hint': '文件中间均匀读取的采样窗口数，每个窗口1MiB',
+                                                    'persistent-hint': True,
+                                                    'variant': 'outlined'
+                                                },
+                                            }
+                                        ],
+                                    },
+                                    {
+                                        'component': 'VCol',
+                                        'props': {"cols": 12, "sm": 4},
+                                        'content': [
+                                            {
+                                                'component': 'VSwitch',
+                                                'props': {
+                                                    'model': 'verify_content',
+                                                    'label': '链接前逐字节比对',
+                                                    'hint': '创建硬链接前再完整比对一次文件内容，更安全但读取量翻倍',
+                                                    'persistent-hint': True
+                                                },
+                                            }
+                                        ],
+                                    },
+                                ]
+                            },
+                            # Parallel Read Row
+                            {
+                                'component': 'VRow',
+                                'class': 'align-center mb-2',
+                                'content': [
+                                    {
+                                        'component': 'VCol',
+                                        'props': {"cols": 12, "sm": 6},
+                                        'content': [
+                                            {
+                                                'component': 'VTextField',
+                                                'props': {
+                                                    'model': 'hash_workers',
+                                                    'label': '每设备并发读取数',
+                                                    'placeholder': '1',
+                                                    'type': 'number',
+                                                    'hint': '同一磁盘同时读取的文件数。机械硬盘建议1，NVMe或阵列可设为4-8',
+                                                    'persistent-hint': True,
+                                                    'variant': 'outlined'
+                                                },
+                                            }
+                                        ],
+                                    },
+                                    {
+                                        'component': 'VCol',
+                                        'props': {"cols": 12, "sm": 6},
+                                        'content': [
+                                            {
+                                                'component': 'VTextField',
+                                                'props': {
+                                                    'model': 'max_read_mbps',
+                                                    'label': '读取速度上限（MB/s）',
+                                                    'placeholder': '0',
+                                                    'type': 'number',
+                                                    'hint': '所有线程合计的读取速度上限，避免影响媒体服务器播放。0为不限速',
+                                                    'persistent-hint': True,
+                                                    'variant': 'outlined'
+                                                },
+                                            }
+                                        ],
+                                    },
+                                    {
+                                        'component': 'VCol',
+                                        'props': {'cols': 12},
+                                        'content': [
+                                            {
+                                                'component': 'VTextarea',
+                                                'props': {
+                                                    'model': 'device_workers',
+                                                    'label': '按设备设置并发数',
+                                                    'rows': 2,
+                                                    'placeholder': '每行一个，格式：路径:并发数，例如 /mnt/nvme:8',
+                                                    'hint': '路径所在磁盘单独使用的并发读取数，未配置的磁盘使用上方的默认值',
+                                                    'persistent-hint': True,
+                                                    'variant': 'outlined'
+                                                },
+                                            }
+                                        ],
+                                    },
+                                ]
+                            },
                         ]
                     }
                 ]
@@ -1007,6 +1240,12 @@ class smarthardlink(_PluginBase):
             "exclude_extensions": "",
             "exclude_keywords": "",
             "hash_buffer_size": 65536,
+            "partial_hash_mb": 4,
+            "partial_samples": 3,
+            "verify_content": False,
+            "hash_workers": 1,
+            "device_workers": "",
+            "max_read_mbps": 0,
         }
 
     def get_page(self) -> List[dict]:
@@ -1064,6 +1303,7 @@ class smarthardlink(_PluginBase):
             space_saved_fmt = history.get("space_saved_formatted", "0 B")
             skipped_count = history.get("skipped_hardlinks", 0)
             processed_count = history.get("processed_files", 0)
+            hash_skipped_fmt = history.get("hash_skipped_formatted")
             created_count = history.get("hardlinks_created", 0)
             duration_text = history.get("duration", "N/A")
 
@@ -1131,7 +1371,8 @@ class smarthardlink(_PluginBase):
                         'props': {'class': 'text-center text-caption'},
                         'content': [
                              {'component': 'VIcon', 'props': {'icon': 'mdi-file-document-multiple-outline', 'size': 'x-small', 'class': 'mr-1', 'color': 'grey'}},
-                             {'component': 'span', 'text': str(processed_count)}
+                             {'component': 'span', 'text': str(processed_count)},
+                             {'component': 'div', 'props': {'class': 'text-grey'}, 'text': f"免读 {hash_skipped_fmt}"} if hash_skipped_fmt else {'component': 'span'}
                         ]
                     },
                     # 创建链接数
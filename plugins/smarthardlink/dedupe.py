@@ -0,0 +1,337 @@
+"""
+重复文件查找模块
+
+只有大小完全相同的文件才可能重复：先按字节数分组，组内只有一个文件时无需读取任何数据，
+只有大小冲突的文件才进入哈希阶段。
+哈希分阶段进行：先读取文件头尾及中间几个采样窗口计算部分摘要，大小相同的不同编码版本通常在此阶段即被区分；
+部分摘要仍然相同的文件才计算完整SHA1，创建硬链接前还可逐字节比对确认
+"""
+import hashlib
+import os
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.log import logger
+
+MIB = 1024 * 1024
+# 中间采样窗口大小
+SAMPLE_WINDOW = MIB
+
+
+class FileEntry(NamedTuple):
+    """
+    候选文件，设备号、inode及修改时间用于哈希索引，未知时为0
+    """
+    path: str
+    size: int
+    dev: int = 0
+    ino: int = 0
+    mtime_ns: int = 0
+    nlink: int = 1
+
+    @classmethod
+    def from_stat(cls, path: str, file_stat: os.stat_result) -> "FileEntry":
+        """
+        由stat结果创建候选文件
+        :param path: 文件路径
+        :param file_stat: 文件的stat结果
+        :return: 候选文件
+        """
+        return cls(path, file_stat.st_size, file_stat.st_dev, file_stat.st_ino,
+                   file_stat.st_mtime_ns, file_stat.st_nlink)
+
+
+def bucket_by_size(files: Iterable[FileEntry]) -> Tuple[List[List[FileEntry]], Dict[str, int]]:
+    """
+    按文件大小分组，丢弃大小唯一的文件
+    :param files: 候选文件列表
+    :return: 大小冲突的文件组（按文件大小从大到小排列，优先处理大文件）及分组统计：
+             files 文件总数, candidates 需计算哈希的文件数, candidate_bytes 需读取的字节数,
+             skipped 免读取的文件数, skipped_bytes 免读取的字节数
+    """
+    buckets: Dict[int, List[FileEntry]] = {}
+    for entry in files:
+        buckets.setdefault(entry.size, []).append(entry)
+
+    stats = dict.fromkeys(("files", "candidates", "candidate_bytes", "skipped", "skipped_bytes"), 0)
+    groups = []
+    for size in sorted(buckets, reverse=True):
+        bucket = buckets[size]
+        stats["files"] += len(bucket)
+        if len(bucket) < 2:
+            stats["skipped"] += 1
+            stats["skipped_bytes"] += size
+            continue
+        stats["candidates"] += len(bucket)
+        stats["candidate_bytes"] += size * len(bucket)
+        groups.append(bucket)
+    return groups, stats
+
+
+def _read_into(f, digest, offset: int, length: int, buffer_size: int, meter=None) -> int:
+    """
+    从指定位置读取数据并更新摘要
+    :return: 读取的字节数
+    """
+    f.seek(offset)
+    read = 0
+    while read < length:
+        data = f.read(min(buffer_size, length - read))
+        if not data:
+            break
+        digest.update(data)
+        read += len(data)
+        if meter:
+            meter.consume(len(data))
+    return read
+
+
+def partial_ranges(file_size: int, edge_size: int, samples: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    计算部分摘要读取的区间：文件头、均匀分布的中间采样窗口、文件尾
+    :param file_size: 文件大小
+    :param edge_size: 头尾各读取的字节数
+    :param samples: 中间采样窗口数
+    :return: [(起始位置, 长度)]，读取量不小于文件大小时返回None（直接计算完整哈希）
+    """
+    window = min(SAMPLE_WINDOW, edge_size)
+    if edge_size <= 0 or file_size <= 2 * edge_size + samples * window:
+        return None
+    ranges = [(0, edge_size)]
+    middle = file_size - 2 * edge_size
+    for index in range(1, samples + 1):
+        ranges.append((edge_size + middle * index // (samples + 1) - window // 2, window))
+    ranges.append((file_size - edge_size, edge_size))
+    return ranges
+
+
+def partial_digest(file_path: str, ranges: List[Tuple[int, int]], buffer_size: int,
+                   meter=None) -> Tuple[str, int]:
+    """
+    计算文件部分摘要
+    :param file_path: 文件路径
+    :param ranges: partial_ranges()返回的读取区间
+    :param buffer_size: 读取缓冲区大小
+    :param meter: 读取计量器（ReadMeter），用于限速及进度统计
+    :return: (摘要, 读取的字节数)
+    """
+    digest = hashlib.sha1()
+    read = 0
+    with open(file_path, "rb") as f:
+        for offset, length in ranges:
+            read += _read_into(f, digest, offset, length, buffer_size, meter)
+    return digest.hexdigest(), read
+
+
+def full_digest(file_path: str, buffer_size: int, meter=None) -> Tuple[str, int]:
+    """
+    计算文件完整SHA1
+    :param file_path: 文件路径
+    :param buffer_size: 读取缓冲区大小
+    :param meter: 读取计量器（ReadMeter），用于限速及进度统计
+    :return: (SHA1, 读取的字节数)
+    """
+    digest = hashlib.sha1()
+    read = 0
+    with open(file_path, "rb") as f:
+        while True:
+            data = f.read(buffer_size)
+            if not data:
+                break
+            digest.update(data)
+            read += len(data)
+            if meter:
+                meter.consume(len(data))
+    return digest.hexdigest(), read
+
+
+def same_content(path_a: str, path_b: str, buffer_size: int, meter=None) -> Tuple[bool, int]:
+    """
+    逐字节比对两个文件
+    :return: (内容是否完全相同, 读取的字节数)
+    """
+    read = 0
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        while True:
+            data_a = fa.read(buffer_size)
+            data_b = fb.read(buffer_size)
+            read += len(data_a) + len(data_b)
+            if meter:
+                meter.consume(len(data_a) + len(data_b))
+            if data_a != data_b:
+                return False, read
+            if not data_a:
+                return True, read
+
+
+class StagedHasher:
+    """
+    分阶段查找内容相同的文件：部分摘要 -> 完整哈希
+    """
+
+    def __init__(self, full_hash: Callable[[str], Tuple[Optional[str], int]],
+                 buffer_size: int, edge_size: int = 4 * MIB, samples: int = 3, index=None,
+                 pool=None, meter=None):
+        """
+        :param full_hash: 计算完整哈希的函数，返回(哈希, 读取的字节数)，失败时哈希为None
+        :param buffer_size: 读取缓冲区大小
+        :param edge_size: 部分摘要头尾各读取的字节数，0表示跳过部分摘要阶段
+        :param samples: 部分摘要的中间采样窗口数
+        :param index: 哈希索引（HashIndex），文件未变化时直接使用索引中的摘要
+        :param pool: 按设备划分的读取线程池（DevicePool），为空时在当前线程逐个读取
+        :param meter: 读取计量器（ReadMeter），用于限速及进度统计
+        """
+        self.full_hash = full_hash
+        self.buffer_size = buffer_size
+        self.edge_size = max(0, int(edge_size))
+        self.samples = max(0, int(samples))
+        self.index = index
+        self.pool = pool
+        self.meter = meter
+        # 部分摘要与采样参数相关，参数变化后索引中的部分摘要不再使用
+        self.partial_key = f"{self.edge_size}:{self.samples}:{SAMPLE_WINDOW}"
+        self.stats = dict.fromkeys(("partial_files", "partial_bytes", "partial_dropped",
+                                    "full_files", "full_bytes", "index_hits"), 0)
+
+    def _run(self, func: Callable[[FileEntry], Any], entries: List[FileEntry],
+             done: Callable[[int, Any], None] = None) -> List[Any]:
+        """
+        读取一批文件，有线程池时并行读取
+        :return: 与entries顺序一致的结果列表
+        """
+        if self.meter:
+            self.meter.add_total(0, len(entries))
+        if self.pool:
+            return self.pool.run(func, entries, done)
+        results = []
+        for position, entry in enumerate(entries):
+            results.append(func(entry))
+            if done:
+                done(position, results[-1])
+        return results
+
+    @staticmethod
+    def _content_key(entry: FileEntry):
+        """
+        同一inode的多个硬链接内容必然相同，只需读取一次
+        """
+        return (entry.dev, entry.ino) if entry.ino else entry.path
+
+    def _file_done(self, *_):
+        if self.meter:
+            self.meter.file_done()
+
+    def _partial_digest(self, entry: FileEntry) -> Tuple[Optional[str], int]:
+        ranges = partial_ranges(entry.size, self.edge_size, self.samples)
+        try:
+            return partial_digest(entry.path, ranges, self.buffer_size, self.meter)
+        except OSError as e:
+            logger.error(f"计算文件 {entry.path} 部分摘要失败: {str(e)}")
+            return None, 0
+
+    def _partial_groups(self, size_groups: List[List[FileEntry]]) -> List[List[FileEntry]]:
+        """
+        按部分摘要细分同大小的文件组，丢弃摘要唯一的文件
+        """
+        digests: Dict[Any, str] = {}
+        pending: List[FileEntry] = []
+        seen = set()
+        for group in size_groups:
+            ranges = partial_ranges(group[0].size, self.edge_size, self.samples)
+            if ranges is None:
+                continue
+            for entry in group:
+                if self._content_key(entry) in seen:
+                    continue
+                seen.add(self._content_key(entry))
+                digest = self.index.get_partial(entry, self.partial_key) if self.index else None
+                if digest:
+                    self.stats["index_hits"] += 1
+                    digests[self._content_key(entry)] = digest
+                else:
+                    pending.append(entry)
+                    if self.meter:
+                        self.meter.add_total(sum(length for _, length in ranges))
+        if self.meter:
+            self.meter.set_phase("partial")
+        for entry, (digest, read) in zip(pending, self._run(self._partial_digest, pending, self._file_done)):
+            if not digest:
+                continue
+            self.stats["partial_files"] += 1
+            self.stats["partial_bytes"] += read
+            digests[self._content_key(entry)] = digest
+            if self.index:
+                self.index.put(entry, partial_key=self.partial_key, partial=digest)
+
+        groups = []
+        for group in size_groups:
+            if partial_ranges(group[0].size, self.edge_size, self.samples) is None:
+                groups.append(group)
+                continue
+            by_digest: Dict[str, List[FileEntry]] = {}
+            for entry in group:
+                digest = digests.get(self._content_key(entry))
+                if digest:
+                    by_digest.setdefault(digest, []).append(entry)
+            for entries in by_digest.values():
+                if len(entries) < 2:
+                    self.stats["partial_dropped"] += len(entries)
+                else:
+                    groups.append(entries)
+        return groups
+
+    def find(self, size_groups: Iterable[List[FileEntry]],
+             progress: Callable[[int], None] = None) -> Dict[str, List[FileEntry]]:
+        """
+        查找内容相同的文件
+        :param size_groups: bucket_by_size()返回的同大小文件组
+        :param progress: 每计算完一个完整哈希后调用，参数为已计算的文件数
+        :return: 完整哈希 -> 文件列表，只包含两个及以上文件的组
+        """
+        groups = self._partial_groups(list(size_groups))
+        hashes: Dict[Any, str] = {}
+        pending: List[FileEntry] = []
+        seen = set()
+        for group in groups:
+            for entry in group:
+                if self._content_key(entry) in seen:
+                    continue
+                seen.add(self._content_key(entry))
+                file_hash = self.index.get_full(entry) if self.index else None
+                if file_hash:
+                    self.stats["index_hits"] += 1
+                    hashes[self._content_key(entry)] = file_hash
+                else:
+                    pending.append(entry)
+                    if self.meter:
+                        self.meter.add_total(entry.size)
+        if self.meter:
+            self.meter.set_phase("full")
+        hashed = [0]
+
+        def full_done(position: int, result: Tuple[Optional[str], int]):
+            self._file_done()
+            hashed[0] += 1
+            if progress:
+                progress(hashed[0])
+
+        results = self._run(lambda entry: self.full_hash(entry.path), pending, full_done)
+        for entry, (file_hash, read) in zip(pending, results):
+            self.stats["full_bytes"] += read
+            if not file_hash:
+                continue
+            hashes[self._content_key(entry)] = file_hash
+            if self.index:
+                self.index.put(entry, full=file_hash)
+
+        duplicates: Dict[str, List[FileEntry]] = {}
+        for group in groups:
+            by_hash: Dict[str, List[FileEntry]] = {}
+            for entry in group:
+                file_hash = hashes.get(self._content_key(entry))
+                if file_hash:
+                    self.stats["full_files"] += 1
+                    by_hash.setdefault(file_hash, []).append(entry)
+            for file_hash, entries in by_hash.items():
+                if len(entries) > 1:
+                    duplicates.setdefault(file_hash, []).extend(entries)
+        return duplicates
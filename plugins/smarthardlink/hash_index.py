@@ -0,0 +1,181 @@
+"""
+文件哈希索引模块
+
+按(设备号, inode)保存文件的部分摘要及完整SHA1，同时记录文件大小与修改时间(纳秒)，
+两者均未变化的文件再次扫描时直接使用索引中的摘要，不再读取文件内容。
+inode被复用或文件被修改时记录随之覆盖；长时间未再扫描到的记录在打开索引时清理
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.log import logger
+
+
+class HashIndex:
+    """
+    持久化的文件哈希索引
+    """
+    # 超过该时长未扫描到的记录被清理（秒）
+    RETENTION = 30 * 86400
+    # 累积多少条写入后提交一次
+    FLUSH_SIZE = 500
+
+    def __init__(self, data_path: str):
+        """
+        打开哈希索引
+        :param data_path: 插件数据目录
+        """
+        self.db_file = os.path.join(data_path, "hash_index.db")
+        self._lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._touched: List[Tuple] = []
+        self._stats = {"hits": 0, "misses": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            os.makedirs(data_path, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS file_hash ("
+                    "dev INTEGER NOT NULL, "
+                    "ino INTEGER NOT NULL, "
+                    "size INTEGER NOT NULL, "
+                    "mtime_ns INTEGER NOT NULL, "
+                    "partial_key TEXT, "
+                    "partial TEXT, "
+                    "full TEXT, "
+                    "seen_at INTEGER NOT NULL, "
+                    "PRIMARY KEY (dev, ino))"
+                )
+                pruned = self._conn.execute("DELETE FROM file_hash WHERE seen_at < ?",
+                                            (int(time.time()) - self.RETENTION,)).rowcount
+            if pruned:
+                logger.info(f"哈希索引清理 {pruned} 条长期未扫描到的记录")
+        except Exception as e:
+            logger.error(f"打开哈希索引失败，本次不使用索引: {str(e)}")
+            self._conn = None
+
+    @staticmethod
+    def _indexable(entry) -> bool:
+        return bool(entry.dev or entry.ino)
+
+    def get(self, entry) -> Optional[Dict[str, Any]]:
+        """
+        获取文件的索引记录
+        :param entry: 候选文件（FileEntry）
+        :return: {"partial_key", "partial", "full"}，不存在或文件已变化时返回None
+        """
+        if not self._conn or not self._indexable(entry):
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, partial_key, partial, full FROM file_hash WHERE dev = ? AND ino = ?",
+                    (entry.dev, entry.ino)).fetchone()
+        except Exception as e:
+            logger.error(f"读取哈希索引失败: {str(e)}")
+            return None
+        if not row or row[0] != entry.size or row[1] != entry.mtime_ns:
+            return None
+        return {"partial_key": row[2], "partial": row[3], "full": row[4]}
+
+    def get_partial(self, entry, partial_key: str) -> Optional[str]:
+        """
+        获取与当前采样参数一致的部分摘要
+        :param entry: 候选文件
+        :param partial_key: 采样参数标识
+        :return: 部分摘要
+        """
+        record = self.get(entry)
+        digest = record["partial"] if record and record["partial_key"] == partial_key else None
+        self._count(digest is not None, entry)
+        return digest
+
+    def get_full(self, entry) -> Optional[str]:
+        """
+        获取完整SHA1
+        :param entry: 候选文件
+        :return: SHA1
+        """
+        record = self.get(entry)
+        digest = record["full"] if record else None
+        self._count(digest is not None, entry)
+        return digest
+
+    def put(self, entry, partial_key: Optional[str] = None, partial: Optional[str] = None,
+            full: Optional[str] = None):
+        """
+        保存文件摘要，未传入的摘要保留原值
+        :param entry: 候选文件
+        :param partial_key: 采样参数标识
+        :param partial: 部分摘要
+        :param full: 完整SHA1
+        """
+        if not self._conn or not self._indexable(entry):
+            return
+        with self._lock:
+            self._pending.append((entry.dev, entry.ino, entry.size, entry.mtime_ns,
+                                  partial_key, partial, full, int(time.time())))
+            flush = len(self._pending) >= self.FLUSH_SIZE
+        if flush:
+            self.flush()
+
+    def _count(self, hit: bool, entry):
+        with self._lock:
+            self._stats["hits" if hit else "misses"] += 1
+            if hit:
+                self._touched.append((int(time.time()), entry.dev, entry.ino))
+
+    def flush(self):
+        """
+        提交累积的写入
+        """
+        if not self._conn:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, []
+            touched, self._touched = self._touched, []
+            if not pending and not touched:
+                return
+            try:
+                with self._conn:
+                    # 文件大小或修改时间变化时整行替换，否则只补充新的摘要
+                    self._conn.executemany(
+                        "INSERT INTO file_hash (dev, ino, size, mtime_ns, partial_key, partial, full, seen_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (dev, ino) DO UPDATE SET "
+                        "partial_key = CASE WHEN excluded.partial IS NOT NULL THEN excluded.partial_key "
+                        "WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN partial_key END, "
+                        "partial = CASE WHEN excluded.partial IS NOT NULL THEN excluded.partial "
+                        "WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN partial END, "
+                        "full = CASE WHEN excluded.full IS NOT NULL THEN excluded.full "
+                        "WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns THEN full END, "
+                        "size = excluded.size, mtime_ns = excluded.mtime_ns, seen_at = excluded.seen_at",
+                        pending)
+                    self._conn.executemany("UPDATE file_hash SET seen_at = ? WHERE dev = ? AND ino = ?", touched)
+            except Exception as e:
+                logger.error(f"保存哈希索引失败: {str(e)}")
+
+    def pop_stats(self) -> Dict[str, int]:
+        """
+        取出并清零命中统计
+        :return: {"hits": 命中次数, "misses": 未命中次数}
+        """
+        with self._lock:
+            stats, self._stats = self._stats, dict.fromkeys(self._stats, 0)
+        return stats
+
+    def close(self):
+        """
+        提交写入并关闭索引
+        """
+        self.flush()
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn:
+            conn.close()
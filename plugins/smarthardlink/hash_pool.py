@@ -0,0 +1,174 @@
+"""
+并行哈希模块
+
+按设备号(st_dev)分别建立读取线程池：NVMe或多盘阵列可设置较高的并发数，单块机械硬盘保持1个线程，
+避免并发读取导致磁头来回寻道。hashlib处理较大的缓冲区时会释放GIL，线程即可并行计算。
+所有线程共享同一个读取计量器，按全局MB/s上限限速，避免扫描占满磁盘带宽影响Plex、Jellyfin等播放，
+同时统计读取进度用于计算吞吐量与剩余时间
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.log import logger
+from plugins.smarthardlink.dedupe import MIB
+
+
+class ReadMeter:
+    """
+    读取计量器：全局限速及进度统计，线程安全
+    """
+
+    def __init__(self, max_mbps: float = 0):
+        """
+        :param max_mbps: 全局读取速度上限（MB/s），0表示不限速
+        """
+        self.max_mbps = max(0.0, float(max_mbps or 0))
+        self._rate = self.max_mbps * MIB
+        self._lock = threading.Lock()
+        # 下一次读取允许完成的时间点
+        self._next = time.monotonic()
+        self._started = time.monotonic()
+        self._phase = ""
+        self._bytes_total = 0
+        self._bytes_done = 0
+        self._files_total = 0
+        self._files_done = 0
+
+    def set_phase(self, phase: str):
+        """
+        设置当前阶段，用于进度展示
+        """
+        with self._lock:
+            self._phase = phase
+
+    def add_total(self, size: int, files: int = 0):
+        """
+        增加预计读取量
+        :param size: 预计读取的字节数
+        :param files: 预计读取的文件数
+        """
+        with self._lock:
+            self._bytes_total += size
+            self._files_total += files
+
+    def file_done(self):
+        """
+        记录一个文件读取完成
+        """
+        with self._lock:
+            self._files_done += 1
+
+    def consume(self, size: int):
+        """
+        记录已读取的数据，超出速度上限时等待
+        :param size: 本次读取的字节数
+        """
+        if size <= 0:
+            return
+        with self._lock:
+            self._bytes_done += size
+            if not self._rate:
+                return
+            # 按速度上限为本次读取分配时间片，空闲时间不累积额度
+            now = time.monotonic()
+            self._next = max(self._next, now) + size / self._rate
+            delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取读取进度
+        :return: 阶段、文件数、字节数、平均速度(字节/秒)及预计剩余秒数
+        """
+        with self._lock:
+            elapsed = max(time.monotonic() - self._started, 1e-6)
+            speed = self._bytes_done / elapsed
+            remaining = max(self._bytes_total - self._bytes_done, 0)
+            return {
+                "phase": self._phase,
+                "files_done": self._files_done,
+                "files_total": self._files_total,
+                "bytes_done": self._bytes_done,
+                "bytes_total": self._bytes_total,
+                "elapsed": round(elapsed, 1),
+                "speed": round(speed),
+                "eta": round(remaining / speed, 1) if speed else None,
+                "max_mbps": self.max_mbps,
+            }
+
+
+def parse_device_workers(text: str) -> Dict[int, int]:
+    """
+    解析按路径配置的并发数，每行“路径:并发数”，路径所在设备的所有文件使用该并发数
+    :param text: 配置文本
+    :return: 设备号 -> 并发数
+    """
+    workers: Dict[int, int] = {}
+    for line in (text or "").splitlines():
+        line = line.strip()
+        if not line or ":" not in line:
+            continue
+        path, _, count = line.rpartition(":")
+        try:
+            workers[os.stat(path.strip()).st_dev] = max(1, int(count))
+        except (OSError, ValueError) as e:
+            logger.warning(f"无法解析设备并发配置 '{line}': {str(e)}")
+    return workers
+
+
+class DevicePool:
+    """
+    按设备号划分的读取线程池
+    """
+
+    def __init__(self, default_workers: int = 1, device_workers: Optional[Dict[int, int]] = None):
+        """
+        :param default_workers: 未单独配置的设备的并发数
+        :param device_workers: 设备号 -> 并发数
+        """
+        self.default_workers = max(1, int(default_workers or 1))
+        self.device_workers = device_workers or {}
+        self._executors: Dict[int, ThreadPoolExecutor] = {}
+
+    def _executor(self, dev: int) -> ThreadPoolExecutor:
+        executor = self._executors.get(dev)
+        if executor is None:
+            workers = self.device_workers.get(dev, self.default_workers)
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"hardlink-hash-{dev}")
+            self._executors[dev] = executor
+        return executor
+
+    def run(self, func: Callable[[Any], Any], entries: Sequence[Any],
+            done: Callable[[int, Any], None] = None) -> List[Any]:
+        """
+        并行处理文件，同一设备上的文件受该设备并发数限制
+        :param func: 处理函数，参数为候选文件（需有dev属性）
+        :param entries: 候选文件列表
+        :param done: 每个文件处理完成后在调用线程中回调，参数为文件序号及结果
+        :return: 与entries顺序一致的结果列表
+        """
+        futures: Dict[Future, int] = {
+            self._executor(entry.dev).submit(func, entry): index for index, entry in enumerate(entries)
+        }
+        results: List[Any] = [None] * len(entries)
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = futures[future]
+                results[index] = future.result()
+                if done:
+                    done(index, results[index])
+        return results
+
+    def shutdown(self):
+        """
+        关闭所有线程池
+        """
+        executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
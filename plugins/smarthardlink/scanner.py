@@ -0,0 +1,47 @@
+"""
+目录扫描模块
+
+基于os.scandir遍历目录：目录项类型在多数文件系统上随目录列表一并返回，判断目录及符号链接无需额外的系统调用；
+每个文件只调用一次DirEntry.stat(follow_symlinks=False)，得到的类型、大小、设备号、inode、链接数及修改时间
+随FileEntry贯穿哈希与链接阶段，NFS/SMB挂载的媒体库上不再对同一文件重复stat
+"""
+import os
+import stat
+from typing import Callable, Iterator, Optional
+
+from app.log import logger
+from plugins.smarthardlink.dedupe import FileEntry
+
+
+def scan_files(root: str, skip_dir: Optional[Callable[[str], bool]] = None) -> Iterator[FileEntry]:
+    """
+    遍历目录下的普通文件，不跟随符号链接
+    :param root: 扫描目录
+    :param skip_dir: 判断是否跳过子目录的函数，参数为目录路径
+    :return: 候选文件
+    """
+    stack = [root]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            with os.scandir(dir_path) as entries:
+                subdirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not skip_dir or not skip_dir(entry.path):
+                                subdirs.append(entry.path)
+                            continue
+                        if entry.is_symlink():
+                            continue
+                        file_stat = entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        logger.error(f"获取文件信息失败 {entry.path}: {str(e)}")
+                        continue
+                    if stat.S_ISREG(file_stat.st_mode):
+                        yield FileEntry.from_stat(entry.path, file_stat)
+        except OSError as e:
+            logger.error(f"读取目录 {dir_path} 失败: {str(e)}")
+            continue
+        # 逆序入栈，保持与os.walk相同的自上而下、按目录列表顺序的遍历
+        stack.extend(reversed(subdirs))
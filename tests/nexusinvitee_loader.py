@@ -0,0 +1,27 @@
+import ast
+import logging
+from pathlib import Path
+
+
+PLUGIN_DIR = Path(__file__).parents[1] / "plugins" / "nexusinvitee"
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "nexusinvitee"
+
+
+def load_plugin_module(filename, **namespace):
+    """
+    执行插件模块源码，跳过对MoviePilot主程序及插件内部模块的导入，依赖通过namespace注入
+    """
+    source_path = PLUGIN_DIR / filename
+    module = ast.parse(source_path.read_text(encoding="utf-8"))
+    body = [
+        node
+        for node in module.body
+        if not (isinstance(node, ast.ImportFrom) and (node.module or "").split(".")[0] in ("app", "plugins"))
+    ]
+    namespace.setdefault("logger", logging.getLogger("nexusinvitee-test"))
+    exec(compile(ast.Module(body=body, type_ignores=[]), str(source_path), "exec"), namespace)
+    return namespace
+
+
+def load_fixture(name):
+    return (FIXTURE_DIR / name).read_text(encoding="utf-8")
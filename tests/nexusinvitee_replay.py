@@ -0,0 +1,439 @@
+"""
+离线回放工具：本地假站点服务器 + 刷新流程基准
+
+FakeTracker在本机启动一个HTTP服务器，按请求的Host区分模拟站点，
+用fixtures中保存的页面应答index.php、usercp.php、invite.php（含翻页）、mybonus.php及M-Team API；
+会话挂载的RoutingAdapter把所有站点地址改写到本地服务器，无需网络即可运行站点处理器。
+邀请列表及魔力值商店页面带ETag，支持条件请求。
+run_refresh按插件refresh_all_sites的流程（并发刷新 -> 站点处理器 -> 数据存储 -> 历史记录）刷新模拟站点。
+
+命令行运行基准：
+    python tests/nexusinvitee_replay.py --sites 8 --pages 5 --latency 0.05 --workers 1 4
+"""
+import argparse
+import contextlib
+import json
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from nexusinvitee_loader import load_fixture, load_plugin_module
+
+MTEAM_API_HOST = "api.m-team.cc"
+USER_ID = "123"
+PAGE_SIZE = 50
+# 最后一页fixture的人数
+LAST_PAGE_SIZE = 23
+REPLAY_NEXUSPHP_MODULE = "nexusinvitee_replay_nexusphp"
+
+_invitee_id_pattern = re.compile(r'userdetails\.php\?id=(\d{5,})')
+_page_link_pattern = re.compile(r'(menu=invitee&amp;)page=\d+')
+_page_ranges_pattern = re.compile(r'<br /><b>1&nbsp;-&nbsp;.*?</p>')
+
+LOGIN_PAGE = ('<html><body><form method="post" action="takelogin.php">'
+              '<input name="username" /><input type="password" name="password" /></form></body></html>')
+EMPTY_PAGE = '<html><body><p>没有被邀请者</p></body></html>'
+INDEX_PAGE = ('<html><body><a href="userdetails.php?id={uid}">fixture</a>'
+              '<a href="invite.php?id={uid}">邀请</a></body></html>')
+
+
+def expected_invitees(pages: int) -> int:
+    """
+    模拟站点共有多少后宫成员
+    :param pages: 邀请列表页数
+    """
+    return PAGE_SIZE if pages <= 1 else PAGE_SIZE * (pages - 1) + LAST_PAGE_SIZE
+
+
+class FakeTracker:
+    """
+    本地假站点服务器
+    """
+
+    def __init__(self, latency: float = 0.0, pages: int = 3, etag: bool = True):
+        """
+        :param latency: 每个请求的模拟延迟（秒）
+        :param pages: 默认邀请列表页数
+        :param etag: 是否返回ETag并响应条件请求
+        """
+        self.latency = latency
+        self.pages = pages
+        self.etag = etag
+        self.hits = Counter()
+        self._lock = threading.Lock()
+        self._sites = {}
+        self._page_cache = {}
+        self._server = None
+        self._thread = None
+        self._fixtures = {
+            "first": load_fixture("nexusphp_invite.html"),
+            "middle": load_fixture("nexusphp_invite_page1.html"),
+            "last": load_fixture("nexusphp_invite_page2.html"),
+            "bonus": load_fixture("nexusphp_mybonus.html"),
+            "profile": load_fixture("mteam_profile.json"),
+            "history": load_fixture("mteam_invite_history.json"),
+        }
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        tracker = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                tracker._handle(self)
+
+            def do_POST(self):
+                tracker._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def add_nexusphp_site(self, name: str, pages: int = None) -> dict:
+        """
+        添加NexusPHP模拟站点
+        :return: 与SitesHelper格式一致的站点信息
+        """
+        host = f"{name.lower()}.nexusphp.test"
+        self._sites[host] = {"schema": "nexusphp", "pages": pages or self.pages}
+        return {"id": name, "name": name, "url": f"https://{host}/", "cookie": "uid=123; pass=fixture",
+                "ua": "Mozilla/5.0 (replay)"}
+
+    def add_mteam_site(self, name: str = "M-Team") -> dict:
+        """
+        添加M-Team模拟站点，API请求由api.m-team.cc应答
+        """
+        self._sites["kp.m-team.cc"] = {"schema": "mteam"}
+        self._sites[MTEAM_API_HOST] = {"schema": "mteam-api"}
+        return {"id": name, "name": name, "url": "https://kp.m-team.cc/", "apikey": "fixture-key",
+                "token": "fixture-token", "ua": "Mozilla/5.0 (replay)"}
+
+    def session(self, session: requests.Session = None) -> requests.Session:
+        """
+        挂载路由到本地服务器的适配器
+        :param session: 要挂载的会话，默认新建
+        """
+        session = session if session is not None else requests.Session()
+        adapter = RoutingAdapter(self.port)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @staticmethod
+    def page_ranges(pages: int, total: int = None) -> str:
+        """
+        生成首页分页栏中各页的成员序号范围，与模拟站点的成员数一致
+        :param total: 显示的成员总数，默认为实际成员数
+        """
+        total = total if total is not None else expected_invitees(pages)
+        ranges = [f"<b>{start + 1}&nbsp;-&nbsp;{min(start + PAGE_SIZE, total)}</b>"
+                  for start in range(0, total, PAGE_SIZE)]
+        return "<br />" + " | ".join(ranges) + "</p>"
+
+    def invitee_page(self, pages: int, page: int, total: int = None) -> str:
+        """
+        生成第page页邀请列表：首页和末页直接使用fixture，中间页由第二页fixture平移成员ID得到
+        :param total: 首页分页栏显示的成员总数，默认为实际成员数
+        """
+        key = (pages, page, total)
+        html = self._page_cache.get(key)
+        if html is not None:
+            return html
+        if page == 0:
+            html = self._fixtures["first"]
+            if pages > 1:
+                html = _page_link_pattern.sub(rf"\g<1>page={pages - 1}", html)
+            else:
+                html = _page_link_pattern.sub(r"\g<1>", html)
+            html = _page_ranges_pattern.sub(lambda m: self.page_ranges(pages, total), html)
+        elif page >= pages:
+            html = EMPTY_PAGE
+        else:
+            # 第二页fixture的成员ID从10050开始，末页fixture从10100开始
+            template, base = (self._fixtures["last"], 2) if page == pages - 1 else (self._fixtures["middle"], 1)
+            offset = (page - base) * PAGE_SIZE
+            html = _invitee_id_pattern.sub(lambda m: f"userdetails.php?id={int(m.group(1)) + offset}", template)
+        self._page_cache[key] = html
+        return html
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        host = (request.headers.get("Host") or "").split(":")[0].lower()
+        url = urlsplit(request.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with self._lock:
+            self.hits[(host, url.path)] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        site = self._sites.get(host)
+        status, content_type, body, etag = 404, "text/html; charset=utf-8", "Not Found", None
+        if site and site["schema"] == "mteam-api":
+            content_type = "application/json"
+            if url.path == "/api/member/profile":
+                status, body = 200, self._fixtures["profile"]
+            elif url.path == "/api/invite/getUserInviteHistory":
+                status, body = 200, self._fixtures["history"]
+        elif site and site["schema"] == "mteam":
+            status, body = 200, "<html><body>M-Team</body></html>"
+        elif site:
+            status = 200
+            if "uid=" not in (request.headers.get("Cookie") or ""):
+                body = LOGIN_PAGE
+            elif url.path in ("", "/", "/index.php", "/usercp.php"):
+                body = INDEX_PAGE.format(uid=USER_ID)
+            elif url.path == "/mybonus.php":
+                body = self._fixtures["bonus"]
+                etag = "bonus"
+            elif url.path == "/invite.php" and query.get("id") == USER_ID:
+                if query.get("type") == "new":
+                    body = self._fixtures["first"]
+                else:
+                    page = int(query.get("page") or 0)
+                    body = self.invitee_page(site["pages"], page, site.get("total"))
+                    etag = f"invite-{site['pages']}-{page}-{site.get('total')}"
+            else:
+                status, body = 404, "Not Found"
+
+        if etag and self.etag:
+            etag = f'"{etag}"'
+            if request.headers.get("If-None-Match") == etag:
+                status, body = 304, ""
+        data = body.encode("utf-8")
+        request.send_response(status)
+        if etag and self.etag:
+            request.send_header("ETag", etag)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+
+class RoutingAdapter(HTTPAdapter):
+    """
+    把任意站点地址改写到本地服务器，原主机名放在Host头中
+    """
+
+    def __init__(self, port: int, **kwargs):
+        self.port = port
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        request.headers["Host"] = url.hostname
+        request.url = urlunsplit(("http", f"127.0.0.1:{self.port}", url.path or "/", url.query, ""))
+        # 忽略环境变量中的代理
+        kwargs["proxies"] = {}
+        return super().send(request, **kwargs)
+
+
+def load_replay_modules() -> dict:
+    """
+    加载回放所需的插件模块：站点处理器、并发刷新、数据存储、历史记录、性能统计
+    """
+    parsing = load_plugin_module("parsing.py")
+    normalize = load_plugin_module("normalize.py")
+    diff = load_plugin_module("diff.py")
+    summary = load_plugin_module("summary.py", is_banned=diff["is_banned"], parse_ratio=normalize["parse_ratio"])
+    records = load_plugin_module("records.py")
+    metrics = load_plugin_module("metrics.py")
+    page_cache = load_plugin_module("page_cache.py")
+    parse_pool = load_plugin_module("parse_pool.py")
+    paginator = load_plugin_module("paginator.py", bind_site_metrics=metrics["bind_site_metrics"],
+                                   record_parse=metrics["record_parse"],
+                                   PageCache=page_cache["PageCache"])
+    base = load_plugin_module("sites/__init__.py", make_soup=parsing["make_soup"],
+                              size_to_bytes=normalize["size_to_bytes"], ratio_text=normalize["ratio_text"],
+                              PageCache=page_cache["PageCache"], ParsePool=parse_pool["ParsePool"])
+    # 解析池按模块名序列化解析函数及站点处理类，注册为模块后可按名称找到；子进程通过register_replay_modules注册
+    nexusphp = load_plugin_module(
+        "sites/nexusphp.py",
+        __name__=REPLAY_NEXUSPHP_MODULE,
+        _ISiteHandler=base["_ISiteHandler"],
+        make_soup=parsing["make_soup"],
+        TABLES_ONLY=parsing["TABLES_ONLY"],
+        InviteePaginator=paginator["InviteePaginator"],
+        record_parse=metrics["record_parse"],
+        **{name: normalize[name] for name in
+           ("parse_ratio", "ratio_health", "health_from_ratio", "classify_invitees")},
+    )
+    mteam = load_plugin_module(
+        "sites/mteam.py",
+        _ISiteHandler=base["_ISiteHandler"],
+        **{name: normalize[name] for name in ("format_size", "ratio_health", "health_from_ratio")},
+    )
+    module = types.ModuleType(REPLAY_NEXUSPHP_MODULE)
+    module.__dict__.update(nexusphp)
+    sys.modules[REPLAY_NEXUSPHP_MODULE] = module
+    return {
+        "handlers": [mteam["MTeamHandler"], nexusphp["NexusPhpHandler"]],
+        "refresher": load_plugin_module("refresher.py", current_site_metrics=metrics["current_site_metrics"]),
+        "DataManager": load_plugin_module("data.py", diff_invitees=diff["diff_invitees"],
+                                          keyed_invitees=diff["keyed_invitees"],
+                                          summarize_site=summary["summarize_site"],
+                                          merge_summaries=summary["merge_summaries"],
+                                          InviteeRecord=records["InviteeRecord"],
+                                          to_records=records["to_records"])["DataManager"],
+        "HistoryStore": load_plugin_module("history.py", keyed_invitees=diff["keyed_invitees"],
+                                           **{name: normalize[name] for name in
+                                              ("INFINITE_RATIO", "parse_ratio", "size_to_bytes")})["HistoryStore"],
+        "MetricsRecorder": metrics["MetricsRecorder"],
+        "PageCache": page_cache["PageCache"],
+        "ParsePool": parse_pool["ParsePool"],
+    }
+
+
+def register_replay_modules():
+    """
+    解析池子进程初始化：子进程不继承主进程的模块，重新注册回放用的站点处理器模块
+    """
+    if REPLAY_NEXUSPHP_MODULE not in sys.modules:
+        load_replay_modules()
+
+
+def run_refresh(tracker: FakeTracker, sites: list, data_path: str, workers: int = 4,
+                request_interval: float = 0.0, page_cache: bool = False, incremental: bool = False,
+                parse_workers: int = 0, modules: dict = None) -> dict:
+    """
+    按refresh_all_sites的流程刷新模拟站点
+    :param tracker: 已启动的假站点服务器
+    :param sites: 站点信息列表
+    :param data_path: 数据目录
+    :param workers: 并发站点数
+    :param request_interval: 同站请求间隔
+    :param page_cache: 是否使用页面缓存，缓存保存在数据目录中，同一目录再次运行时复用
+    :param incremental: 是否按数据目录中已保存的成员增量翻页
+    :param parse_workers: 解析进程数，0为在请求线程中解析；回放页面较小，开启时所有页面都交给子进程
+    :param modules: load_replay_modules()的返回值，多次运行时可复用
+    :return: 耗时、成功/失败站点、各站点邀请状态原因、成员数及性能统计
+    """
+    modules = modules or load_replay_modules()
+    refresher_module = modules["refresher"]
+    data_manager = modules["DataManager"](data_path)
+    history = modules["HistoryStore"](data_path)
+    recorder = modules["MetricsRecorder"]()
+    throttle = refresher_module["HostThrottle"](request_interval)
+    cache = modules["PageCache"](data_path, "replay") if page_cache else None
+    pool = modules["ParsePool"](parse_workers, min_size=0, initializer=register_replay_modules)
+    pool.start()
+
+    def fetch(site):
+        with recorder.site(site["name"]):
+            handler = next(handler for handler in modules["handlers"] if handler.match(site["url"]))()
+            handler.page_cache = cache
+            handler.parse_pool = pool if pool.enabled else None
+            if incremental:
+                handler.known_invitees = data_manager.get_site_data(site["name"]).get("data", {}).get("invitees")
+            session = tracker.session(refresher_module["ThrottledSession"](throttle))
+            if handler.site_schema != "mteam":
+                session.headers.update({"User-Agent": site["ua"], "Cookie": site["cookie"], "Referer": site["url"]})
+                test_response = session.get(site["url"], timeout=(10, 30))
+                if test_response.status_code >= 400:
+                    return {"error": f"Cookie验证失败，状态码: {test_response.status_code}"}
+            return handler.parse_invite_page(site, session)
+
+    result = {"success": [], "error": {}, "reasons": {}, "incremental": [], "invitees": {}, "recorded": {}}
+    start = time.perf_counter()
+    # M-Team获取用户信息直接使用requests.post，同样路由到本地服务器
+    with mock.patch.object(requests, "post", tracker.session().post), _shutdown(pool):
+        run = recorder.start_run(forced=True)
+        refresher = refresher_module["SiteRefresher"](max_workers=workers, throttle=throttle)
+        for site, site_data in refresher.run(sites, fetch):
+            if "error" in site_data:
+                result["error"][site["name"]] = site_data["error"]
+                continue
+            result["reasons"][site["name"]] = site_data.get("invite_status", {}).get("reason", "")
+            if site_data.pop("incremental", False):
+                result["incremental"].append(site["name"])
+            reused = site_data.pop("reused_invitees", 0)
+            data_manager.update_site_data(site["name"], site_data)
+            invitees = site_data.get("invitees", [])
+            result["recorded"][site["name"]] = history.record(site["name"], invitees[:len(invitees) - reused])
+            result["success"].append(site["name"])
+        recorder.finish_run(run)
+    result["seconds"] = time.perf_counter() - start
+    result["invitees"] = {name: len(record.get("data", {}).get("invitees", []))
+                          for name, record in data_manager.get_site_data().items()}
+    result["summary"] = data_manager.get_summary()
+    result["metrics"] = run
+    result["page_cache"] = cache.pop_stats() if cache else {}
+    result["parse_pool"] = pool.get_stats()
+    return result
+
+
+@contextlib.contextmanager
+def _shutdown(pool):
+    try:
+        yield pool
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后宫管理系统离线刷新基准")
+    parser.add_argument("--sites", type=int, default=8, help="模拟NexusPHP站点数")
+    parser.add_argument("--pages", type=int, default=3, help="每个站点的邀请列表页数")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--interval", type=float, default=0.0, help="同站请求间隔（秒）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="要对比的并发站点数")
+    parser.add_argument("--mteam", action="store_true", help="同时模拟M-Team站点")
+    parser.add_argument("--page-cache", action="store_true", help="使用页面缓存并连续刷新两次")
+    parser.add_argument("--parse-workers", type=int, default=0, help="解析进程数")
+    args = parser.parse_args()
+
+    modules = load_replay_modules()
+    with FakeTracker(latency=args.latency, pages=args.pages) as tracker:
+        sites = [tracker.add_nexusphp_site(f"Site{index:02d}") for index in range(args.sites)]
+        if args.mteam:
+            sites.append(tracker.add_mteam_site())
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as data_path:
+                for _ in range(2 if args.page_cache else 1):
+                    result = run_refresh(tracker, sites, data_path, workers=workers, request_interval=args.interval,
+                                         page_cache=args.page_cache, parse_workers=args.parse_workers,
+                                         modules=modules)
+                    print_result(workers, result)
+
+
+def print_result(workers: int, result: dict):
+    requests_count = sum(site["requests"] for site in result["metrics"]["sites"])
+    print(f"workers={workers}: {result['seconds']:.2f}s, 成功 {len(result['success'])} 个站点, "
+          f"失败 {len(result['error'])} 个, 成员 {result['summary']['invitees']} 人, 请求 {requests_count} 次")
+    if result["page_cache"]:
+        print(f"  页面缓存: {json.dumps(result['page_cache'], ensure_ascii=False)}")
+    slowest = sorted(result["metrics"]["sites"], key=lambda site: site["total_ms"], reverse=True)[:3]
+    for site in slowest:
+        print(f"  {site['site_name']}: {site['total_ms']:.0f}ms {json.dumps(site['phases'], ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
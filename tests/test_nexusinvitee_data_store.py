@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from nexusinvitee_loader import load_plugin_module
+
+
+class NexusInviteeDataStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_path = self.tmp.name
+        diff = load_plugin_module("diff.py")
+        normalize = load_plugin_module("normalize.py")
+        summary = load_plugin_module("summary.py", is_banned=diff["is_banned"],
+                                     parse_ratio=normalize["parse_ratio"])
+        records = load_plugin_module("records.py")
+        self.DataManager = load_plugin_module("data.py", diff_invitees=diff["diff_invitees"],
+                                              keyed_invitees=diff["keyed_invitees"],
+                                              summarize_site=summary["summarize_site"],
+                                              merge_summaries=summary["merge_summaries"],
+                                              InviteeRecord=records["InviteeRecord"],
+                                              to_records=records["to_records"])["DataManager"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_legacy_json_is_migrated_once(self):
+        legacy = {
+            "SiteA": {"data": {"invitees": [{"username": "a"}]}, "last_update": 100},
+            "SiteB": {"data": {"invitees": []}, "last_update": 200},
+        }
+        legacy_file = Path(self.data_path) / "site_data.json"
+        legacy_file.write_text(json.dumps(legacy), encoding="utf-8")
+
+        manager = self.DataManager(self.data_path)
+
+        self.assertFalse(legacy_file.exists())
+        self.assertTrue((Path(self.data_path) / "site_data.json.migrated").exists())
+        self.assertEqual(manager.get_site_data(), legacy)
+        self.assertEqual(manager.get_last_update_time(), 200)
+
+        # 再次初始化不会重复迁移，也不会覆盖已更新的数据
+        manager.update_site_data("SiteA", {"invitees": []})
+        reopened = self.DataManager(self.data_path)
+        self.assertEqual(reopened.get_site_data("SiteA")["data"], {"invitees": []})
+
+    def test_site_update_only_touches_that_site(self):
+        manager = self.DataManager(self.data_path)
+        manager.update_site_data("SiteA", {"invitees": [{"username": "a"}]})
+        manager.update_site_data("SiteB", {"invitees": [{"username": "b"}]})
+        manager.update_site_data("SiteA", {"invitees": [{"username": "a2"}]})
+
+        data = self.DataManager(self.data_path).get_site_data()
+        self.assertEqual(set(data), {"SiteA", "SiteB"})
+        self.assertEqual(data["SiteA"]["data"]["invitees"][0]["username"], "a2")
+        self.assertEqual(data["SiteB"]["data"]["invitees"][0]["username"], "b")
+        self.assertEqual(manager.get_site_data("Missing"), {})
+
+        other = self.DataManager(self.data_path)
+        version = other.get_version()
+        manager.update_site_data("SiteB", {"invitees": []})
+        self.assertEqual(other.get_version(), version + 1)
+        self.assertEqual(other.get_site_data("SiteB")["data"], {"invitees": []})
+
+        self.assertTrue(manager.clear_all_site_data())
+        self.assertEqual(manager.get_site_data(), {})
+        self.assertEqual(manager.get_last_update_time(), 0)
+
+    def test_invitee_changes_are_diffed_per_row(self):
+        manager = self.DataManager(self.data_path)
+        alice = {"username": "alice", "profile_url": "u/1", "enabled": "Yes", "ratio_health": "good"}
+        bob = {"username": "bob", "profile_url": "u/2", "enabled": "Yes", "ratio_health": "good"}
+        carol = {"username": "carol", "profile_url": "u/3", "enabled": "Yes", "ratio_health": "neutral"}
+
+        # 站点首次保存只建立基线，不产生事件
+        manager.update_site_data("SiteA", {"invitees": [alice, bob]})
+        self.assertEqual(manager.pop_change_events(), [])
+
+        manager.update_site_data("SiteA", {"invitees": [
+            dict(alice, enabled="No"), dict(carol)]})
+        manager.update_site_data("SiteA", {"invitees": [
+            dict(alice, enabled="No", ratio_health="danger"), dict(carol)]})
+        events = [(event["type"], event["username"]) for event in manager.pop_change_events()]
+        self.assertEqual(events, [("banned", "alice"), ("new", "carol"), ("removed", "bob"), ("health", "alice")])
+        self.assertEqual(manager.pop_change_events(), [])
+
+        conn = sqlite3.connect(str(Path(self.data_path) / "site_data.db"))
+        keys = [row[0] for row in conn.execute("SELECT invitee_key FROM site_invitees ORDER BY invitee_key")]
+        conn.close()
+        self.assertEqual(keys, ["u/1", "u/3"])
+        reopened = self.DataManager(self.data_path).load_data()
+        self.assertEqual([i["username"] for i in reopened["SiteA"]["data"]["invitees"]], ["alice", "carol"])
+        self.assertEqual(reopened["SiteA"]["data"]["invitees"][0]["ratio_health"], "danger")
+
+    def test_summary_is_maintained_on_write(self):
+        manager = self.DataManager(self.data_path)
+        manager.update_site_data("SiteA", {"invite_status": {"permanent_count": 2, "temporary_count": 1},
+                                           "invitees": [{"username": "a", "enabled": "No", "ratio_health": "good"},
+                                                        {"username": "b", "ratio_health": "danger"},
+                                                        {"username": "c", "ratio_health": "neutral"}]})
+        # 没有健康状态的站点按分享率数值判断
+        manager.update_site_data("SiteB", {"data": {"invitees": [{"username": "d", "ratio": "0.5"},
+                                                                  {"username": "e", "ratio": "∞"}]}})
+        self.assertEqual(manager.get_summary("SiteA"), {"invitees": 3, "banned": 1, "low_ratio": 1, "no_data": 1,
+                                                        "permanent_invites": 2, "temporary_invites": 1})
+        self.assertEqual(manager.get_summary()["low_ratio"], 2)
+
+        manager.update_site_data("SiteA", {"invitees": []})
+        self.assertEqual(manager.get_summary(), {"sites": 2, "invitees": 2, "banned": 0, "low_ratio": 1, "no_data": 0,
+                                                 "permanent_invites": 0, "temporary_invites": 0})
+        self.DataManager._cache.clear()
+        self.assertEqual(self.DataManager(self.data_path).get_summary()["invitees"], 2)
+
+    def test_discovery_cache_is_keyed_by_fingerprint(self):
+        manager = self.DataManager(self.data_path)
+        self.assertEqual(manager.get_discovery("1", "fp"), {})
+
+        manager.save_discovery("1", "fp", "123")
+        cached = self.DataManager(self.data_path).get_discovery("1", "fp")
+        self.assertEqual(cached["user_id"], "123")
+
+        # 认证信息变化后缓存不再命中
+        self.assertEqual(manager.get_discovery("1", "other"), {})
+        manager.clear_discovery("1")
+        self.assertEqual(manager.get_discovery("1", "fp"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
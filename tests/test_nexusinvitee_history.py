@@ -0,0 +1,83 @@
+import tempfile
+import time
+import unittest
+
+from nexusinvitee_loader import load_plugin_module
+
+DAY = 86400
+
+
+class NexusInviteeHistoryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        diff = load_plugin_module("diff.py")
+        normalize = load_plugin_module("normalize.py")
+        self.history = load_plugin_module("history.py", keyed_invitees=diff["keyed_invitees"],
+                                          **{name: normalize[name] for name in
+                                             ("INFINITE_RATIO", "parse_ratio", "size_to_bytes")})
+        self.HistoryStore = self.history["HistoryStore"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @staticmethod
+    def invitee(name, uploaded, downloaded):
+        return {"username": name, "profile_url": f"userdetails.php?id={name}",
+                "uploaded": f"{uploaded} GB", "downloaded": f"{downloaded} GB",
+                "ratio": f"{uploaded / downloaded:.3f}"}
+
+    def test_downsampling_retention_and_projection(self):
+        store = self.HistoryStore(self.tmp.name)
+        start = 1_700_000_000
+        # 40天，每天4次刷新；drifter 只下载不上传
+        for hour in range(0, 40 * 24, 6):
+            day = hour / 24
+            store.record("Site", [self.invitee("steady", 20, 10),
+                                  self.invitee("drifter", 10, 8 + day * 0.5)], start + hour * 3600)
+
+        now = start + (40 * 24 - 6) * 3600
+        series = store.get_series("Site", "userdetails.php?id=drifter")
+        timestamps = [sample[0] for sample in series]
+        self.assertGreaterEqual(timestamps[0], now - store.RETENTION_SECONDS)
+        # 超过一天的样本每天只保留一个，最近一天保留全部
+        older = [ts for ts in timestamps if ts < now - store.RECENT_SECONDS]
+        self.assertEqual(len(older), len({ts // DAY for ts in older}))
+        self.assertEqual(len(timestamps) - len(older), 5)
+
+        trends = self.HistoryStore(self.tmp.name).get_trends("Site", project_days=10)
+        drifter = trends["userdetails.php?id=drifter"]
+        self.assertLess(drifter["ratio_per_day"], 0)
+        self.assertAlmostEqual(drifter["downloaded_gb_per_day"], 0.5, places=2)
+        self.assertAlmostEqual(drifter["projected_ratio"], 10 / (8 + 39.75 * 0.5 + 5), places=2)
+        self.assertAlmostEqual(trends["userdetails.php?id=steady"]["projected_ratio"], 2.0, places=3)
+
+    def test_departed_invitees_are_dropped_after_retention(self):
+        store = self.HistoryStore(self.tmp.name)
+        start = 1_700_000_000
+        store.record("Site", [self.invitee("gone", 1, 1), self.invitee("stay", 1, 1)], start)
+        for day in range(1, 32):
+            store.record("Site", [self.invitee("stay", 1, 1)], start + day * DAY)
+        self.assertEqual(store.get_series("Site", "userdetails.php?id=gone"), [])
+        self.assertEqual(list(store.get_trends("Site")), ["userdetails.php?id=stay"])
+
+    def test_thirty_days_of_ten_thousand_invitees_is_compact(self):
+        store = self.HistoryStore(self.tmp.name)
+        invitees = [self.invitee(f"u{i}", 20, 10) for i in range(10000)]
+        for day in range(30):
+            store.record("Site", invitees, 1_700_000_000 + day * DAY)
+
+        row = store._conn.execute("SELECT keys, timestamps, ratio, uploaded, downloaded FROM site_history").fetchone()
+        size = sum(len(column) for column in row)
+        self.assertLess(size, 5 * 1024 * 1024)
+
+        start = time.perf_counter()
+        loaded = self.HistoryStore(self.tmp.name)._load("Site")
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(loaded.keys), 10000)
+        self.assertEqual(len(loaded.timestamps), 30)
+        print(f"\nnexusinvitee history: 10k invitees x 30 days = {size / 1024 / 1024:.2f}MB, "
+              f"load {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from nexusinvitee_loader import load_plugin_module
+
+
+class NexusInviteeMetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.metrics = load_plugin_module("metrics.py")
+
+    def test_urls_are_classified_into_phases(self):
+        classify_url = self.metrics["classify_url"]
+        site = "https://pt.example.org"
+        self.assertEqual(classify_url(f"{site}/"), "auth")
+        self.assertEqual(classify_url(f"{site}/usercp.php"), "user_id")
+        self.assertEqual(classify_url(f"{site}/invite.php?id=1"), "invite_page")
+        self.assertEqual(classify_url(f"{site}/invite.php?id=1&menu=invitee&page=0"), "invite_page")
+        self.assertEqual(classify_url(f"{site}/invite.php?id=1&menu=invitee&page=1"), "pagination")
+        self.assertEqual(classify_url(f"{site}/invite.php?id=1&menu=invitee&page=2"), "pagination")
+        self.assertEqual(classify_url(f"{site}/invite.php?id=1&type=new"), "send_invite")
+        self.assertEqual(classify_url(f"{site}/mybonus.php"), "bonus_shop")
+        self.assertEqual(classify_url("https://api.m-team.cc/api/member/profile"), "api")
+
+    def test_ring_buffer_and_slowest_sites(self):
+        recorder = self.metrics["MetricsRecorder"](max_runs=2)
+        for run_index in range(3):
+            run = recorder.start_run(forced=False)
+            with recorder.site("slow") as site:
+                site.record_request("get", "https://a.org/invite.php?id=1", 200, 0.002, size=100)
+                site.record_request("get", "https://a.org/invite.php?id=1", 200, 0.001, size=100)
+                self.metrics["record_parse"](12.5)
+                time.sleep(0.02)
+            with recorder.site("broken") as site:
+                site.record_request("get", "https://b.org/", None, 0.0, error="ConnectionError")
+            recorder.finish_run(run)
+
+        runs = recorder.get_runs(limit=5)
+        self.assertEqual(len(runs), 2)
+        slow = next(site for site in runs[0]["sites"] if site["site_name"] == "slow")
+        self.assertEqual((slow["requests"], slow["retries"], slow["bytes"]), (2, 1, 200))
+        self.assertNotIn("request_log", slow)
+        # 解析阶段为实测的页面解析耗时，不含其他本地处理
+        self.assertEqual(slow["phases"]["parse"], 12.5)
+        broken = next(site for site in runs[0]["sites"] if site["site_name"] == "broken")
+        self.assertNotIn("parse", broken["phases"])
+
+        slowest = recorder.get_slowest()
+        self.assertEqual([site["site_name"] for site in slowest["sites"]], ["slow", "broken"])
+        self.assertEqual(slowest["sites"][1]["errors"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import random
+import re
+import time
+import unittest
+
+from nexusinvitee_loader import load_plugin_module
+
+
+def legacy_size_to_bytes(size_str):
+    """
+    旧版_convert_size_to_bytes：每次调用都重建单位表并重新匹配正则
+    """
+    if not size_str or size_str.strip() == '':
+        return 0
+    if size_str.lower() == 'inf.' or size_str.lower() == 'inf' or size_str == '∞':
+        return 1e20
+    size_str = size_str.replace(',', '.')
+    matches = re.match(r'([\d.]+)\s*([KMGTPEZY]?i?B)', size_str, re.IGNORECASE)
+    if not matches:
+        try:
+            return float(size_str)
+        except ValueError:
+            return 0
+    size_num, unit = matches.groups()
+    try:
+        size_value = float(size_num)
+    except ValueError:
+        return 0
+    unit = unit.upper()
+    units = {'B': 1, 'KB': 1024, 'KIB': 1024, 'MB': 1024 ** 2, 'MIB': 1024 ** 2, 'GB': 1024 ** 3,
+             'GIB': 1024 ** 3, 'TB': 1024 ** 4, 'TIB': 1024 ** 4, 'PB': 1024 ** 5, 'PIB': 1024 ** 5,
+             'EB': 1024 ** 6, 'EIB': 1024 ** 6, 'ZB': 1024 ** 7, 'ZIB': 1024 ** 7, 'YB': 1024 ** 8,
+             'YIB': 1024 ** 8}
+    if unit not in units:
+        return size_value
+    return size_value * units[unit]
+
+
+class NexusInviteeNormalizeTests(unittest.TestCase):
+    def setUp(self):
+        self.normalize = load_plugin_module("normalize.py")
+
+    def test_sizes_match_legacy_and_batch_is_faster(self):
+        rng = random.Random(7)
+        units = ["B", "KB", "MB", "GB", "TB", "GiB", "TiB", "kb"]
+        # 模拟一个站点的上传/下载列：取值大量重复
+        column = [f"{rng.choice(['0', '1.5', '12.34', '256', '1,024'])} {rng.choice(units)}" for _ in range(5000)]
+        column += ["", "0", "inf", "∞", "1,5 GB", "garbage", "3 K"]
+
+        legacy_start = time.perf_counter()
+        legacy = [legacy_size_to_bytes(value) for value in column]
+        legacy_seconds = time.perf_counter() - legacy_start
+
+        self.normalize["_parse_size"].cache_clear()
+        batch_start = time.perf_counter()
+        batch = self.normalize["sizes_to_bytes"](column)
+        batch_seconds = time.perf_counter() - batch_start
+
+        self.assertEqual(batch, legacy)
+        print(f"\nnexusinvitee sizes ({len(column)} values): legacy {legacy_seconds * 1000:.1f}ms, "
+              f"batch {batch_seconds * 1000:.1f}ms, speedup x{legacy_seconds / batch_seconds:.1f}")
+
+    def test_non_string_sizes_do_not_raise(self):
+        size_to_bytes = self.normalize["size_to_bytes"]
+        self.assertEqual(size_to_bytes(None), 0)
+        self.assertEqual(size_to_bytes(b"1 GB"), 0)
+        self.assertEqual(size_to_bytes(["1 GB"]), 0)
+        self.assertEqual(size_to_bytes(1024), 1024.0)
+        self.assertEqual(self.normalize["sizes_to_bytes"]([None, {"size": 1}, "1 KB", 2.5]), [0, 0, 1024.0, 2.5])
+
+    def test_ratio_parsing_and_classification(self):
+        parse_ratio = self.normalize["parse_ratio"]
+        self.assertEqual(parse_ratio("1,234.5"), 1234.5)
+        self.assertEqual(parse_ratio("1,234,567"), 1234567.0)
+        self.assertEqual(parse_ratio("Inf."), self.normalize["INFINITE_RATIO"])
+        with self.assertRaises(ValueError):
+            parse_ratio("abc")
+
+        invitees = self.normalize["classify_invitees"]([
+            {"uploaded": "0", "downloaded": "0B", "ratio_value": 0},
+            {"uploaded": "1 GB", "downloaded": "2 GB", "ratio_value": 0.5},
+            {"uploaded": "1 GB", "downloaded": "4 GB", "ratio_value": 0.25},
+            {"uploaded": "1 GB", "downloaded": "1 GB", "ratio": "∞"},
+            {"ratio": "x"},
+        ])
+        self.assertEqual([invitee["ratio_health"] for invitee in invitees],
+                         ["neutral", "warning", "danger", "excellent", "unknown"])
+        self.assertEqual(invitees[0]["data_status"], "无数据")
+        self.assertEqual(invitees[2]["ratio_label"], ["危险", "red"])
+
+
+if __name__ == "__main__":
+    unittest.main()
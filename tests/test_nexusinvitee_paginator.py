@@ -0,0 +1,67 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from nexusinvitee_loader import load_plugin_module
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    batches = []
+
+    def map(self, fn, *iterables, **kwargs):
+        batch = list(iterables[0])
+        RecordingExecutor.batches.append(batch)
+        return super().map(fn, batch, **kwargs)
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def get(self, url, headers=None, timeout=None):
+        page = int(url)
+        ids = self.pages[page] if page < len(self.pages) else []
+        return SimpleNamespace(text=",".join(ids), raise_for_status=lambda: None)
+
+
+def make_pages(prefix, count):
+    return [[f"{prefix}{page}-{index}" for index in range(2)] for page in range(count)]
+
+
+def parse_page(html):
+    return [{"username": name} for name in html.split(",") if name]
+
+
+class NexusInviteePaginatorTests(unittest.TestCase):
+    def setUp(self):
+        module = load_plugin_module("paginator.py", bind_site_metrics=lambda func: func,
+                                    record_parse=lambda ms: None, PageCache=None)
+        module["ThreadPoolExecutor"] = RecordingExecutor
+        RecordingExecutor.batches = []
+        self.paginator_class = module["InviteePaginator"]
+
+    def collect(self, pages, known_pages):
+        known = [invitee for ids in known_pages for invitee in parse_page(",".join(ids))]
+        paginator = self.paginator_class(FakeSession(pages), "Site", str, parse_page, window=3, page_size=2,
+                                         known_invitees=known, match_pages=2)
+        first_html = ",".join(pages[0]) + f'<a href="?page={len(pages) - 1}">'
+        return paginator, paginator.collect(first_html, parse_page(",".join(pages[0])))
+
+    def test_window_is_capped_only_during_matching_run(self):
+        known = make_pages("u", 6)
+        # 首页一致：只需再抓1页即可达到停止条件
+        paginator, _ = self.collect(known, known)
+        self.assertEqual(RecordingExecutor.batches, [[1]])
+        self.assertTrue(paginator.stopped_early)
+
+        # 前4页不一致时按完整窗口预取，不因增量翻页缩小窗口
+        RecordingExecutor.batches = []
+        pages = make_pages("n", 4) + known[4:]
+        paginator, invitees = self.collect(pages, known)
+        self.assertEqual(RecordingExecutor.batches, [[1, 2, 3], [4, 5]])
+        self.assertEqual(len(invitees), 10)
+        self.assertEqual(paginator.reused_count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import unittest
+
+from nexusinvitee_loader import load_fixture, load_plugin_module
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:  # pragma: no cover - 依赖缺失时跳过
+    BeautifulSoup = None
+
+
+def load_handler(make_soup=None):
+    """
+    加载NexusPHP处理器，可替换其使用的make_soup以指定HTML解析器
+    """
+    parsing = load_plugin_module("parsing.py")
+    normalize = load_plugin_module("normalize.py")
+    base = load_plugin_module("sites/__init__.py", make_soup=parsing["make_soup"],
+                              size_to_bytes=normalize["size_to_bytes"], ratio_text=normalize["ratio_text"],
+                              PageCache=load_plugin_module("page_cache.py")["PageCache"],
+                              ParsePool=load_plugin_module("parse_pool.py")["ParsePool"])
+    handler = load_plugin_module(
+        "sites/nexusphp.py",
+        _ISiteHandler=base["_ISiteHandler"],
+        make_soup=make_soup or parsing["make_soup"],
+        TABLES_ONLY=parsing["TABLES_ONLY"],
+        InviteePaginator=None,
+        **{name: normalize[name] for name in
+           ("parse_ratio", "ratio_health", "health_from_ratio", "classify_invitees")},
+    )
+    return handler["NexusPhpHandler"](), parsing
+
+
+def legacy_soup(html_content, parse_only=None):
+    return BeautifulSoup(html_content, "html.parser")
+
+
+@unittest.skipIf(BeautifulSoup is None, "beautifulsoup4 未安装")
+class NexusInviteeParserTests(unittest.TestCase):
+    def setUp(self):
+        self.first_page = load_fixture("nexusphp_invite.html")
+        self.next_pages = [load_fixture("nexusphp_invite_page1.html"), load_fixture("nexusphp_invite_page2.html")]
+        # 改用可替换解析器及单次构建文档树之前的处理器对上述页面的解析结果
+        self.baseline = json.loads(load_fixture("nexusphp_invite_parsed.json"))
+
+    def parse_pages(self, handler, make_soup):
+        soup = make_soup(self.first_page)
+        results = [handler._parse_nexusphp_invite_page("fixture", self.first_page, soup=soup)]
+        results += [handler._parse_nexusphp_invite_page("fixture", html, is_next_page=True) for html in self.next_pages]
+        # 与JSON基准比较，元组按列表比较
+        return json.loads(json.dumps(results, ensure_ascii=False))
+
+    def test_parsed_output_matches_baseline(self):
+        handler, parsing = load_handler()
+        self.assertEqual(self.parse_pages(handler, parsing["make_soup"]), self.baseline)
+        self.assertEqual([len(page["invitees"]) for page in self.baseline], [50, 50, 23])
+        self.assertEqual(self.baseline[0]["invite_status"]["permanent_count"], 2)
+        self.assertEqual(self.baseline[0]["invite_status"]["temporary_count"], 1)
+
+        # 未安装lxml时回退的html.parser解析结果相同
+        legacy_handler, _ = load_handler(make_soup=legacy_soup)
+        self.assertEqual(self.parse_pages(legacy_handler, legacy_soup), self.baseline)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from nexusinvitee_loader import load_plugin_module
+
+
+class NexusInviteeQueryTests(unittest.TestCase):
+    def setUp(self):
+        diff = load_plugin_module("diff.py")
+        normalize = load_plugin_module("normalize.py")
+        self.InviteeIndex = load_plugin_module("query.py", is_banned=diff["is_banned"],
+                                               parse_ratio=normalize["parse_ratio"],
+                                               size_to_bytes=normalize["size_to_bytes"])["InviteeIndex"]
+
+    @staticmethod
+    def site(*invitees):
+        return {"data": {"invitees": [{"username": name, "email": f"{name}@mail.com", "enabled": enabled,
+                                       "ratio": ratio, "ratio_health": health, "uploaded": uploaded}
+                                      for name, enabled, ratio, health, uploaded in invitees]}}
+
+    def test_filter_sort_and_paginate(self):
+        index = self.InviteeIndex({
+            "SiteA": self.site(("alice", "Yes", "2.0", "good", "2 GB"),
+                               ("bob", "Yes", "0.2", "danger", "1 GB"),
+                               ("carol", "No", "1.5", "good", "3 GB")),
+            "SiteB": self.site(("dave", "Yes", "0.6", "warning", "1,024 MB"),
+                               ("erin", "Yes", "0.1", "danger", "10 GB")),
+        })
+
+        result = index.query(limit=3)
+        self.assertEqual(result["total"], 5)
+        # 禁用 > 危险（分享率低的在前） > 警告
+        self.assertEqual([item["username"] for item in result["items"]], ["carol", "erin", "bob"])
+        self.assertEqual(result["items"][1]["site_name"], "SiteB")
+
+        result = index.query(site="SiteA", enabled=True, sort="uploaded", order="desc")
+        self.assertEqual([item["username"] for item in result["items"]], ["alice", "bob"])
+        result = index.query(health="danger,warning", sort="ratio", offset=1, limit=1)
+        self.assertEqual((result["total"], result["items"][0]["username"]), (3, "bob"))
+        self.assertEqual(index.query(search="DAVE@")["items"][0]["username"], "dave")
+        with self.assertRaises(ValueError):
+            index.query(sort="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import sqlite3
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+from nexusinvitee_loader import load_plugin_module
+
+
+def make_invitee(index):
+    return {
+        "username": f"user{index}",
+        "email": f"user{index}@example.com",
+        "profile_url": f"https://example.com/userdetails.php?id={10000 + index}",
+        "enabled": "No" if index % 7 == 0 else "Yes",
+        "status": "已确认",
+        "uploaded": f"{index % 500}.00 GB",
+        "downloaded": f"{index % 300}.00 GB",
+        "ratio": "1.234",
+        "ratio_value": 1.234,
+        "ratio_health": "good",
+        "ratio_label": ["良好", "green"],
+        "seeding": "3",
+        "seeding_size": "1.00 TB",
+        "last_seed_report": "2024-01-01 00:00:00",
+    }
+
+
+class NexusInviteeRecordTests(unittest.TestCase):
+    def setUp(self):
+        self.records = load_plugin_module("records.py")
+        self.InviteeRecord = self.records["InviteeRecord"]
+
+    def test_round_trip_keeps_json_layout(self):
+        invitee = {**make_invitee(7), "uid": 42, "ratio_health": "custom", "enabled": "maybe"}
+        record = self.InviteeRecord(invitee)
+
+        self.assertEqual(record.to_dict(), invitee)
+        self.assertEqual(record, invitee)
+        self.assertEqual(json.loads(json.dumps(record.to_dict())), invitee)
+        self.assertNotIn("data_status", record)
+        self.assertIsNone(record.get("data_status"))
+        self.assertEqual(record.get("uid"), 42)
+        with self.assertRaises(AttributeError):
+            record.username = "other"
+
+    def test_status_fields_are_encoded_and_shared(self):
+        first = self.InviteeRecord(make_invitee(0))
+        second = self.InviteeRecord(json.loads(json.dumps(make_invitee(1), ensure_ascii=False)))
+
+        self.assertIs(first.health, self.records["Health"].GOOD)
+        self.assertTrue(first.banned)
+        self.assertFalse(second.banned)
+        self.assertEqual(second["enabled"], "Yes")
+        self.assertIs(first.ratio_label, second.ratio_label)
+        self.assertIs(first.status, second.status)
+
+    def test_records_use_less_memory_than_dicts(self):
+        rows = [json.dumps(make_invitee(index), ensure_ascii=False) for index in range(5000)]
+        tracemalloc.start()
+        try:
+            dicts = [json.loads(row) for row in rows]
+            dict_size = tracemalloc.get_traced_memory()[0]
+            records = [self.InviteeRecord(json.loads(row)) for row in rows]
+            record_size = tracemalloc.get_traced_memory()[0] - dict_size
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(records, dicts)
+        self.assertLess(record_size, dict_size / 2)
+
+    def test_data_manager_caches_records_and_stores_dicts(self):
+        diff = load_plugin_module("diff.py")
+        normalize = load_plugin_module("normalize.py")
+        summary = load_plugin_module("summary.py", is_banned=diff["is_banned"], parse_ratio=normalize["parse_ratio"])
+        DataManager = load_plugin_module("data.py", diff_invitees=diff["diff_invitees"],
+                                         keyed_invitees=diff["keyed_invitees"],
+                                         summarize_site=summary["summarize_site"],
+                                         merge_summaries=summary["merge_summaries"],
+                                         InviteeRecord=self.InviteeRecord,
+                                         to_records=self.records["to_records"])["DataManager"]
+        invitees = [make_invitee(index) for index in range(3)]
+        with tempfile.TemporaryDirectory() as data_path:
+            DataManager._cache.clear()
+            manager = DataManager(data_path)
+            manager.update_site_data("SiteA", {"invitees": invitees})
+            cached = manager.get_site_data("SiteA")["data"]["invitees"]
+            with sqlite3.connect(str(Path(data_path) / "site_data.db")) as conn:
+                stored = [json.loads(row[0]) for row in conn.execute("SELECT data FROM site_invitees")]
+
+            DataManager._cache.clear()
+            reloaded = DataManager(data_path).get_site_data("SiteA")["data"]["invitees"]
+            DataManager._cache.clear()
+
+        self.assertTrue(all(isinstance(invitee, self.InviteeRecord) for invitee in cached + reloaded))
+        self.assertEqual(cached, invitees)
+        self.assertEqual(reloaded, invitees)
+        self.assertCountEqual(stored, invitees)
+
+
+if __name__ == "__main__":
+    unittest.main()
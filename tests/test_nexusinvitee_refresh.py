@@ -0,0 +1,118 @@
+import contextlib
+import re
+import threading
+import unittest
+from unittest import mock
+
+try:
+    import apscheduler
+    import bs4
+    import pytz
+except ImportError:  # pragma: no cover - 依赖缺失时跳过
+    bs4 = None
+
+from nexusinvitee_loader import load_plugin_module
+
+
+class FakeParsePool:
+    created = []
+
+    def __init__(self, workers):
+        self.enabled = False
+        self.shutdowns = 0
+        FakeParsePool.created.append(self)
+
+    def start(self):
+        pass
+
+    def shutdown(self):
+        self.shutdowns += 1
+
+
+@unittest.skipIf(bs4 is None, "插件依赖未安装")
+class NexusInviteeRefreshTests(unittest.TestCase):
+    def setUp(self):
+        refresher = load_plugin_module("refresher.py", current_site_metrics=lambda: None)
+        namespace = {name: mock.MagicMock() for name in (
+            "settings", "Response", "NotificationType", "EventType", "SiteOper", "SitesHelper", "DataManager",
+            "NotificationHelper", "SiteHelper", "HandlerRegistry", "ThrottledSession",
+            "keyed_invitees", "HistoryStore", "InviteeIndex", "count_invitees", "RefreshScheduler",
+            "CIRCUIT_OPEN", "MetricsRecorder", "PHASE_NAMES", "PageCache", "to_dicts",
+            "EVENT_NEW", "EVENT_REMOVED", "EVENT_BANNED", "EVENT_HEALTH")}
+        namespace.update(_PluginBase=object, ParsePool=FakeParsePool,
+                         SiteRefresher=refresher["SiteRefresher"], HostThrottle=refresher["HostThrottle"])
+        plugin_class = load_plugin_module("__init__.py", **namespace)["nexusinvitee"]
+        FakeParsePool.created = []
+
+        plugin = plugin_class.__new__(plugin_class)
+        plugin._refreshing = False
+        plugin._refresh_lock = threading.Lock()
+        plugin._nexus_sites = []
+        plugin._parse_workers = 2
+        plugin._parse_pool = FakeParsePool(2)
+        plugin._max_workers = 2
+        plugin._host_throttle = None
+        plugin._request_interval = 0
+        plugin._notify = False
+        plugin.refresh_scheduler = None
+        plugin.page_cache = None
+        plugin.handler_registry = mock.MagicMock()
+        plugin.history = mock.MagicMock()
+        plugin.sites = mock.MagicMock()
+        plugin.sites.get_indexers.return_value = [{"id": 1, "name": "SiteA", "url": "https://a.test/"}]
+        plugin.data_manager = mock.MagicMock()
+        plugin.data_manager.get_site_data.return_value = {}
+        plugin.data_manager.pop_change_events.return_value = []
+        plugin.metrics = mock.MagicMock()
+        plugin.metrics.start_run.return_value = {"total_ms": 0}
+        plugin.metrics.site.side_effect = lambda site_name: contextlib.nullcontext()
+        self.plugin = plugin
+
+    def test_refreshes_share_pool_until_service_stops(self):
+        started, release = threading.Event(), threading.Event()
+        received = []
+
+        def fetch(site_name, parse_pool=None):
+            received.append(parse_pool)
+            started.set()
+            release.wait(10)
+            return {"invite_status": {}, "invitees": []}
+
+        self.plugin._get_site_invite_data = fetch
+        results = {}
+        first = threading.Thread(target=lambda: results.update(first=self.plugin.refresh_all_sites()))
+        first.start()
+        self.assertTrue(started.wait(10))
+
+        rejected = self.plugin.refresh_all_sites(force=False)
+        pool = FakeParsePool.created[0]
+        self.assertEqual(rejected["message"], "刷新已在进行中")
+        self.assertTrue(self.plugin._refreshing)
+
+        release.set()
+        first.join(10)
+        self.assertEqual(results["first"], {"success": 1, "error": 0})
+        self.assertFalse(self.plugin._refreshing)
+        self.plugin.data_manager.pop_change_events.assert_called_once()
+
+        # 后续刷新复用同一解析池，刷新结束不关闭
+        self.assertEqual(self.plugin.refresh_all_sites(), {"success": 1, "error": 0})
+        self.assertEqual(received, [pool, pool])
+        self.assertEqual(pool.shutdowns, 0)
+        self.assertEqual(len(FakeParsePool.created), 1)
+
+        self.plugin.stop_service()
+        self.assertEqual(pool.shutdowns, 1)
+        self.assertIsNone(self.plugin._parse_pool)
+
+    def test_only_stale_discovery_failures_trigger_rediscovery(self):
+        stale = lambda reason: bool(re.search(self.plugin._rediscover_pattern, reason, re.IGNORECASE))
+        self.assertTrue(stale("访问邀请页面失败: 404 Not Found"))
+        self.assertTrue(stale("访问邀请页面时未登录或Cookie已失效"))
+        self.assertTrue(stale("无法获取用户ID，请检查Cookie或站点是否可访问"))
+        self.assertFalse(stale("访问邀请页面网络错误: Cookie header too large"))
+        self.assertFalse(stale("解析站点 A 邀请页面时发生意外错误: 403"))
+
+
+if __name__ == "__main__":
+    unittest.main()
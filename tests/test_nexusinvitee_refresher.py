@@ -0,0 +1,54 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import BaseAdapter
+
+from nexusinvitee_loader import load_plugin_module
+
+
+class SlowAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+
+    def send(self, request, **kwargs):
+        host = requests.utils.urlparse(request.url).hostname
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        time.sleep(0.02)
+        with self.lock:
+            self.active[host] -= 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b""
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class NexusInviteeRefresherTests(unittest.TestCase):
+    def setUp(self):
+        self.refresher = load_plugin_module("refresher.py", current_site_metrics=lambda: None)
+
+    def test_page_prefetch_is_bounded_per_host(self):
+        throttle = self.refresher["HostThrottle"](0, max_requests=2)
+        session = self.refresher["ThrottledSession"](throttle)
+        adapter = SlowAdapter()
+        session.mount("https://", adapter)
+        urls = [f"https://{host}.test/invite.php?page={page}" for host in ("a", "b") for page in range(6)]
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            list(executor.map(session.get, urls))
+        self.assertEqual(adapter.peak, {"a.test": 2, "b.test": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
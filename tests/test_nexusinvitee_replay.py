@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+
+try:
+    import bs4
+except ImportError:  # pragma: no cover - 依赖缺失时跳过
+    bs4 = None
+
+from nexusinvitee_replay import PAGE_SIZE, FakeTracker, expected_invitees, load_replay_modules, run_refresh
+
+
+@unittest.skipIf(bs4 is None, "beautifulsoup4 未安装")
+class NexusInviteeReplayTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.modules = load_replay_modules()
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_handlers_replay_fixture_sites(self):
+        with FakeTracker() as tracker:
+            sites = [tracker.add_nexusphp_site("Short", pages=1), tracker.add_nexusphp_site("Long", pages=5),
+                     tracker.add_mteam_site()]
+            result = run_refresh(tracker, sites, self.tmp.name, workers=2, modules=self.modules)
+
+        self.assertEqual(result["error"], {})
+        self.assertEqual(result["invitees"], {"Short": expected_invitees(1), "Long": expected_invitees(5),
+                                              "M-Team": 5})
+        # 首页、4个后续页及发邀页；末页不足一页即停止，不再试探空页
+        self.assertEqual(tracker.hits[("long.nexusphp.test", "/invite.php")], 1 + 4 + 1)
+        self.assertEqual(result["summary"]["permanent_invites"], 2 + 2 + 1)
+        self.assertEqual(result["summary"]["temporary_invites"], 1 + 1 + 2)
+        long_site = next(site for site in result["metrics"]["sites"] if site["site_name"] == "Long")
+        self.assertIn("pagination", long_site["phases"])
+        self.assertGreater(long_site["phases"]["parse"], 0)
+
+    def test_login_page_is_reported_as_failure(self):
+        with FakeTracker() as tracker:
+            site = tracker.add_nexusphp_site("Expired")
+            site["cookie"] = "pass=expired"
+            result = run_refresh(tracker, [site], self.tmp.name, workers=1, modules=self.modules)
+
+        self.assertIn("Cookie", result["reasons"]["Expired"])
+        self.assertEqual(result["invitees"], {"Expired": 0})
+
+    def test_unchanged_pages_reuse_parsed_results(self):
+        for etag in (True, False):
+            with self.subTest(etag=etag), tempfile.TemporaryDirectory() as data_path:
+                with FakeTracker(pages=4, etag=etag) as tracker:
+                    sites = [tracker.add_nexusphp_site("Cached")]
+                    first = run_refresh(tracker, sites, data_path, page_cache=True, modules=self.modules)
+                    second = run_refresh(tracker, sites, data_path, page_cache=True, modules=self.modules)
+
+                self.assertEqual(second["invitees"], {"Cached": expected_invitees(4)})
+                self.assertEqual(second["summary"], first["summary"])
+                # 3个后续页及魔力值商店
+                self.assertEqual(first["page_cache"]["parsed"], 4)
+                reused = "not_modified" if etag else "unchanged"
+                self.assertEqual(second["page_cache"], {"not_modified": 0, "unchanged": 0, "parsed": 0, reused: 4})
+
+    def test_incremental_pagination_stops_at_stored_pages(self):
+        with FakeTracker(pages=6) as tracker:
+            sites = [tracker.add_nexusphp_site("Deep")]
+            full = run_refresh(tracker, sites, self.tmp.name, modules=self.modules)
+            tracker.hits.clear()
+            incremental = run_refresh(tracker, sites, self.tmp.name, incremental=True, modules=self.modules)
+            # 首页与第2页均与保存的列表一致，只请求首页、第2页及发邀页
+            self.assertEqual(tracker.hits[("deep.nexusphp.test", "/invite.php")], 3)
+            self.assertEqual(incremental["incremental"], ["Deep"])
+            self.assertEqual(incremental["invitees"], full["invitees"])
+            # 沿用的已保存成员不计入本次历史样本
+            self.assertEqual(full["recorded"], {"Deep": expected_invitees(6)})
+            self.assertEqual(incremental["recorded"], {"Deep": 2 * PAGE_SIZE})
+
+            # 页数不变但成员总数变化（按注册时间正序的站点新成员位于末页）时完整翻页
+            tracker._sites["deep.nexusphp.test"]["total"] = expected_invitees(6) + 5
+            tracker.hits.clear()
+            appended = run_refresh(tracker, sites, self.tmp.name, incremental=True, modules=self.modules)
+            self.assertEqual(appended["incremental"], [])
+            self.assertEqual(tracker.hits[("deep.nexusphp.test", "/invite.php")], 7)
+            del tracker._sites["deep.nexusphp.test"]["total"]
+
+            # 页数变化时完整翻页
+            tracker._sites["deep.nexusphp.test"]["pages"] = 7
+            grown = run_refresh(tracker, sites, self.tmp.name, incremental=True, modules=self.modules)
+            self.assertEqual(grown["incremental"], [])
+            self.assertEqual(grown["invitees"], {"Deep": expected_invitees(7)})
+
+    def test_parse_pool_matches_in_thread_parsing(self):
+        with FakeTracker(pages=4) as tracker:
+            sites = [tracker.add_nexusphp_site("Pooled")]
+            with tempfile.TemporaryDirectory() as data_path:
+                in_thread = run_refresh(tracker, sites, data_path, modules=self.modules)
+            pooled = run_refresh(tracker, sites, self.tmp.name, parse_workers=2, modules=self.modules)
+
+        self.assertEqual(pooled["error"], {})
+        self.assertEqual(pooled["summary"], in_thread["summary"])
+        # 3个后续页交给子进程解析
+        self.assertEqual(pooled["parse_pool"], {"pool": 3, "thread": 0})
+        self.assertEqual(in_thread["parse_pool"], {"pool": 0, "thread": 0})
+
+    def test_concurrent_refresh_benchmark(self):
+        results = {}
+        with FakeTracker(latency=0.01, pages=3) as tracker:
+            sites = [tracker.add_nexusphp_site(f"Site{index}") for index in range(6)]
+            for workers in (1, 4):
+                with tempfile.TemporaryDirectory() as data_path:
+                    results[workers] = run_refresh(tracker, sites, data_path, workers=workers, modules=self.modules)
+
+        self.assertEqual(results[1]["invitees"], results[4]["invitees"])
+        self.assertEqual(results[4]["summary"]["invitees"], 6 * expected_invitees(3))
+        print(f"\nreplay refresh of {len(sites)} sites: workers=1 {results[1]['seconds']:.2f}s, "
+              f"workers=4 {results[4]['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    unittest.main()
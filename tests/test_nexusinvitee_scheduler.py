@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+
+from nexusinvitee_loader import load_plugin_module
+
+HOUR = 3600
+
+
+class NexusInviteeSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.module = load_plugin_module("scheduler.py")
+        self.RefreshScheduler = self.module["RefreshScheduler"]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_interval_adapts_to_changes(self):
+        scheduler = self.RefreshScheduler(self.tmp.name)
+        now = 1_700_000_000
+        self.assertEqual(scheduler.due(["busy", "quiet"], now=now), ["busy", "quiet"])
+        scheduler.record_success("busy", changed=True, now=now)
+        scheduler.record_success("quiet", changed=False, now=now)
+        self.assertEqual(scheduler.get_state("busy")["interval"], 12 * HOUR)
+        self.assertEqual(scheduler.get_state("quiet")["interval"], 36 * HOUR)
+
+        self.assertEqual(scheduler.due(["busy", "quiet"], now=now + 13 * HOUR), ["busy"])
+        # 未记录结果前仍然到期
+        self.assertEqual(scheduler.due(["busy", "quiet"], now=now + 13 * HOUR), ["busy"])
+        self.assertEqual(scheduler.due(["quiet"], now=now + 40 * HOUR), ["quiet"])
+        # 非自适应模式下未熔断的站点总是到期
+        self.assertEqual(scheduler.due(["busy", "quiet"], adaptive=False, now=now), ["busy", "quiet"])
+
+    def test_failures_back_off_and_open_circuit(self):
+        scheduler = self.RefreshScheduler(self.tmp.name)
+        now = 1_700_000_000
+        for _ in range(3):
+            scheduler.record_failure("broken", "Cookie已失效", now=now)
+        state = scheduler.get_state("broken")
+        self.assertEqual(state["circuit"], self.module["CIRCUIT_OPEN"])
+        self.assertEqual(state["next_due"], now + 4 * 1800)
+        self.assertEqual(scheduler.due(["broken"], adaptive=False, now=now + HOUR), [])
+
+        # 熔断到期后试探一次，试探失败继续熔断并加倍退避；熔断状态变化使状态版本号递增
+        version = scheduler.get_version()
+        self.assertEqual(scheduler.due(["broken"], adaptive=False, now=now + 3 * HOUR), ["broken"])
+        self.assertGreater(scheduler.get_version(), version)
+        scheduler.record_failure("broken", "Cookie已失效", now=now + 3 * HOUR)
+        reloaded = self.RefreshScheduler(self.tmp.name)
+        state = reloaded.get_state("broken")
+        self.assertEqual((state["circuit"], state["next_due"]), ("open", now + 3 * HOUR + 8 * 1800))
+        self.assertEqual(reloaded.due(["broken"], now=now + 4 * HOUR), [])
+
+        version = reloaded.get_version()
+        reloaded.record_success("broken", changed=False, now=now + 5 * HOUR)
+        self.assertGreater(reloaded.get_version(), version)
+        self.assertEqual(reloaded.get_state("broken")["circuit"], "closed")
+        self.assertEqual(reloaded.get_state("broken")["failures"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
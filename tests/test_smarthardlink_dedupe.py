@@ -0,0 +1,198 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from smarthardlink_loader import load_plugin_module
+
+
+class SmartHardlinkDedupeTests(unittest.TestCase):
+    def setUp(self):
+        self.dedupe = load_plugin_module("dedupe.py")
+
+    def test_unique_sizes_are_never_hashed(self):
+        FileEntry = self.dedupe["FileEntry"]
+        files = [FileEntry(path, size) for path, size in [
+            ("/a/movie.mkv", 4000), ("/b/movie.mkv", 4000), ("/a/extra.mkv", 3000),
+            ("/a/sample.mkv", 100), ("/b/sample.mkv", 100), ("/c/sample.mkv", 100), ("/a/nfo", 7)]]
+
+        groups, stats = self.dedupe["bucket_by_size"](files)
+
+        self.assertEqual(groups, [[files[0], files[1]], [files[3], files[4], files[5]]])
+        self.assertEqual(stats, {"files": 7, "candidates": 5, "candidate_bytes": 8300,
+                                 "skipped": 2, "skipped_bytes": 3007})
+
+    def test_staged_hashing_only_full_hashes_partial_collisions(self):
+        size = 64 * 1024
+        base = os.urandom(size)
+        contents = {
+            "a.mkv": base,
+            "b.mkv": base,
+            # 头部不同的其他编码版本，部分摘要阶段即被排除
+            "encode.mkv": os.urandom(size),
+            # 只有采样区间之外的字节不同，需完整哈希才能区分
+            "tweak.mkv": base[:5000] + bytes([base[5000] ^ 1]) + base[5001:],
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            group = []
+            for name, data in contents.items():
+                path = os.path.join(tmp, name)
+                with open(path, "wb") as f:
+                    f.write(data)
+                group.append(self.dedupe["FileEntry"](path, size))
+
+            full_hashed = []
+
+            def full_hash(path):
+                full_hashed.append(os.path.basename(path))
+                return self.dedupe["full_digest"](path, 4096)
+
+            hasher = self.dedupe["StagedHasher"](full_hash, 4096, edge_size=1024, samples=3)
+            duplicates = hasher.find([group])
+
+            self.assertEqual([sorted(os.path.basename(entry.path) for entry in files) for files in duplicates.values()],
+                             [["a.mkv", "b.mkv"]])
+            self.assertEqual(sorted(full_hashed), ["a.mkv", "b.mkv", "tweak.mkv"])
+            self.assertEqual(hasher.stats["partial_bytes"], 4 * 5 * 1024)
+            self.assertEqual(hasher.stats["partial_dropped"], 1)
+            self.assertEqual(hasher.stats["full_bytes"], 3 * size)
+
+            same_content = self.dedupe["same_content"]
+            self.assertEqual(same_content(group[0][0], group[1][0], 4096), (True, 2 * size))
+            self.assertFalse(same_content(group[0][0], group[3][0], 4096)[0])
+
+    def test_hash_index_skips_unchanged_files(self):
+        HashIndex = load_plugin_module("hash_index.py")["HashIndex"]
+        size = 64 * 1024
+        base = os.urandom(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, data in (("a.mkv", base), ("b.mkv", base), ("c.mkv", os.urandom(size))):
+                paths.append(os.path.join(tmp, name))
+                with open(paths[-1], "wb") as f:
+                    f.write(data)
+
+            def scan():
+                entries = []
+                for path in paths:
+                    st = os.stat(path)
+                    entries.append(self.dedupe["FileEntry"](path, st.st_size, st.st_dev, st.st_ino, st.st_mtime_ns))
+                index = HashIndex(tmp)
+                try:
+                    hasher = self.dedupe["StagedHasher"](
+                        lambda path: self.dedupe["full_digest"](path, 4096), 4096,
+                        edge_size=1024, samples=3, index=index)
+                    duplicates = hasher.find([entries])
+                finally:
+                    index.close()
+                return duplicates, hasher.stats
+
+            cold, cold_stats = scan()
+            warm, warm_stats = scan()
+            self.assertEqual(warm, cold)
+            self.assertEqual(len(cold), 1)
+            self.assertEqual(cold_stats["partial_bytes"], 3 * 5 * 1024)
+            self.assertEqual(cold_stats["full_bytes"], 2 * size)
+            self.assertEqual(warm_stats["partial_bytes"] + warm_stats["full_bytes"], 0)
+            self.assertEqual(warm_stats["index_hits"], 5)
+
+            # 修改时间变化的文件重新读取
+            st = os.stat(paths[1])
+            os.utime(paths[1], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+            _, changed_stats = scan()
+            self.assertEqual(changed_stats["partial_bytes"], 5 * 1024)
+            self.assertEqual(changed_stats["full_bytes"], size)
+
+    def test_parallel_hashing_respects_device_limits(self):
+        hash_pool = load_plugin_module("hash_pool.py", MIB=self.dedupe["MIB"])
+        FileEntry = self.dedupe["FileEntry"]
+        lock = threading.Lock()
+        running, peak = {}, {}
+
+        def work(entry):
+            with lock:
+                running[entry.dev] = running.get(entry.dev, 0) + 1
+                peak[entry.dev] = max(peak.get(entry.dev, 0), running[entry.dev])
+            time.sleep(0.02)
+            with lock:
+                running[entry.dev] -= 1
+            return entry.path
+
+        entries = [FileEntry(f"/hdd/{index}", 1, dev=1) for index in range(6)] + \
+                  [FileEntry(f"/nvme/{index}", 1, dev=2) for index in range(6)]
+        pool = hash_pool["DevicePool"](1, {2: 3})
+        try:
+            results = pool.run(work, entries)
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(results, [entry.path for entry in entries])
+        self.assertEqual(peak, {1: 1, 2: 3})
+
+    def test_read_meter_caps_throughput(self):
+        hash_pool = load_plugin_module("hash_pool.py", MIB=self.dedupe["MIB"])
+        meter = hash_pool["ReadMeter"](max_mbps=20)
+        meter.add_total(4 * self.dedupe["MIB"], 1)
+        started = time.monotonic()
+        for _ in range(4):
+            meter.consume(self.dedupe["MIB"])
+        elapsed = time.monotonic() - started
+        progress = meter.snapshot()
+
+        self.assertGreaterEqual(elapsed, 0.18)
+        self.assertEqual(progress["bytes_done"], progress["bytes_total"])
+        self.assertEqual(progress["eta"], 0)
+
+    def test_scanner_stats_each_file_once_and_skips_links(self):
+        scan_files = load_plugin_module("scanner.py", FileEntry=self.dedupe["FileEntry"])["scan_files"]
+        with tempfile.TemporaryDirectory() as tmp:
+            for directory in ("a/b", "skip"):
+                os.makedirs(os.path.join(tmp, directory))
+            for name in ("top.mkv", "a/b/deep.mkv", "skip/ignored.mkv"):
+                with open(os.path.join(tmp, name), "wb") as f:
+                    f.write(b"x" * 10)
+            os.link(os.path.join(tmp, "top.mkv"), os.path.join(tmp, "a/linked.mkv"))
+            os.symlink(os.path.join(tmp, "top.mkv"), os.path.join(tmp, "a/symlink.mkv"))
+            os.symlink(os.path.join(tmp, "a"), os.path.join(tmp, "dirlink"))
+
+            entries = list(scan_files(tmp, skip_dir=lambda path: path.endswith("skip")))
+
+            self.assertEqual(sorted(os.path.relpath(entry.path, tmp) for entry in entries),
+                             ["a/b/deep.mkv", "a/linked.mkv", "top.mkv"])
+            for entry in entries:
+                st = os.stat(entry.path)
+                self.assertEqual((entry.size, entry.dev, entry.ino, entry.mtime_ns, entry.nlink),
+                                 (st.st_size, st.st_dev, st.st_ino, st.st_mtime_ns, st.st_nlink))
+
+    def test_hardlinked_entries_are_read_once(self):
+        FileEntry = self.dedupe["FileEntry"]
+        size = 64 * 1024
+        data = os.urandom(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, name) for name in ("a.mkv", "b.mkv", "c.mkv")]
+            for path in paths[:2]:
+                with open(path, "wb") as f:
+                    f.write(data)
+            os.link(paths[0], paths[2])
+            group = [FileEntry.from_stat(path, os.stat(path)) for path in paths]
+
+            hasher = self.dedupe["StagedHasher"](lambda path: self.dedupe["full_digest"](path, 4096), 4096,
+                                                 edge_size=1024, samples=3)
+            duplicates = hasher.find([group])
+
+            self.assertEqual(list(duplicates.values()), [group])
+            self.assertEqual(hasher.stats["partial_bytes"], 2 * 5 * 1024)
+            self.assertEqual(hasher.stats["full_bytes"], 2 * size)
+
+    def test_small_files_skip_partial_stage(self):
+        self.assertIsNone(self.dedupe["partial_ranges"](10 * 1024, 4 * 1024, 3))
+        self.assertIsNone(self.dedupe["partial_ranges"](10 ** 9, 0, 3))
+        ranges = self.dedupe["partial_ranges"](100 * 1024, 4 * 1024, 3)
+        self.assertEqual(ranges[0], (0, 4 * 1024))
+        self.assertEqual(ranges[-1], (96 * 1024, 4 * 1024))
+        self.assertEqual(len(ranges), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()